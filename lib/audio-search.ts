@@ -316,9 +316,11 @@ export async function findCandidates(signature: TargetSignature, limit = 200): P
     const dbPath = path.resolve(process.cwd(), 'enhanced_music.db');
     console.log('[audio-search] Opening database at:', dbPath);
     
+    // The importer publishes snapshots over this file (scripts/db_publish.py); never write to it
     const db = await open({
       filename: dbPath,
       driver: sqlite3.Database,
+      mode: sqlite3.OPEN_READONLY,
     });
     
     // Query by BPM range and order by how close to target
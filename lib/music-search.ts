@@ -383,7 +383,7 @@ async function searchLocalDatabase(query: string, limit: number = 15, applyDiver
     `.replace(/\n/g, ' ');
 
     const dbPath = path.join(process.cwd(), 'enhanced_music.db');
-    const command = `sqlite3 "${dbPath}" "${sqlQuery.replace(/"/g, '\\"')}"`;
+    const command = `sqlite3 -readonly "${dbPath}" "${sqlQuery.replace(/"/g, '\\"')}"`;
     
     let output = '';
     try {
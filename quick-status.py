@@ -2,34 +2,30 @@
 """
 Simple Phase 2 Status - shows current state
 """
-import sqlite3
-import os
-import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from import_progress import read_progress
+
 db_path = Path("enhanced_music.db")
 
 if not db_path.exists():
     print("❌ Database not found")
     exit(1)
 
-conn = sqlite3.connect(str(db_path))
-c = conn.cursor()
-
-c.execute("SELECT COUNT(*) FROM songs")
-total = c.fetchone()[0]
-
-c.execute("SELECT COUNT(*) FROM songs WHERE artist IS NOT NULL")
-with_artist = c.fetchone()[0]
-
-c.execute("SELECT COUNT(DISTINCT artist) FROM songs")
-unique_artists = c.fetchone()[0]
-
-c.execute("SELECT COUNT(*) FROM songs WHERE genres IS NOT NULL")
-with_genres = c.fetchone()[0]
+progress = read_progress(str(db_path))
+if progress is None:
+    print("❌ No import_progress row yet (start the importer)")
+    exit(1)
 
-file_size_mb = db_path.stat().st_size / 1024 / 1024
+total = progress['total_songs']
+with_artist = progress['with_artist']
+unique_artists = progress['unique_artists']
+with_genres = progress['with_genres']
+file_size_mb = progress['size_mb']
 
-print(f"Total: {total:,} | Artists: {with_artist:,} | Unique: {unique_artists:,} | Genres: {with_genres:,} | Size: {file_size_mb:.1f}MB | Progress: {100*total/40000:.1f}%")
+target = progress['target_songs']
+percent = f"{100*total/target:.1f}%" if target else "n/a"
 
-conn.close()
+print(f"Total: {total:,} | Artists: {with_artist:,} | Unique: {unique_artists:,} | Genres: {with_genres:,} | Size: {file_size_mb:.1f}MB | Progress: {percent} | Stage: {progress['stage']}")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+scripts/artist_aggregates.py
+
+Rebuild the per-artist aggregates in `artists` after an import, so artist
+queries read one small row instead of grouping `songs` on demand.
+
+- total_songs: songs by the artist
+- genres: the artist's TOP_GENRES most frequent genres (JSON array), from
+  `json_each` over songs.genres
+- popularity_score: the Last.fm score from artist_cache when there is one
+  (see artist_enrichment.py), else the artist's most popular song
+
+Each run is one set-based INSERT ... SELECT ... GROUP BY with an upsert, not
+per-song work. After the first (full) run, only artists whose songs changed
+are recomputed:
+
+- songs with `last_updated` at or after the previous run's start, and
+- artists whose song count in the trigger-maintained `artist_counts` no
+  longer matches `artists.total_songs`. This catches deletes, which leave no
+  row to carry a timestamp.
+
+Artists left with no songs keep their row (Last.fm data stays cached) with
+total_songs = 0. Writers that change songs in place should bump
+last_updated, as the replication and enrichment stages do.
+
+Usage:
+  python scripts/artist_aggregates.py enhanced_music.db          # incremental
+  python scripts/artist_aggregates.py enhanced_music.db --full   # everything
+
+Run on its own, it works on the staging DB and publishes when done (db_publish.py).
+"""
+import argparse
+import sqlite3
+import time
+
+from artist_enrichment import ensure_artist_cache
+from db_publish import prepare_staging, publish
+from song_stats import ensure_song_stats
+
+TOP_GENRES = 5
+
+AGGREGATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS artist_aggregation_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_run TIMESTAMP NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_songs_last_updated ON songs(last_updated);
+"""
+
+
+def ensure_artist_aggregates(conn):
+    ensure_song_stats(conn)  # artist_counts
+    ensure_artist_cache(conn)
+    conn.executescript(AGGREGATE_SCHEMA)
+
+
+def _aggregate_sql(scope, songs='songs s'):
+    """
+    Upsert aggregates for artists matching `scope` (a condition on s.artist).
+    A full pass reads `songs s NOT INDEXED`: one sequential scan, grouped in
+    a temp b-tree, is about twice as fast as walking idx_artist.
+    """
+    return f"""
+        WITH counts AS (
+            SELECT s.artist, COUNT(*) AS total_songs, MAX(s.popularity_score) AS top_popularity
+            FROM {songs}
+            WHERE s.artist IS NOT NULL AND {scope}
+            GROUP BY s.artist
+        ),
+        genre_counts AS (
+            SELECT s.artist, g.value AS genre, COUNT(*) AS n
+            FROM {songs}, json_each(CASE WHEN json_valid(s.genres) THEN s.genres ELSE '[]' END) g
+            WHERE s.artist IS NOT NULL AND g.type = 'text' AND {scope}
+            GROUP BY s.artist, g.value
+        ),
+        ranked AS (
+            SELECT artist, genre, ROW_NUMBER() OVER (PARTITION BY artist ORDER BY n DESC, genre) AS rank
+            FROM genre_counts
+        ),
+        top AS (
+            SELECT artist, json_group_array(genre) AS genres
+            FROM (SELECT artist, genre FROM ranked WHERE rank <= {TOP_GENRES} ORDER BY artist, rank)
+            GROUP BY artist
+        )
+        INSERT INTO artists (name, total_songs, genres, popularity_score, last_updated)
+        SELECT c.artist, c.total_songs, top.genres, COALESCE(cache.popularity_score, c.top_popularity), CURRENT_TIMESTAMP
+        FROM counts c
+        LEFT JOIN top ON top.artist = c.artist
+        LEFT JOIN artist_cache cache ON cache.name = c.artist AND cache.found = 1
+        WHERE true
+        ON CONFLICT(name) DO UPDATE SET
+            total_songs = excluded.total_songs,
+            genres = excluded.genres,
+            popularity_score = excluded.popularity_score,
+            last_updated = excluded.last_updated
+    """
+
+
+def aggregate_artists(conn, full=False):
+    """Refresh `artists`; returns {'mode', 'artists', 'emptied', 'seconds'}"""
+    start = time.time()
+    ensure_artist_aggregates(conn)
+    run_started = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    row = conn.execute("SELECT last_run FROM artist_aggregation_state WHERE id = 1").fetchone()
+    full = full or row is None
+
+    if full:
+        changes = conn.total_changes  # cursor.rowcount is -1 for WITH ... INSERT
+        conn.execute(_aggregate_sql('true', 'songs s NOT INDEXED'))
+        artists = conn.total_changes - changes
+        emptied = conn.execute("""
+            UPDATE artists SET total_songs = 0, genres = NULL, last_updated = CURRENT_TIMESTAMP
+            WHERE total_songs > 0 AND name NOT IN (SELECT artist FROM artist_counts)
+        """).rowcount
+    else:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_artists (name TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM changed_artists")
+        conn.execute("""
+            INSERT OR IGNORE INTO changed_artists
+            SELECT artist FROM songs WHERE last_updated >= ? AND artist IS NOT NULL
+        """, (row[0],))
+        conn.execute("""
+            INSERT OR IGNORE INTO changed_artists
+            SELECT c.artist FROM artist_counts c LEFT JOIN artists a ON a.name = c.artist
+            WHERE a.total_songs IS NOT c.songs
+        """)
+        changes = conn.total_changes
+        conn.execute(_aggregate_sql('s.artist IN (SELECT name FROM changed_artists)'))
+        artists = conn.total_changes - changes
+        emptied = conn.execute("""
+            UPDATE artists SET total_songs = 0, genres = NULL, last_updated = CURRENT_TIMESTAMP
+            WHERE total_songs > 0 AND NOT EXISTS (SELECT 1 FROM artist_counts WHERE artist = artists.name)
+        """).rowcount
+
+    conn.execute("INSERT OR REPLACE INTO artist_aggregation_state (id, last_run) VALUES (1, ?)", (run_started,))
+    conn.commit()
+    return {'mode': 'full' if full else 'incremental', 'artists': artists, 'emptied': emptied,
+            'seconds': time.time() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-artist aggregates in the artists table")
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    parser.add_argument('--full', action='store_true', help="recompute every artist, not just changed ones")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(str(prepare_staging(args.db)))
+    try:
+        result = aggregate_artists(conn, full=args.full)
+        print(f"✅ {result['mode'].capitalize()} artist aggregation: {result['artists']:,} artists updated, "
+              f"{result['emptied']:,} emptied in {result['seconds']:.1f}s")
+        published = publish(conn, args.db)
+        print(f"✅ Published {args.db} ({published['size_mb']:.1f} MB)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
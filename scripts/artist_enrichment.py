@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+scripts/artist_enrichment.py
+
+Artist-level enrichment: tags, popularity and similar artists fetched once
+per artist and copied to all of that artist's songs.
+
+The catalog averages 10-20 songs per artist, so looking up artists instead
+of songs cuts external calls by an order of magnitude. Lookups land in the
+`artist_cache` table (misses too, so unknown names are not retried), which
+makes the stage resumable and lets re-runs fetch only new or stale artists.
+propagate() then applies the cache in two set-based statements:
+
+- `songs`: similar_artists, popularity_score (from listeners) and the artist
+  tags merged into `tags`, via one UPDATE ... FROM artist_cache; only songs
+  where one of those would change are rewritten
+- `artists`: popularity_score and similar_artists upserted per artist
+
+Sources:
+
+- Last.fm `artist.getInfo` (LASTFM_API_KEY)
+- a local JSON Lines stand-in (LASTFM_ARTISTS_FILE), one artist per line:
+  {"name": ..., "tags": [...], "listeners": 123, "similar": [...]}
+
+Usage:
+  LASTFM_API_KEY=... python scripts/enhanced-music-importer.py 10000
+  python scripts/artist_enrichment.py enhanced_music.db --file artists.jsonl
+  python scripts/artist_enrichment.py enhanced_music.db --propagate-only
+
+Run on its own, it works on the staging DB and publishes when done (db_publish.py).
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from db_publish import prepare_staging, publish
+from song_stats import ensure_song_stats
+
+LASTFM_URL = 'https://ws.audioscrobbler.com/2.0/'
+CACHE_DAYS = int(os.environ.get('ARTIST_CACHE_DAYS', '30'))
+MAX_TAGS = 5
+MAX_SIMILAR = 10
+CACHE_BATCH = 500
+
+ARTIST_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS artist_cache (
+        name TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        found INTEGER NOT NULL,
+        tags TEXT,
+        listeners INTEGER,
+        popularity_score INTEGER,
+        similar_artists TEXT,
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+def ensure_artist_cache(conn):
+    conn.executescript(ARTIST_CACHE_SCHEMA)
+
+
+def popularity_from_listeners(listeners):
+    """Last.fm listeners -> 0-100 on a log scale (10M listeners = 100)"""
+    if not listeners:
+        return None
+    return min(100, max(0, round(math.log10(listeners + 1) / 7 * 100)))
+
+
+def artist_info(tags, listeners, similar):
+    return {
+        'tags': [t.lower() for t in tags if t][:MAX_TAGS],
+        'listeners': listeners,
+        'similar': [s for s in similar if s][:MAX_SIMILAR],
+    }
+
+
+class LastfmSource:
+    """artist.getInfo; lookup() returns None for unknown artists and raises on transient errors"""
+
+    name = 'lastfm'
+
+    def __init__(self, api_key, session, rate_limit=None):
+        self.api_key = api_key
+        self.session = session
+        self.rate_limit = rate_limit or (lambda: None)
+
+    def lookup(self, artist):
+        self.rate_limit()
+        response = self.session.get(LASTFM_URL, params={
+            'method': 'artist.getinfo', 'artist': artist, 'autocorrect': 1,
+            'api_key': self.api_key, 'format': 'json',
+        }, timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            if data['error'] == 6:  # "The artist you supplied could not be found"
+                return None
+            raise RuntimeError(f"Last.fm error {data['error']}: {data.get('message')}")
+        info = data.get('artist', {})
+        listeners = (info.get('stats') or {}).get('listeners')
+        return artist_info(
+            [t.get('name') for t in (info.get('tags') or {}).get('tag', [])],
+            int(listeners) if listeners else None,
+            [s.get('name') for s in (info.get('similar') or {}).get('artist', [])],
+        )
+
+
+class FileSource:
+    """Local JSON Lines stand-in for Last.fm, matched case-insensitively"""
+
+    name = 'file'
+
+    def __init__(self, path):
+        self.artists = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    self.artists[row['name'].lower()] = artist_info(
+                        row.get('tags', []), row.get('listeners'), row.get('similar', []))
+
+    def lookup(self, artist):
+        return self.artists.get(artist.lower())
+
+
+def source_from_env(session=None, rate_limit=None):
+    """LastfmSource if LASTFM_API_KEY is set, else FileSource for LASTFM_ARTISTS_FILE, else None"""
+    if os.environ.get('LASTFM_API_KEY'):
+        if session is None:
+            import requests
+            session = requests.Session()
+        return LastfmSource(os.environ['LASTFM_API_KEY'], session, rate_limit)
+    if os.environ.get('LASTFM_ARTISTS_FILE'):
+        return FileSource(os.environ['LASTFM_ARTISTS_FILE'])
+    return None
+
+
+def artists_to_enrich(conn, max_age_days=CACHE_DAYS):
+    """Artists with songs but no fresh cache entry, most songs first"""
+    return [row[0] for row in conn.execute("""
+        SELECT a.artist FROM artist_counts a
+        LEFT JOIN artist_cache c ON c.name = a.artist AND c.fetched_at > datetime('now', ?)
+        WHERE c.name IS NULL AND a.artist <> 'Unknown'
+        ORDER BY a.songs DESC
+    """, (f'-{max_age_days} days',))]
+
+
+def store_cache(conn, source_name, results):
+    """results: [(artist, info or None)]"""
+    conn.executemany("""
+        INSERT OR REPLACE INTO artist_cache (name, source, found, tags, listeners, popularity_score, similar_artists, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """, [(artist, source_name, int(info is not None),
+           json.dumps(info['tags']) if info else None,
+           info['listeners'] if info else None,
+           popularity_from_listeners(info['listeners']) if info else None,
+           json.dumps(info['similar']) if info else None)
+          for artist, info in results])
+
+
+def fetch_artists(conn, source, artists, on_progress=None, on_result=None):
+    """Look up `artists`, committing the cache every CACHE_BATCH; returns {'found', 'missing', 'errors'}"""
+    counts = {'found': 0, 'missing': 0, 'errors': 0}
+    batch = []
+    for i, artist in enumerate(artists, 1):
+        try:
+            info = source.lookup(artist)
+        except Exception:
+            info = False  # not cached, so the next run retries it
+        result = 'error' if info is False else 'hit' if info else 'miss'
+        counts[{'error': 'errors', 'hit': 'found', 'miss': 'missing'}[result]] += 1
+        if on_result:
+            on_result(result)
+        if info is not False:
+            batch.append((artist, info))
+        if len(batch) >= CACHE_BATCH:
+            store_cache(conn, source.name, batch)
+            conn.commit()
+            batch = []
+        if on_progress:
+            on_progress(i)
+    if batch:
+        store_cache(conn, source.name, batch)
+        conn.commit()
+    return counts
+
+
+def propagate(conn):
+    """Copy cached artist data to songs and artists; returns (songs updated, artists upserted)"""
+    songs = conn.execute("""
+        UPDATE songs SET
+            similar_artists = c.similar_artists,
+            popularity_score = COALESCE(c.popularity_score, songs.popularity_score),
+            tags = (SELECT json_group_array(value) FROM (
+                        SELECT value FROM json_each(CASE WHEN json_valid(songs.tags) THEN songs.tags ELSE '[]' END)
+                        UNION SELECT value FROM json_each(c.tags))),
+            last_updated = CURRENT_TIMESTAMP
+        FROM artist_cache c
+        WHERE c.name = songs.artist AND c.found = 1
+          AND (songs.similar_artists IS NOT c.similar_artists
+               OR (c.popularity_score IS NOT NULL AND songs.popularity_score IS NOT c.popularity_score)
+               OR EXISTS (SELECT 1 FROM json_each(c.tags) t
+                          WHERE t.value NOT IN (SELECT value FROM json_each(
+                              CASE WHEN json_valid(songs.tags) THEN songs.tags ELSE '[]' END))))
+    """).rowcount
+    artists = conn.execute("""
+        INSERT INTO artists (name, popularity_score, similar_artists, last_updated)
+        SELECT name, popularity_score, similar_artists, CURRENT_TIMESTAMP FROM artist_cache WHERE found = 1
+        ON CONFLICT(name) DO UPDATE SET
+            popularity_score = excluded.popularity_score,
+            similar_artists = excluded.similar_artists,
+            last_updated = excluded.last_updated
+        WHERE artists.similar_artists IS NOT excluded.similar_artists
+           OR artists.popularity_score IS NOT excluded.popularity_score
+    """).rowcount
+    conn.commit()
+    return songs, artists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artist-level enrichment for enhanced_music.db")
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    parser.add_argument('--file', help="JSON Lines stand-in for Last.fm (default: LASTFM_API_KEY / LASTFM_ARTISTS_FILE)")
+    parser.add_argument('--propagate-only', action='store_true', help="apply the cache without fetching")
+    args = parser.parse_args()
+
+    source = None
+    if not args.propagate_only:
+        source = FileSource(args.file) if args.file else source_from_env()
+        if source is None:
+            print("❌ No artist source: set LASTFM_API_KEY or LASTFM_ARTISTS_FILE, or pass --file")
+            sys.exit(1)
+
+    conn = sqlite3.connect(str(prepare_staging(args.db)))
+    try:
+        ensure_artist_cache(conn)
+        ensure_song_stats(conn)  # artists_to_enrich reads artist_counts
+        if source is not None:
+            artists = artists_to_enrich(conn)
+            start = time.time()
+            counts = fetch_artists(conn, source, artists)
+            print(f"✅ Looked up {len(artists):,} artists in {time.time() - start:.0f}s "
+                  f"({counts['found']:,} found, {counts['missing']:,} unknown, {counts['errors']} errors)")
+        songs, artists = propagate(conn)
+        print(f"✅ Updated {songs:,} songs and {artists:,} artists from the cache")
+        result = publish(conn, args.db)
+        print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+scripts/artist_gazetteer.py
+
+Known-artist lookup for QueryAnalyzer: longest match of query tokens against
+every artist name in enhanced_music.db.
+
+The gazetteer is one file (`artists.gazetteer`, next to the DB): a version
+line, then the normalized names sorted and newline-separated. Readers mmap
+it and binary-search the bytes directly, look(1) style, so there is no index
+to load: startup is instant and ~1M names cost no Python objects, only page
+cache. A lookup extends each token span while some name still starts with
+it, so it is O(query tokens^2 x log names) with a handful of tokens.
+
+Names and queries go through the same text_normalize.normalize_text():
+casefold, accents and punctuation stripped, whitespace collapsed
+("Beyoncé" -> "beyonce", "Guns N' Roses" -> "guns n roses"). Unlike the
+songs.artist_norm search key it keeps a leading "the", which is part of
+what users type.
+
+The importer rewrites the file after publishing; writes are atomic
+(os.replace), so a running analyzer keeps its old mapping until it reopens.
+
+Usage:
+  python scripts/artist_gazetteer.py build enhanced_music.db          # -> artists.gazetteer
+  python scripts/artist_gazetteer.py lookup artists.gazetteer "songs by the weeknd"
+"""
+import argparse
+import mmap
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from text_normalize import normalize_text
+
+FORMAT = b'artist-gazetteer 1\n'
+DEFAULT_NAME = 'artists.gazetteer'
+
+def gazetteer_path(db_path):
+    return Path(db_path).with_name(DEFAULT_NAME)
+
+
+def build_gazetteer(conn, path):
+    """Write the sorted, normalized artist names of `conn` to `path`; returns the name count"""
+    rows = conn.execute("SELECT DISTINCT artist FROM songs")  # walks idx_artist
+    names = sorted({normalize_text(artist) for (artist,) in rows if artist} - {'', 'unknown'})
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(FORMAT)
+        f.write(''.join(name + '\n' for name in names).encode('utf-8'))
+    os.replace(tmp, path)
+    return len(names)
+
+
+class ArtistGazetteer:
+    """mmapped sorted name file; contains() and longest_match() are binary searches"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(FORMAT)] != FORMAT:
+            self.mm.close()
+            raise ValueError(f"{self.path} is not an {FORMAT.decode().strip()} file; rebuild it")
+        self.start = len(FORMAT)
+        self.size = len(self.mm)
+
+    def _lower_bound(self, key):
+        """Offset of the first name >= key (or the file size)"""
+        lo, hi = self.start, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = max(self.mm.rfind(b'\n', self.start, mid) + 1, self.start)
+            line_end = self.mm.find(b'\n', line_start)
+            if self.mm[line_start:line_end] < key:
+                lo = line_end + 1
+            else:
+                hi = line_start
+        return lo
+
+    def _name_at(self, offset):
+        if offset >= self.size:
+            return None
+        return self.mm[offset:self.mm.find(b'\n', offset)]
+
+    def contains(self, name):
+        key = normalize_text(name).encode('utf-8')
+        return bool(key) and self._name_at(self._lower_bound(key)) == key
+
+    def longest_match(self, tokens, skip=None):
+        """
+        Longest run of `tokens` (already normalized) that is a known name.
+        `skip(span_tokens)` can reject a match, e.g. one made only of genre words.
+        """
+        best = None
+        for i in range(len(tokens)):
+            for j in range(i + 1, len(tokens) + 1):
+                key = ' '.join(tokens[i:j]).encode('utf-8')
+                found = self._name_at(self._lower_bound(key))
+                if found is None or not found.startswith(key):
+                    break  # no name continues this span
+                if found == key and (best is None or j - i > best[1] - best[0]) and not (skip and skip(tokens[i:j])):
+                    best = (i, j)
+        return ' '.join(tokens[best[0]:best[1]]) if best else None
+
+    def close(self):
+        self.mm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the artist gazetteer")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help="write artists.gazetteer from a database")
+    p_build.add_argument('db', nargs='?', default='enhanced_music.db')
+    p_build.add_argument('-o', '--output', help="default: artists.gazetteer next to the database")
+    p_lookup = sub.add_parser('lookup', help="longest known artist in a query")
+    p_lookup.add_argument('gazetteer')
+    p_lookup.add_argument('query')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not os.path.exists(args.db):
+            print(f"❌ Database not found: {args.db}")
+            sys.exit(1)
+        start = time.time()
+        output = args.output or gazetteer_path(args.db)
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        try:
+            count = build_gazetteer(conn, output)
+        finally:
+            conn.close()
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        print(f"✅ {count:,} artist names -> {output} ({size_mb:.1f} MB) in {time.time() - start:.1f}s")
+    else:
+        gazetteer = ArtistGazetteer(args.gazetteer)
+        start = time.perf_counter()
+        match = gazetteer.longest_match(normalize_text(args.query).split())
+        print(f"{match or '(no known artist)'}  [{(time.perf_counter() - start) * 1000:.2f} ms]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+scripts/audio_features.py
+
+Feature extractor registry with a feature-versioned cache, shared by
+extract_audio_features.py and extract_audio_features_simple.py.
+
+Every feature and intermediate is registered with a version string and the
+names it depends on. Results are cached per (file hash, name, version) in
+the `feature_cache` table of the features DB, so bumping one heuristic's
+version only recomputes that feature (and anything built on it), from
+cached intermediates where possible. Decoding the audio only happens when something that is not
+cached actually needs the samples.
+
+Intermediates kept in the cache: the onset strength envelope (float16) and
+the mean chroma vector. Full chroma frames are not stored (~0.4 MB/track);
+a key heuristic that needs them will decode again. The embedding is cached
+as a raw float16 BLOB, the same encoding as features.embedding
+(embedding_store.py), so re-runs skip OpenL3 at 1 KB rather than 2 KB/track.
+
+Adding or changing a feature:
+
+    @feature('danceability', version='2', needs=('bpm', 'rhythm_strength', 'energy'))
+    def _danceability(bpm, rhythm_strength, energy):
+        ...
+"""
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+
+from embedding_store import decode_embedding, encode_embedding
+from harmonic import camelot_code, estimate_key_from_chroma, key_label
+
+try:
+    import librosa
+except Exception:
+    librosa = None
+
+SAMPLE_RATE = 48000
+EMBED_DIM = 512  # openl3 embedding_size
+
+SCALAR_FEATURES = ('duration', 'bpm', 'key', 'camelot', 'energy', 'danceability', 'rhythm_strength', 'spectral_centroid')
+ALL_FEATURES = SCALAR_FEATURES + ('embedding',)
+
+REGISTRY = {}
+
+
+class AudioDecodeError(Exception):
+    """The audio file could not be loaded"""
+
+
+class Spec:
+    """A registered feature or intermediate"""
+
+    def __init__(self, name, version, needs, compute, kind, cacheable=True):
+        self.name = name
+        self.version = version
+        self.needs = needs
+        self.compute = compute
+        self.kind = kind
+        self.cacheable = cacheable
+
+
+def _register(kind, name, version, needs=(), cacheable=True):
+    def wrap(fn):
+        REGISTRY[name] = Spec(name, version, tuple(needs), fn, kind, cacheable)
+        return fn
+    return wrap
+
+
+def effective_version(name):
+    """Own version plus the versions of everything it is computed from,
+    so bumping an intermediate also invalidates the features built on it."""
+    spec = REGISTRY[name]
+    deps = [f"{dep}:{effective_version(dep)}" for dep in spec.needs if REGISTRY[dep].cacheable]
+    return spec.version + (f"({','.join(deps)})" if deps else '')
+
+
+def feature(name, version, needs=()):
+    return _register('feature', name, version, needs)
+
+
+def intermediate(name, version, needs=(), cacheable=True):
+    return _register('intermediate', name, version, needs, cacheable)
+
+
+# --- Intermediates -----------------------------------------------------------
+
+@intermediate('audio', version='1', cacheable=False)
+def _audio(path):
+    # Only files with something uncached get here, so cache hits run without librosa
+    if librosa is None:
+        raise RuntimeError("librosa is not installed (pip install librosa); it is needed to decode uncached audio")
+    y, sr = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+    return y
+
+
+@intermediate('onset_env', version='1', needs=('audio',))
+def _onset_env(audio):
+    return librosa.onset.onset_strength(y=audio, sr=SAMPLE_RATE).astype(np.float16)
+
+
+@intermediate('chroma_mean', version='1', needs=('audio',))
+def _chroma_mean(audio):
+    return librosa.feature.chroma_cqt(y=audio, sr=SAMPLE_RATE).mean(axis=1)
+
+
+# --- Features ----------------------------------------------------------------
+
+@feature('duration', version='1', needs=('audio',))
+def _duration(audio):
+    return float(librosa.get_duration(y=audio, sr=SAMPLE_RATE))
+
+
+@feature('bpm', version='1', needs=('onset_env',))
+def _bpm(onset_env):
+    try:
+        tempo = librosa.beat.tempo(onset_envelope=onset_env.astype(np.float32), sr=SAMPLE_RATE)
+        return float(tempo[0]) if tempo.size else None
+    except Exception:
+        return None
+
+
+@feature('rhythm_strength', version='1', needs=('onset_env',))
+def _rhythm_strength(onset_env):
+    return float(onset_env.astype(np.float32).mean()) if onset_env.size else 0.0
+
+
+@feature('energy', version='1', needs=('audio',))
+def _energy(audio):
+    return float(np.mean(librosa.feature.rms(y=audio)))
+
+
+@feature('spectral_centroid', version='1', needs=('audio',))
+def _spectral_centroid(audio):
+    return float(np.mean(librosa.feature.spectral_centroid(y=audio, sr=SAMPLE_RATE)))
+
+
+@feature('key', version='2', needs=('chroma_mean',))
+def _key(chroma_mean):
+    # Correlate the mean chroma against major/minor key profiles -> 'A minor'
+    return key_label(*estimate_key_from_chroma(chroma_mean))
+
+
+@feature('camelot', version='1', needs=('chroma_mean',))
+def _camelot(chroma_mean):
+    return camelot_code(*estimate_key_from_chroma(chroma_mean))
+
+
+@feature('danceability', version='1', needs=('bpm', 'rhythm_strength', 'energy'))
+def _danceability(bpm, rhythm_strength, energy):
+    # Simple heuristic combining bpm, beat strength and energy
+    if bpm is None:
+        bpm_factor = 0.5
+    else:
+        bpm_clamped = min(max(bpm, 60), 180)
+        bpm_factor = (bpm_clamped - 60) / (180 - 60)
+    score = 0.4 * bpm_factor + 0.4 * rhythm_strength + 0.2 * energy
+    return float(max(0.0, min(1.0, score)))
+
+
+@feature('embedding', version='1', needs=('audio',))
+def _embedding(audio):
+    # OpenL3 embedding averaged over frames and L2-normalized
+    import openl3
+
+    emb, _ = openl3.get_audio_embedding(audio, SAMPLE_RATE, input_repr="mel256", content_type="music", embedding_size=EMBED_DIM)
+    emb_mean = np.mean(emb, axis=0)
+    norm = np.linalg.norm(emb_mean)
+    if norm > 0:
+        emb_mean = emb_mean / norm
+    return emb_mean.astype('float32')
+
+
+# --- Cache -------------------------------------------------------------------
+
+_NPY_MAGIC = b'\x93NUMPY'
+
+# Names cached as raw float16 BLOBs instead of .npy
+FLOAT16_CACHED = {'embedding'}
+
+
+def _encode(value, name=None):
+    if name in FLOAT16_CACHED and isinstance(value, np.ndarray):
+        return encode_embedding(value)
+    if isinstance(value, np.ndarray):
+        buf = io.BytesIO()
+        np.save(buf, value, allow_pickle=False)
+        return buf.getvalue()
+    return json.dumps(value)
+
+
+def _decode(value, name=None):
+    if name in FLOAT16_CACHED and isinstance(value, bytes) and not value.startswith(_NPY_MAGIC):
+        return decode_embedding(value).astype(np.float32)
+    if isinstance(value, bytes):
+        return np.load(io.BytesIO(value), allow_pickle=False)
+    return json.loads(value)
+
+
+class FeatureCache:
+    """(file hash, name) -> (version, value) cache stored in the features DB"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feature_cache (
+                file_hash TEXT NOT NULL,
+                name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value,
+                PRIMARY KEY (file_hash, name)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                file_hash TEXT
+            );
+        """)
+
+    def file_hash(self, path):
+        """Content hash, reused while the file's size and mtime are unchanged"""
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime, file_hash FROM file_hashes WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return row[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime, file_hash) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime, file_hash),
+        )
+        return file_hash
+
+    def get(self, file_hash, spec):
+        row = self.conn.execute(
+            "SELECT version, value FROM feature_cache WHERE file_hash = ? AND name = ?", (file_hash, spec.name)
+        ).fetchone()
+        if row is None or row[0] != effective_version(spec.name):
+            return False, None
+        value = _decode(row[1], spec.name)
+        if spec.name in FLOAT16_CACHED and isinstance(row[1], bytes) and row[1].startswith(_NPY_MAGIC):
+            self.put(file_hash, spec, value)  # float32 .npy from before FLOAT16_CACHED: shrink in place
+        return True, value
+
+    def put(self, file_hash, spec, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO feature_cache (file_hash, name, version, value) VALUES (?, ?, ?, ?)",
+            (file_hash, spec.name, effective_version(spec.name), _encode(value, spec.name)),
+        )
+
+
+class _Extraction:
+    """Resolves names for one file, consulting the cache before computing"""
+
+    def __init__(self, path, cache):
+        self.path = path
+        self.cache = cache
+        self.file_hash = cache.file_hash(path) if cache is not None else None
+        self.values = {}
+        self.decoded = False
+
+    def get(self, name):
+        if name in self.values:
+            return self.values[name]
+        spec = REGISTRY[name]
+        if spec.cacheable and self.cache is not None:
+            hit, value = self.cache.get(self.file_hash, spec)
+            if hit:
+                self.values[name] = value
+                return value
+
+        if name == 'audio':
+            try:
+                value = spec.compute(self.path)
+            except Exception as exc:
+                raise AudioDecodeError(exc) from exc
+            self.decoded = True
+        else:
+            value = spec.compute(*[self.get(dep) for dep in spec.needs])
+
+        self.values[name] = value
+        if spec.cacheable and self.cache is not None and value is not None:
+            self.cache.put(self.file_hash, spec, value)
+        return value
+
+
+def extract(path, cache=None, names=SCALAR_FEATURES):
+    """
+    Compute the requested features for one file.
+    Returns (features dict, whether the audio had to be decoded).
+    Raises AudioDecodeError if the audio cannot be loaded; individual
+    features that fail (e.g. openl3 for 'embedding') come back as None and
+    are not cached.
+    """
+    run = _Extraction(str(path), cache)
+    results = {}
+    for name in names:
+        try:
+            results[name] = run.get(name)
+        except AudioDecodeError:
+            raise
+        except Exception as exc:
+            print(f"{name} failed for {path}: {exc}")
+            results[name] = None
+    return results, run.decoded
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+scripts/audio_index.py
+
+Build a scalable FAISS search index from the collected OpenL3 embeddings.
+
+`extract_audio_features.py` stores every embedding as a float16 BLOB in
+`features.embedding` and in an exact `IndexFlatIP` (`openl3.index`), but a
+flat scan is linear in the catalog size. This script trains an approximate
+index from the stored embeddings, measures recall@k against the flat baseline on
+a held-out query set, tunes the search-time knob (nprobe / efSearch) to the
+smallest value that reaches the requested recall, and persists the result
+as the serving index `openl3.search.index` plus a JSON report.
+
+Index types:
+- flat:    exact IndexFlatIP, 2 KB/vector, linear search (baseline)
+- hnsw:    HNSW graph over full vectors, no training, fastest queries
+- ivfflat: inverted lists over full vectors, trained
+- ivfpq:   inverted lists + product quantization, ~64 B/vector, trained
+
+Usage:
+  python scripts/audio_index.py --type ivfpq
+  python scripts/audio_index.py --type hnsw --k 10 --min-recall 0.95
+"""
+import argparse
+import json
+import math
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from embedding_store import load_matrix
+
+try:
+    import faiss
+except Exception:
+    print("Missing dependency: faiss. Install with: pip install faiss-cpu")
+    sys.exit(1)
+
+ROOT = Path(__file__).resolve().parents[1]
+FAISS_INDEX_PATH = ROOT / "openl3.index"
+DB_PATH = ROOT / "audio_features.db"
+SEARCH_INDEX_PATH = ROOT / "openl3.search.index"
+EMBED_DIM = 512
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivfflat', 'ivfpq')
+
+# Search-time knobs swept during tuning, cheapest first
+NPROBE_SWEEP = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256, 512]
+
+LATENCY_BUDGET_MS = 10.0
+
+
+def default_nlist(n_vectors):
+    """Rule of thumb: ~4*sqrt(N) lists, with at least 39 training points per list."""
+    nlist = int(4 * math.sqrt(max(n_vectors, 1)))
+    return max(1, min(nlist, n_vectors // 39 or 1, 65536))
+
+
+def factory_string(kind, n_vectors, nlist=None, pq_m=64, hnsw_m=32):
+    """FAISS index_factory description for the requested index type"""
+    if kind == 'flat':
+        return "Flat"
+    if kind == 'hnsw':
+        return f"HNSW{hnsw_m},Flat"
+    nlist = nlist or default_nlist(n_vectors)
+    if kind == 'ivfflat':
+        return f"IVF{nlist},Flat"
+    if kind == 'ivfpq':
+        # 8-bit codes need 256 centroids per sub-quantizer; shrink for tiny collections
+        nbits = max(1, min(8, int(math.log2(max(n_vectors // 39, 2)))))
+        return f"IVF{nlist},PQ{pq_m}x{nbits}"
+    raise ValueError(f"Unknown index type '{kind}' (expected one of {', '.join(INDEX_TYPES)})")
+
+
+def build_index(kind, vectors, ids=None, dim=EMBED_DIM, nlist=None, pq_m=64, hnsw_m=32):
+    """Create, train (when required) and fill an inner-product index.
+
+    When `ids` is given the index is wrapped in an IndexIDMap2 so search
+    results are features ids rather than row positions.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    description = factory_string(kind, len(vectors), nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m)
+    index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(vectors)
+    if ids is None:
+        index.add(vectors)
+        return index
+    mapped = faiss.IndexIDMap2(index)
+    mapped.add_with_ids(vectors, np.ascontiguousarray(ids, dtype='int64'))
+    return mapped
+
+
+def unwrap(index):
+    """Inner index of an IndexIDMap/IndexIDMap2 wrapper (or the index itself)"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def set_search_param(index, kind, value):
+    """Apply the search-time knob for the index type (no-op for flat)"""
+    if kind in ('ivfflat', 'ivfpq'):
+        faiss.extract_index_ivf(unwrap(index)).nprobe = int(value)
+    elif kind == 'hnsw':
+        unwrap(index).hnsw.efSearch = int(value)
+
+
+def ground_truth(base, queries, k):
+    """Exact top-k neighbours from a flat inner-product scan"""
+    flat = faiss.IndexFlatIP(base.shape[1])
+    flat.add(base)
+    _, ids = flat.search(queries, k)
+    return ids
+
+
+def measure(index, queries, truth, k):
+    """Return (recall@k, mean ms/query, p99 ms/query) for single-query search"""
+    hits = 0
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(ids[0].tolist()) & set(truth[i].tolist()))
+    recall = hits / float(len(queries) * k) if len(queries) else 1.0
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    return recall, float(lat.mean()), float(np.percentile(lat, 99))
+
+
+def tune(index, kind, queries, truth, k, min_recall):
+    """Sweep the search knob and keep the cheapest setting that reaches min_recall"""
+    if kind == 'flat':
+        recall, mean_ms, p99_ms = measure(index, queries, truth, k)
+        return {'param': None, 'recall': recall, 'mean_ms': mean_ms, 'p99_ms': p99_ms, 'sweep': []}
+
+    sweep_values = EF_SEARCH_SWEEP if kind == 'hnsw' else NPROBE_SWEEP
+    if kind != 'hnsw':
+        nlist = faiss.extract_index_ivf(index).nlist
+        sweep_values = [v for v in sweep_values if v <= nlist] or [nlist]
+
+    sweep = []
+    chosen = None
+    for value in sweep_values:
+        set_search_param(index, kind, value)
+        recall, mean_ms, p99_ms = measure(index, queries, truth, k)
+        row = {'param': value, 'recall': recall, 'mean_ms': mean_ms, 'p99_ms': p99_ms}
+        sweep.append(row)
+        print(f"  {'efSearch' if kind == 'hnsw' else 'nprobe'}={value:<4} recall@{k}={recall:.3f}  mean={mean_ms:.2f}ms  p99={p99_ms:.2f}ms")
+        if recall >= min_recall:
+            chosen = row
+            break
+
+    # Fall back to the best recall seen when the target is out of reach
+    if chosen is None:
+        chosen = max(sweep, key=lambda r: r['recall'])
+    set_search_param(index, kind, chosen['param'])
+    return dict(chosen, sweep=sweep)
+
+
+def split_holdout(vectors, holdout, seed=0):
+    """Split off `holdout` random rows as queries that are not part of the base set"""
+    rng = np.random.default_rng(seed)
+    holdout = min(holdout, max(1, len(vectors) // 10))
+    perm = rng.permutation(len(vectors))
+    return vectors[perm[holdout:]], vectors[perm[:holdout]]
+
+
+def load_db_embeddings(db_path=DB_PATH):
+    """Read (features ids, vectors) from the float16 BLOBs in the features table"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        ids, vectors = load_matrix(conn, 'features')
+    finally:
+        conn.close()
+    return np.asarray(ids, dtype='int64'), vectors
+
+
+def load_flat_embeddings(path=FAISS_INDEX_PATH):
+    """Read (features ids, vectors) back out of the extractor's collection index"""
+    index = faiss.read_index(str(path))
+    if index.ntotal == 0:
+        return np.zeros(0, dtype='int64'), np.zeros((0, index.d), dtype='float32')
+    if isinstance(index, faiss.IndexIDMap2):
+        ids = faiss.vector_to_array(index.id_map).astype('int64')
+        return ids, index.index.reconstruct_n(0, index.ntotal)
+    # Legacy positional index: row numbers are the only ids available
+    return np.arange(index.ntotal, dtype='int64'), index.reconstruct_n(0, index.ntotal)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate a FAISS search index for audio embeddings")
+    parser.add_argument('--type', choices=INDEX_TYPES, default='ivfpq', help="index type to build")
+    parser.add_argument('--k', type=int, default=10, help="neighbours used for recall@k")
+    parser.add_argument('--holdout', type=int, default=1000, help="held-out queries for evaluation")
+    parser.add_argument('--min-recall', type=float, default=0.9, help="target recall@k when tuning nprobe/efSearch")
+    parser.add_argument('--nlist', type=int, default=None, help="IVF lists (default ~4*sqrt(N))")
+    parser.add_argument('--pq-m', type=int, default=64, help="PQ sub-quantizers (must divide 512)")
+    parser.add_argument('--hnsw-m', type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument('--source', default=None, help="flat index to read embeddings from (default: features.embedding BLOBs, else openl3.index)")
+    parser.add_argument('--output', default=str(SEARCH_INDEX_PATH), help="where to write the serving index")
+    args = parser.parse_args()
+
+    ids, vectors = np.zeros(0, dtype='int64'), np.zeros((0, EMBED_DIM), dtype='float32')
+    if args.source is None and DB_PATH.exists():
+        ids, vectors = load_db_embeddings(DB_PATH)
+    if len(vectors) == 0:
+        source = Path(args.source or FAISS_INDEX_PATH)
+        if not source.exists():
+            print(f"No embeddings found at {source}. Run extract_audio_features.py first.")
+            return
+        ids, vectors = load_flat_embeddings(source)
+    if len(vectors) < 2:
+        print(f"Only {len(vectors)} embeddings collected — nothing to index.")
+        return
+    print(f"Loaded {len(vectors):,} embeddings ({vectors.nbytes / (1024 * 1024):.1f} MB)")
+
+    # Evaluate on a held-out split so queries are not trivially in the index
+    base, queries = split_holdout(vectors, args.holdout)
+    truth = ground_truth(base, queries, min(args.k, len(base)))
+    k = truth.shape[1]
+
+    print(f"\nEvaluating {args.type} on {len(base):,} vectors / {len(queries):,} held-out queries...")
+    candidate = build_index(args.type, base, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m)
+    result = tune(candidate, args.type, queries, truth, k, args.min_recall)
+
+    print(f"\nSelected: recall@{k}={result['recall']:.3f}, mean={result['mean_ms']:.2f}ms, p99={result['p99_ms']:.2f}ms")
+    if result['p99_ms'] > LATENCY_BUDGET_MS:
+        print(f"⚠️  p99 latency above the {LATENCY_BUDGET_MS:.0f}ms budget — consider ivfpq or a smaller nprobe/efSearch")
+    if result['recall'] < args.min_recall:
+        print(f"⚠️  recall target {args.min_recall} not reached — consider more lists/sub-quantizers or hnsw")
+
+    # Rebuild on the full collection with the tuned search parameter and persist
+    final = build_index(args.type, vectors, ids=ids, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m)
+    set_search_param(final, args.type, result['param'])
+    faiss.write_index(final, args.output)
+
+    report = {
+        'type': args.type,
+        'factory': factory_string(args.type, len(vectors), nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m),
+        'search_param': result['param'],
+        'ntotal': int(final.ntotal),
+        'k': k,
+        'recall_at_k': result['recall'],
+        'mean_ms': result['mean_ms'],
+        'p99_ms': result['p99_ms'],
+        'sweep': result['sweep'],
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    report_path = Path(args.output).with_suffix('.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    size_mb = Path(args.output).stat().st_size / (1024 * 1024)
+    print(f"\n✅ Wrote {args.output} ({final.ntotal:,} vectors, {size_mb:.1f} MB) and {report_path.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Shared fixtures for the benchmark suite (see scripts/README.md, "Benchmarks").
+
+- `--catalog-sizes 10000,100000,1000000` (or BENCH_SIZES) picks the
+  synthetic catalogs; 1M is opt-in because the first build takes a while
+- the hyphenated scripts (query-analyzer.py, music-scorer.py) are loaded
+  with importlib; each defines its own QueryType, so types are mapped by value
+"""
+import importlib.util
+import os
+import sqlite3
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+SCRIPTS = HERE.parent
+for path in (SCRIPTS, HERE):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from synthetic_catalog import QUERY_CORPUS, SCHEMA, build_catalog  # noqa: E402
+
+DEFAULT_SIZES = os.environ.get('BENCH_SIZES', '10000,100000')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--catalog-sizes', default=DEFAULT_SIZES,
+                     help="comma-separated synthetic catalog sizes (default: %(default)s)")
+
+
+def pytest_generate_tests(metafunc):
+    if 'catalog_size' in metafunc.fixturenames:
+        sizes = [int(s) for s in metafunc.config.getoption('catalog_sizes').split(',') if s.strip()]
+        metafunc.parametrize('catalog_size', sizes, ids=[f"{n // 1000}k" for n in sizes], scope='session')
+
+
+def load_script(filename):
+    """Import scripts/<filename> (hyphenated names are not importable)"""
+    name = filename[:-3].replace('-', '_')
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, SCRIPTS / filename)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def peak_memory_kib(fn, *args, **kwargs):
+    """Peak Python allocation of one call, in KiB"""
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+@pytest.fixture(scope='session')
+def analyzer():
+    # Regex-only, so a local artists.gazetteer cannot change the results
+    return load_script('query-analyzer.py').QueryAnalyzer(gazetteer=None)
+
+
+@pytest.fixture(scope='session')
+def gazetteer(catalog, catalog_size, tmp_path_factory):
+    """ArtistGazetteer built from the catalog's artists"""
+    from artist_gazetteer import ArtistGazetteer, build_gazetteer
+    path = tmp_path_factory.mktemp('gazetteer') / f"artists_{catalog_size}.gazetteer"
+    build_gazetteer(catalog, path)
+    gazetteer = ArtistGazetteer(path)
+    yield gazetteer
+    gazetteer.close()
+
+
+@pytest.fixture(scope='session')
+def scorer_module():
+    return load_script('music-scorer.py')
+
+
+@pytest.fixture(scope='session')
+def scorer(scorer_module):
+    return scorer_module.MusicScorer()
+
+
+@pytest.fixture(scope='session')
+def parsed_corpus(analyzer, scorer_module):
+    """[(query, parsed, scorer QueryType)] for the fixed corpus"""
+    parsed = []
+    for query, _ in QUERY_CORPUS:
+        result = analyzer.analyze(query)
+        parsed.append((query, result, scorer_module.QueryType(result['query_type'].value)))
+    return parsed
+
+
+@pytest.fixture(scope='session')
+def catalog(catalog_size):
+    """Read-only connection to the cached catalog of `catalog_size` songs"""
+    path = build_catalog(catalog_size)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def songs_db():
+    """Empty in-memory DB with the real songs schema, for unit tests of writers"""
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(SCHEMA.read_text(encoding='utf-8'))
+    yield conn
+    conn.close()
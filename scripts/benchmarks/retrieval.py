@@ -0,0 +1,57 @@
+"""
+scripts/benchmarks/retrieval.py
+
+The two ways candidates come out of enhanced_music.db today, as Python:
+
+- keyword_candidates: the web app's searchLocalDatabase query
+  (lib/music-search.ts), i.e. LIKE over genres/moods/title/artist/tags with
+  2015+ releases first
+- parsed_candidates: structured filters from a QueryAnalyzer result
+  (artist, genre, mood, BPM/energy/year ranges), most popular first; this is
+  the block MusicScorer.score_songs ranks. The artist filter is an index
+  range on songs.artist_norm (see text_normalize.py), so "the weeknd" also
+  finds "weeknd and ariana grande"; the scorer ranks exact names first
+"""
+from text_normalize import prefix_range, search_key
+
+CANDIDATE_COLUMNS = ('id', 'title', 'artist', 'title_norm', 'artist_norm', 'genres', 'subgenres', 'moods', 'bpm', 'energy',
+                     'danceability', 'valence', 'popularity_score', 'release_year', 'embedding')
+
+
+def keyword_candidates(conn, query, limit=45):
+    pattern = f"%{query.lower()}%"
+    return conn.execute("""
+        SELECT title, artist, genres, moods, release_year, popularity_score
+        FROM songs
+        WHERE (LOWER(genres) LIKE ? OR LOWER(moods) LIKE ? OR LOWER(title) LIKE ?
+               OR LOWER(artist) LIKE ? OR LOWER(tags) LIKE ?)
+          AND release_year IS NOT NULL
+        ORDER BY CASE WHEN release_year >= 2015 THEN 0 ELSE 1 END, release_year DESC, popularity_score DESC
+        LIMIT ?
+    """, (pattern,) * 5 + (limit,)).fetchall()
+
+
+def parsed_candidates(conn, parsed, limit=500):
+    """Rows as dicts (the shape score_songs expects) matching `parsed`"""
+    where, params = [], []
+    artist_key = parsed.get('artist_key') or search_key(parsed.get('artist'))
+    if artist_key:
+        where.append("artist_norm >= ? AND artist_norm < ?")
+        params.extend(prefix_range(artist_key))
+    if parsed.get('genre'):
+        where.append("genres LIKE ?")
+        params.append(f'%"{parsed["genre"]}"%')
+    if parsed.get('mood'):
+        where.append("moods LIKE ?")
+        params.append(f'%"{parsed["mood"]}"%')
+    for column, key in (('bpm', 'bpm_range'), ('energy', 'energy_range'), ('release_year', 'year_range')):
+        if parsed.get(key):
+            where.append(f"{column} BETWEEN ? AND ?")
+            params.extend(parsed[key])
+
+    sql = f"SELECT {', '.join(CANDIDATE_COLUMNS)} FROM songs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY popularity_score DESC LIMIT ?"
+    rows = conn.execute(sql, params + [limit]).fetchall()
+    return [dict(zip(CANDIDATE_COLUMNS, row)) for row in rows]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+scripts/benchmarks/synthetic_catalog.py
+
+Deterministic synthetic `songs` catalogs and the fixed query corpus for the
+benchmark suite.
+
+Catalogs use the real schema (scripts/enhanced-music-schema.sql) with
+realistic value distributions: JSON genre/mood/tag arrays drawn from the
+analyzer's vocabulary, BPM/energy/danceability/valence, popularity,
+release year, Camelot keys and float16 embeddings for most rows. A handful
+of real artist names are mixed in so artist queries have hits. The same
+seed always yields the same rows, so numbers are comparable across runs.
+
+Generated databases are cached under BENCH_CATALOG_DIR (default
+scripts/benchmarks/.catalogs); building 1M rows takes a minute or two once.
+
+Usage:
+  python scripts/benchmarks/synthetic_catalog.py 10000 100000 1000000   # pre-build the caches
+"""
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+if str(HERE.parent) not in sys.path:
+    sys.path.insert(0, str(HERE.parent))
+
+from text_normalize import search_key  # noqa: E402
+
+SCHEMA = HERE.parent / 'enhanced-music-schema.sql'
+CATALOG_DIR = Path(os.environ.get('BENCH_CATALOG_DIR', HERE / '.catalogs'))
+SEED = 20251019
+# Part of the cache file name; bump when the schema or the generated columns change
+CATALOG_VERSION = 2
+EMBEDDING_DIM = 64
+EMBEDDING_SHARE = 0.6  # share of rows with an embedding, like a partially enriched import
+
+GENRES = (
+    'pop', 'rock', 'hip-hop', 'rap', 'electronic', 'edm', 'house', 'techno', 'trance', 'dubstep',
+    'drum-and-bass', 'jungle', 'garage', 'grime', 'phonk', 'trap', 'hardstyle', 'ambient', 'indie',
+    'alternative', 'metal', 'jazz', 'blues', 'folk', 'country', 'reggae', 'r&b', 'soul', 'funk',
+    'disco', 'synthwave', 'lo-fi', 'hyperpop', 'classical', 'piano', 'acoustic', 'orchestral',
+)
+MOODS = (
+    'chill', 'relaxing', 'calm', 'upbeat', 'energetic', 'happy', 'sad', 'melancholic', 'dark',
+    'intense', 'aggressive', 'romantic', 'party', 'workout', 'focus', 'nostalgic', 'groovy', 'mellow',
+)
+TAGS = ('summer', 'night', 'driving', 'study', 'sleep', 'gym', 'rainy', 'road trip', 'late night')
+KNOWN_ARTISTS = ('The Weeknd', 'Justin Bieber', 'Drake', 'Lizzo', 'Daft Punk', 'Taylor Swift')
+SYLLABLES = ('ka', 'lo', 'mi', 'ra', 'ven', 'tor', 'sa', 'nu', 'el', 'dri', 'xo', 'ba', 'lune', 'zen')
+CAMELOT = tuple(f"{n}{m}" for n in range(1, 13) for m in 'AB')
+LANGUAGES = ('en', 'en', 'en', 'es', 'fr', 'de', 'ja', 'ko')
+
+# Fixed corpus: (query, QueryType value the analyzer assigns). Every type appears.
+QUERY_CORPUS = (
+    ('justin bieber songs', 'artist'),
+    ('the weeknd', 'artist'),
+    ('songs by drake', 'artist'),
+    ('pop', 'genre'),
+    ('phonk', 'genre'),
+    ('hardstyle 150 bpm', 'genre'),
+    ('melancholic', 'mood'),
+    ('party', 'mood'),
+    ('happy', 'mood'),
+    ('120 bpm fast', 'audio_feature'),
+    ('low energy 90 bpm', 'audio_feature'),
+    ('chill pop at 90 bpm', 'mixed'),
+    ('sad indie songs from the 2000s', 'mixed'),
+    ('dark techno', 'mixed'),
+    ('relaxing piano', 'mixed'),
+)
+
+
+def _name(rng, words):
+    return ' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title() for _ in range(words))
+
+
+def generate_songs(n, seed=SEED):
+    """Yield `n` row dicts matching the songs columns filled by the importer"""
+    rng = random.Random(seed)
+    emb_rng = np.random.default_rng(seed)
+    artists = list(KNOWN_ARTISTS) + [_name(rng, rng.randint(1, 2)) for _ in range(max(50, n // 20))]
+    weights = [1.0 / (i + 1) for i in range(len(artists))]  # a few artists own most of the catalog
+
+    for i in range(n):
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        bpm = round(rng.gauss(118, 22), 1)
+        energy = round(min(1.0, max(0.0, rng.betavariate(2.5, 2))), 3)
+        has_features = rng.random() < 0.8
+        embedding = None
+        if rng.random() < EMBEDDING_SHARE:
+            embedding = emb_rng.standard_normal(EMBEDDING_DIM).astype('<f2').tobytes()
+        title = _name(rng, rng.randint(1, 4))
+        artist = rng.choices(artists, weights)[0]
+        yield {
+            'id': f"syn-{i:07d}",
+            'mbid': f"00000000-0000-4000-8000-{i:012d}",
+            'title': title,
+            'artist': artist,
+            'title_norm': search_key(title),
+            'artist_norm': search_key(artist),
+            'album': _name(rng, 2),
+            'genres': json.dumps(genres),
+            'subgenres': json.dumps([f"{genres[0]} {rng.choice(('revival', 'fusion', 'core'))}"]),
+            'moods': json.dumps(rng.sample(MOODS, rng.randint(1, 3))),
+            'tags': json.dumps(rng.sample(TAGS, rng.randint(0, 2))),
+            'bpm': bpm if has_features else None,
+            'camelot': rng.choice(CAMELOT) if has_features else None,
+            'energy': energy if has_features else None,
+            'danceability': round(rng.random(), 3) if has_features else None,
+            'valence': round(rng.random(), 3) if has_features else None,
+            'popularity_score': int(min(100, rng.expovariate(1 / 30))),
+            'release_year': rng.randint(1965, 2025),
+            'duration_ms': rng.randint(90_000, 420_000),
+            'language': rng.choice(LANGUAGES),
+            'embedding': embedding,
+            'source': 'synthetic',
+        }
+
+
+def catalog_path(n):
+    return CATALOG_DIR / f"catalog_{n}_{SEED}_v{CATALOG_VERSION}.db"
+
+
+def build_catalog(n, path=None, batch_size=20_000):
+    """Create (or reuse) a catalog of `n` songs; returns its path"""
+    path = Path(path or catalog_path(n))
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    if tmp.exists():
+        tmp.unlink()
+
+    start = time.time()
+    conn = sqlite3.connect(str(tmp))
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA.read_text(encoding='utf-8'))
+        rows = generate_songs(n)
+        columns = None
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            columns = columns or list(batch[0])
+            conn.executemany(
+                f"INSERT INTO songs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(row[c] for c in columns) for row in batch],
+            )
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    print(f"✅ Built {path.name}: {n:,} songs in {time.time() - start:.1f}s")
+    return path
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        build_catalog(n)
+
+
+if __name__ == '__main__':
+    main()
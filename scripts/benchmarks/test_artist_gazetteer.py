@@ -0,0 +1,35 @@
+"""QueryAnalyzer with the artist gazetteer: corpus results, lookup latency and memory"""
+from conftest import load_script, peak_memory_kib
+from synthetic_catalog import KNOWN_ARTISTS, QUERY_CORPUS
+from text_normalize import normalize_text
+
+# Peak allocation for analyzing the whole corpus once; names stay in the mmap
+GAZETTEER_MEMORY_BUDGET_KIB = 64
+
+
+def test_gazetteer_corpus(benchmark, gazetteer, catalog_size):
+    analyzer = load_script('query-analyzer.py').QueryAnalyzer(gazetteer=gazetteer)
+    queries = [query for query, _ in QUERY_CORPUS]
+    benchmark.group = f'analyze with gazetteer {catalog_size:,}'
+
+    results = benchmark(lambda: [analyzer.analyze(q) for q in queries])
+
+    peak = peak_memory_kib(lambda: [analyzer.analyze(q) for q in queries])
+    benchmark.extra_info['peak_memory_kib'] = round(peak, 1)
+    if benchmark.stats:
+        benchmark.extra_info['queries_per_second'] = round(len(queries) / benchmark.stats.stats.mean)
+    drift = [(query, expected, result['query_type'].value)
+             for (query, expected), result in zip(QUERY_CORPUS, results)
+             if result['query_type'].value != expected]
+    assert not drift, f"gazetteer changes corpus classification: {drift}"
+    assert peak < GAZETTEER_MEMORY_BUDGET_KIB, f"analyze() peak memory {peak:.0f} KiB > {GAZETTEER_MEMORY_BUDGET_KIB} KiB"
+
+
+def test_gazetteer_longest_match(benchmark, gazetteer, catalog_size):
+    tokens = normalize_text(f"late night {KNOWN_ARTISTS[0]} remix with more words at 120 bpm").split()
+    benchmark.group = f'gazetteer {catalog_size:,}'
+
+    match = benchmark(gazetteer.longest_match, tokens)
+
+    assert match == normalize_text(KNOWN_ARTISTS[0])
+    assert all(gazetteer.contains(name) for name in KNOWN_ARTISTS)
@@ -0,0 +1,97 @@
+"""fetch_planner.py: genre merging, overlap estimates and greedy page allocation"""
+import uuid
+
+import pytest
+
+from fetch_planner import PAGE_SIZE, allocate_pages, estimate_overlap, normalize_genres, plan_fetch
+from known_mbids import KnownMBIDs
+from mb_dump import iter_pg_dump, recording_to_song
+
+
+def _ids(*numbers):
+    return [str(uuid.UUID(int=n)) for n in numbers]
+
+
+def _page(count, mbids):
+    return {'count': count, 'recordings': [{'id': mbid, 'title': f"Song {mbid[-4:]}",
+                                            'artist-credit': [{'artist': {'name': 'Artist'}}]} for mbid in mbids]}
+
+
+def test_normalize_genres_keeps_first_spelling():
+    genres = ['IDM', 'idm', ' PC  music', 'pc music', 'Drum and Bass', 'drum-and-bass', 'drum & bass', 'trap']
+    assert normalize_genres(genres) == ['IDM', 'PC music', 'Drum and Bass', 'trap']
+
+
+def test_estimate_overlap_shared_and_known():
+    first_pages = {
+        'trap': _page(500, _ids(1, 2, 3, 4)),
+        'hip hop': _page(500, _ids(3, 4, 5, 6)),
+        'ambient': _page(500, _ids(7, 8, 9, 10)),
+    }
+    assert estimate_overlap(first_pages) == {'trap': 0.5, 'hip hop': 0.5, 'ambient': 0.0}
+
+    known = KnownMBIDs()
+    known.add_new(_ids(7, 8))
+    assert estimate_overlap(first_pages, known)['ambient'] == 0.5
+
+
+def test_allocate_pages_stops_at_target():
+    counts = {'big': 10_000, 'small': 50, 'empty': 0}
+    pages, expected = allocate_pages(counts, {}, target_songs=450, base_unique=150)
+
+    assert pages == {'big': 4, 'small': 1, 'empty': 0}
+    assert expected == 450
+
+
+def test_allocate_pages_prefers_unique_rows():
+    counts = {'trap': 1000, 'ambient': 1000}
+    pages, expected = allocate_pages(counts, {'trap': 0.75, 'ambient': 0.0}, target_songs=500, base_unique=200)
+
+    assert pages == {'trap': 1, 'ambient': 4}
+    assert expected == 500
+
+
+def test_allocate_pages_runs_out_of_rows():
+    pages, expected = allocate_pages({'tiny': 250}, {}, target_songs=10_000, base_unique=100)
+
+    assert pages == {'tiny': 3}
+    assert expected == 250
+
+
+def test_plan_fetch_discounts_known_recordings():
+    pages = {'trap': _page(1000, _ids(*range(1, 101))), 'ambient': _page(1000, _ids(*range(101, 201)))}
+    known = KnownMBIDs()
+    known.add_new(_ids(*range(1, 101)))
+
+    plan = plan_fetch(lambda genre, offset, limit: pages[genre.lower()], ['Trap', 'ambient', 'trap'], 400,
+                      known=known)
+
+    assert list(plan.first_pages) == ['Trap', 'ambient']
+    assert plan.overlap == {'Trap': 1.0, 'ambient': 0.0}
+    assert plan.base_unique == PAGE_SIZE
+    assert plan.pages == {'Trap': 1, 'ambient': 4}
+    assert plan.requests() == 5
+
+
+def _write_table(directory, name, rows):
+    (directory / name).write_text(''.join('\t'.join('\\N' if v is None else str(v) for v in row) + '\n' for row in rows),
+                                  encoding='utf-8')
+
+
+@pytest.mark.parametrize('genres', [['IDM', 'PC music'], ['idm', 'pc music']])
+def test_api_and_dump_paths_agree_on_genres(tmp_path, genres):
+    mbid = _ids(42)[0]
+    # API path: the planner's genre names are what songs are tagged with
+    plan = plan_fetch(lambda genre, offset, limit: _page(1, [mbid]), genres, 10)
+    api_song = recording_to_song(_page(1, [mbid])['recordings'][0], [plan.genres()[0]])
+
+    # Dump path: MusicBrainz tags are lowercase
+    _write_table(tmp_path, 'tag', [(1, 'idm', 5), (2, 'pc music', 3)])
+    _write_table(tmp_path, 'recording_tag', [(9, 1, 1, None)])
+    _write_table(tmp_path, 'recording', [(9, mbid, 'Song', 4, 1000)])
+    _write_table(tmp_path, 'artist_credit_name', [(4, 0, 77, 'Artist', '')])
+    _write_table(tmp_path, 'artist', [(77, _ids(77)[0], 'Artist', 'Artist')])
+    dump_song, = iter_pg_dump(tmp_path, genres)
+
+    assert api_song['genres'] == dump_song['genres'] == f'["{genres[0]}"]'
+    assert api_song['artist'] == dump_song['artist']
@@ -0,0 +1,79 @@
+"""harmonic.py: key parsing, Camelot/Open Key codes, BPM folding and the compatibility index"""
+import math
+import sqlite3
+
+import pytest
+
+from harmonic import (bpm_band, build_harmonic_index, compatible_codes, fold_bpm, open_key_code, parse_key,
+                      to_camelot, tracks_that_mix_with)
+
+
+@pytest.mark.parametrize('key, camelot, open_key', [
+    ('C', '8B', '1d'),
+    ('Am', '8A', '1m'),
+    ('A minor', '8A', '1m'),
+    ('G', '9B', '2d'),
+    ('Em', '9A', '2m'),
+    ('F', '7B', '12d'),
+    ('C#m', '12A', '5m'),
+    ('Dbm', '12A', '5m'),
+    ('F# maj', '2B', '7d'),
+])
+def test_key_codes(key, camelot, open_key):
+    assert to_camelot(key) == camelot
+    assert open_key_code(camelot) == open_key
+
+
+@pytest.mark.parametrize('code', [f"{n}{letter}" for n in range(1, 13) for letter in 'AB'])
+def test_codes_round_trip(code):
+    assert to_camelot(code) == code
+    assert to_camelot(open_key_code(code)) == code
+
+
+def test_scale_overrides_mode():
+    assert parse_key('A', scale='minor') == (9, 'minor')
+    assert to_camelot('C', scale='major') == '8B'
+
+
+@pytest.mark.parametrize('text', [None, '', 'Hm', '13A', 'not a key'])
+def test_unparsable_keys(text):
+    assert to_camelot(text) is None
+
+
+def test_compatible_codes_wrap_the_wheel():
+    assert compatible_codes('8A') == ['8A', '9A', '7A', '8B']
+    assert compatible_codes('12B') == ['12B', '1B', '11B', '12A']
+    assert compatible_codes('1A') == ['1A', '2A', '12A', '1B']
+
+
+@pytest.mark.parametrize('bpm, folded', [(120, 120), (70, 140), (174, 87), (40, 80), (320, 80)])
+def test_fold_bpm(bpm, folded):
+    assert fold_bpm(bpm) == folded
+
+
+def test_half_and_double_time_share_a_band():
+    assert bpm_band(70) == bpm_band(140) == bpm_band(280)
+
+
+@pytest.mark.parametrize('bpm', [None, 0, -120, math.nan, math.inf, -math.inf])
+def test_unusable_bpm(bpm):
+    assert fold_bpm(bpm) is None
+    assert bpm_band(bpm) is None
+
+
+def test_tracks_that_mix_with():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE songs (id TEXT PRIMARY KEY, key TEXT, bpm REAL)")
+    conn.executemany("INSERT INTO songs VALUES (?, ?, ?)", [
+        ('seed', 'Am', 120.0),
+        ('relative', 'C', 121.0),    # 8B
+        ('neighbour', 'Em', 60.5),   # 9A, half time
+        ('clash', 'F#m', 120.0),     # 11A
+        ('too-fast', 'Am', 135.0),   # same key, BPM bands away
+        ('no-bpm', 'Am', None),
+    ])
+    assert build_harmonic_index(conn) == 5
+
+    mixes = {song_id for song_id, _, _ in tracks_that_mix_with(conn, 'seed')}
+
+    assert mixes == {'relative', 'neighbour'}
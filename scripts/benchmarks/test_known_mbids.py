@@ -0,0 +1,54 @@
+"""known_mbids.py: membership of stored and newly fetched recording ids"""
+import threading
+import uuid
+
+from known_mbids import KnownMBIDs, mbid_key
+
+STORED = [str(uuid.UUID(int=n)) for n in (5, 1, 3)]
+OTHER = str(uuid.UUID(int=2))
+
+
+def _known(songs_db, mbids):
+    songs_db.executemany("INSERT INTO songs (id, mbid, title, artist) VALUES (?, ?, 'Song', 'Artist')",
+                         [(mbid, mbid) for mbid in mbids])
+    return KnownMBIDs.from_db(songs_db)
+
+
+def test_mbid_key():
+    assert mbid_key(STORED[0]) == uuid.UUID(STORED[0]).bytes
+    assert mbid_key('not-a-uuid') is None
+    assert mbid_key(None) is None
+
+
+def test_stored_ids_are_known(songs_db):
+    known = _known(songs_db, STORED + ['legacy-id'])
+
+    assert len(known) == 4
+    assert known.known_flags(STORED + [OTHER, 'legacy-id', 'other-id']) == [True, True, True, False, True, False]
+    assert STORED[0].upper() in known
+    assert OTHER not in known
+
+
+def test_add_new_claims_each_id_once(songs_db):
+    known = _known(songs_db, STORED)
+
+    assert known.add_new([STORED[0], OTHER, OTHER, 'x']) == [False, True, False, True]
+    assert OTHER in known and 'x' in known
+
+
+def test_concurrent_add_new_claims_once(songs_db):
+    known = _known(songs_db, [])
+    ids = [str(uuid.UUID(int=n)) for n in range(100, 600)]
+    claimed = []
+
+    def claim():
+        flags = known.add_new(ids)
+        claimed.append(sum(flags))
+
+    threads = [threading.Thread(target=claim) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(claimed) == len(ids)
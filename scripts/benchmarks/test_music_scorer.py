@@ -0,0 +1,64 @@
+"""MusicScorer.score_song / score_songs over candidate blocks from the synthetic catalogs"""
+import pytest
+
+from conftest import peak_memory_kib
+from retrieval import parsed_candidates
+from synthetic_catalog import QUERY_CORPUS
+
+CANDIDATE_LIMIT = 500
+# Peak allocation for ranking one 500-candidate block
+SCORE_MEMORY_BUDGET_KIB = 1024
+
+TYPES = sorted({expected for _, expected in QUERY_CORPUS})
+
+
+@pytest.fixture(scope='session')
+def candidate_blocks(catalog, parsed_corpus):
+    """[(query, parsed, type, candidates)] with a full block per query, falling back to top songs"""
+    blocks = []
+    for query, parsed, query_type in parsed_corpus:
+        candidates = parsed_candidates(catalog, parsed, CANDIDATE_LIMIT)
+        if len(candidates) < CANDIDATE_LIMIT:
+            candidates += parsed_candidates(catalog, {}, CANDIDATE_LIMIT - len(candidates))
+        blocks.append((query, parsed, query_type, candidates))
+    return blocks
+
+
+@pytest.mark.parametrize('query_type', TYPES)
+def test_score_song_latency(benchmark, scorer, candidate_blocks, query_type, catalog_size):
+    query, parsed, scorer_type, candidates = next(b for b in candidate_blocks if b[2].value == query_type)
+    benchmark.group = 'score_song'
+    score, breakdown = benchmark(scorer.score_song, candidates[0], query, scorer_type, parsed)
+    assert 0.0 <= score <= 1.0
+
+
+def test_score_songs_throughput(benchmark, scorer, candidate_blocks, catalog_size):
+    benchmark.group = f'score_songs {catalog_size:,}'
+
+    def rank_all():
+        return [scorer.score_songs(candidates, query, query_type, parsed, limit=20)
+                for query, parsed, query_type, candidates in candidate_blocks]
+
+    ranked = benchmark(rank_all)
+
+    query, parsed, query_type, candidates = candidate_blocks[0]
+    peak = peak_memory_kib(scorer.score_songs, candidates, query, query_type, parsed, limit=20)
+    songs = sum(len(block[3]) for block in candidate_blocks)
+    benchmark.extra_info['peak_memory_kib'] = round(peak, 1)
+    if benchmark.stats:
+        benchmark.extra_info['songs_per_second'] = round(songs / benchmark.stats.stats.mean)
+    assert all(len(top) == 20 for top in ranked)
+    assert peak < SCORE_MEMORY_BUDGET_KIB, f"score_songs() peak memory {peak:.0f} KiB > {SCORE_MEMORY_BUDGET_KIB} KiB"
+
+
+def test_score_songs_with_seeds(benchmark, scorer, catalog, candidate_blocks, catalog_size):
+    query, parsed, query_type, candidates = candidate_blocks[0]
+    seeds = scorer.fetch_seeds(catalog, [c['id'] for c in candidates if c['embedding'] is not None][:3])
+    benchmark.group = f'score_songs {catalog_size:,}'
+
+    ranked = benchmark(scorer.score_songs, candidates, query, query_type, parsed, 20, seeds)
+
+    peak = peak_memory_kib(scorer.score_songs, candidates, query, query_type, parsed, 20, seeds)
+    benchmark.extra_info['peak_memory_kib'] = round(peak, 1)
+    assert seeds and 'embedding_similarity' in ranked[0][2]
+    assert peak < SCORE_MEMORY_BUDGET_KIB, f"seeded score_songs() peak memory {peak:.0f} KiB > {SCORE_MEMORY_BUDGET_KIB} KiB"
@@ -0,0 +1,45 @@
+"""QueryAnalyzer.analyze: per-type latency, corpus throughput and peak memory"""
+import pytest
+
+from conftest import load_script, peak_memory_kib
+from synthetic_catalog import QUERY_CORPUS
+
+# Peak allocation for analyzing the whole corpus once
+CORPUS_MEMORY_BUDGET_KIB = 64
+
+FIRST_OF_TYPE = {}
+for _query, _type in QUERY_CORPUS:
+    FIRST_OF_TYPE.setdefault(_type, _query)
+
+
+def test_corpus_covers_every_query_type(analyzer):
+    analyzer_types = {t.value for t in load_script('query-analyzer.py').QueryType}
+    scorer_types = {t.value for t in load_script('music-scorer.py').QueryType}
+    assert analyzer_types == scorer_types, "query-analyzer.py and music-scorer.py QueryType values diverged"
+    assert {expected for _, expected in QUERY_CORPUS} == analyzer_types
+
+    drift = [(query, expected, analyzer.analyze(query)['query_type'].value)
+             for query, expected in QUERY_CORPUS
+             if analyzer.analyze(query)['query_type'].value != expected]
+    assert not drift, f"analyzer now classifies corpus queries differently: {drift}"
+
+
+@pytest.mark.parametrize('query_type', sorted(FIRST_OF_TYPE))
+def test_analyze_latency(benchmark, analyzer, query_type):
+    benchmark.group = 'analyze'
+    result = benchmark(analyzer.analyze, FIRST_OF_TYPE[query_type])
+    assert result['query_type'].value == query_type
+
+
+def test_analyze_corpus(benchmark, analyzer):
+    queries = [query for query, _ in QUERY_CORPUS]
+    benchmark.group = 'analyze'
+
+    results = benchmark(lambda: [analyzer.analyze(q) for q in queries])
+
+    peak = peak_memory_kib(lambda: [analyzer.analyze(q) for q in queries])
+    benchmark.extra_info['peak_memory_kib'] = round(peak, 1)
+    if benchmark.stats:
+        benchmark.extra_info['queries_per_second'] = round(len(queries) / benchmark.stats.stats.mean)
+    assert len(results) == len(queries)
+    assert peak < CORPUS_MEMORY_BUDGET_KIB, f"analyze() peak memory {peak:.0f} KiB > {CORPUS_MEMORY_BUDGET_KIB} KiB"
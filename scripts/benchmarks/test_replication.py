@@ -0,0 +1,121 @@
+"""replication.py: dbmirror packet parsing, sequence order and changes applied to songs"""
+import io
+import json
+import tarfile
+
+import pytest
+
+from replication import (ReplicationApplier, apply_packets, ensure_replication_schema, packet_files, parse_fields,
+                         read_packet)
+
+SONG_MBID = '11111111-1111-1111-1111-111111111111'
+NEW_MBID = '22222222-2222-2222-2222-222222222222'
+
+
+def _fields(**values):
+    """dbmirror column list: "name"='value' pairs, None as a bare "name"="""
+    return ''.join(f'"{name}"=' + ('' if value is None else "'" + str(value).replace("'", "''") + "'") + ' '
+                   for name, value in values.items())
+
+
+def write_packet(directory, sequence, changes, schema_sequence=28):
+    """replication-<sequence>.tar.bz2 holding [(op, table, keys, values)]"""
+    pending, data = [], []
+    for seq_id, (op, table, keys, values) in enumerate(changes, start=1):
+        pending.append(f'{seq_id}\t"musicbrainz"."{table}"\t{op}\t{900 + sequence}')
+        if keys:
+            data.append(f"{seq_id}\tt\t{_fields(**keys)}")
+        if values:
+            data.append(f"{seq_id}\tf\t{_fields(**values)}")
+    files = {
+        'REPLICATION_SEQUENCE': f"{sequence}\n",
+        'SCHEMA_SEQUENCE': f"{schema_sequence}\n",
+        'dbmirror_pending': '\n'.join(pending) + '\n',
+        'dbmirror_pendingdata': '\n'.join(data) + '\n',
+    }
+    path = directory / f"replication-{sequence}.tar.bz2"
+    with tarfile.open(path, 'w:bz2') as tar:
+        for name, text in files.items():
+            payload = text.encode('utf-8')
+            info = tarfile.TarInfo(f"mbdump/{name}")
+            info.size = len(payload)
+            tar.addfile(info, io.BytesIO(payload))
+    return path
+
+
+@pytest.fixture
+def mirrored(songs_db):
+    """One IDM song, mirrored as recording 1 by credit 5 (artist 50), at sequence 10"""
+    songs_db.execute("INSERT INTO songs (id, mbid, title, artist, genres, subgenres, tags) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (SONG_MBID, SONG_MBID, 'Song', 'Artist', '["IDM"]', '["IDM"]', '["IDM"]'))
+    ensure_replication_schema(songs_db)
+    songs_db.execute("INSERT INTO mb_recordings VALUES (1, ?, 'Song', 5, 1000)", (SONG_MBID,))
+    songs_db.execute("INSERT INTO mb_artist_credits VALUES (5, 'Artist', 50)")
+    songs_db.execute("INSERT INTO mb_artists VALUES (50, 'Artist')")
+    songs_db.execute("INSERT INTO mb_tags VALUES (7, 'idm')")
+    ReplicationApplier(songs_db).set_sequence(10)
+    songs_db.commit()
+    return songs_db
+
+
+def test_parse_fields():
+    assert parse_fields(_fields(id=1, name="Don't Stop", comment=None)) == {'id': '1', 'name': "Don't Stop", 'comment': None}
+
+
+def test_read_packet_keeps_mirrored_tables_in_order(tmp_path):
+    path = write_packet(tmp_path, 11, [
+        ('u', 'recording', {'id': 1}, {'id': 1, 'gid': SONG_MBID, 'name': 'Song', 'artist_credit': 5, 'length': 1000}),
+        ('i', 'medium', None, {'id': 3}),
+        ('d', 'recording_tag', {'recording': 1, 'tag': 7}, None),
+    ])
+
+    sequence, schema, changes = read_packet(path)
+
+    assert (sequence, schema) == (11, 28)
+    assert [(op, table) for op, table, _, _ in changes] == [('u', 'recording'), ('d', 'recording_tag')]
+    assert changes[0][2] == {'id': '1'}
+    assert changes[1][2] == {'recording': '1', 'tag': '7'}
+
+
+def test_packets_apply_in_order_and_stop_at_a_gap(mirrored, tmp_path):
+    write_packet(tmp_path, 10, [('d', 'recording', {'id': 1}, None)])  # already applied: skipped
+    write_packet(tmp_path, 11, [
+        ('u', 'recording', {'id': 1}, {'id': 1, 'gid': SONG_MBID, 'name': 'Song (Remastered)', 'artist_credit': 5,
+                                       'length': 1000}),
+    ])
+    write_packet(tmp_path, 13, [('d', 'recording', {'id': 1}, None)])
+    assert [seq for seq, _ in packet_files(tmp_path)] == [10, 11, 13]
+
+    applied, counts, missing = apply_packets(mirrored, tmp_path)
+
+    assert (applied, missing) == (1, 12)
+    assert counts == {'updated': 1}
+    assert ReplicationApplier(mirrored).sequence() == 11
+    assert mirrored.execute("SELECT title FROM songs WHERE mbid = ?", (SONG_MBID,)).fetchone() == ('Song (Remastered)',)
+
+
+def test_new_tagged_recording_uses_catalog_spelling_and_first_artist(mirrored):
+    applier = ReplicationApplier(mirrored)
+    applier.apply('i', 'recording', None, {'id': '2', 'gid': NEW_MBID, 'name': 'New', 'artist_credit': '5', 'length': None})
+    applier.apply('i', 'recording_tag', None, {'recording': '2', 'tag': '7'})
+
+    row = mirrored.execute("SELECT artist, genres FROM songs WHERE mbid = ?", (NEW_MBID,)).fetchone()
+    assert row[0] == 'Artist'
+    assert json.loads(row[1]) == ['IDM']
+    assert applier.counts == {'inserted': 1}
+
+
+def test_artist_rename_renames_songs(mirrored):
+    applier = ReplicationApplier(mirrored)
+    applier.apply('u', 'artist', {'id': '50'}, {'id': '50', 'name': 'Renamed'})
+
+    assert mirrored.execute("SELECT artist, artist_norm FROM songs").fetchall() == [('Renamed', 'renamed')]
+    assert applier.counts == {'artist renamed': 1}
+
+
+def test_untagging_removes_the_genre(mirrored):
+    applier = ReplicationApplier(mirrored)
+    applier.apply('d', 'recording_tag', {'recording': '1', 'tag': '7'}, {})
+
+    assert json.loads(mirrored.execute("SELECT genres FROM songs").fetchone()[0]) == []
+    assert applier.counts == {'untagged': 1}
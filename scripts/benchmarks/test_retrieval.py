@@ -0,0 +1,52 @@
+"""Candidate retrieval from enhanced_music.db-shaped catalogs, plus the whole query hot path"""
+from conftest import peak_memory_kib
+from retrieval import keyword_candidates, parsed_candidates
+from synthetic_catalog import QUERY_CORPUS
+
+# Peak allocation for one analyze -> retrieve -> score pass over the corpus
+HOT_PATH_MEMORY_BUDGET_KIB = 4096
+
+
+def test_keyword_candidates(benchmark, catalog, catalog_size):
+    queries = [query for query, _ in QUERY_CORPUS]
+    benchmark.group = f'retrieval {catalog_size:,}'
+
+    results = benchmark(lambda: [keyword_candidates(catalog, q) for q in queries])
+
+    if benchmark.stats:
+        benchmark.extra_info['queries_per_second'] = round(len(queries) / benchmark.stats.stats.mean, 1)
+    assert any(results)
+
+
+def test_parsed_candidates(benchmark, catalog, parsed_corpus, catalog_size):
+    benchmark.group = f'retrieval {catalog_size:,}'
+
+    results = benchmark(lambda: [parsed_candidates(catalog, parsed) for _, parsed, _ in parsed_corpus])
+
+    if benchmark.stats:
+        benchmark.extra_info['queries_per_second'] = round(len(parsed_corpus) / benchmark.stats.stats.mean, 1)
+    assert sum(map(len, results)) > 0
+
+
+def test_query_hot_path(benchmark, analyzer, scorer, scorer_module, catalog, catalog_size):
+    """analyze -> parsed_candidates -> score_songs, as one search request does"""
+    queries = [query for query, _ in QUERY_CORPUS]
+    benchmark.group = f'hot path {catalog_size:,}'
+
+    def search_all():
+        results = []
+        for query in queries:
+            parsed = analyzer.analyze(query)
+            query_type = scorer_module.QueryType(parsed['query_type'].value)
+            candidates = parsed_candidates(catalog, parsed)
+            results.append(scorer.score_songs(candidates, query, query_type, parsed, limit=20))
+        return results
+
+    results = benchmark(search_all)
+
+    peak = peak_memory_kib(search_all)
+    benchmark.extra_info['peak_memory_kib'] = round(peak, 1)
+    if benchmark.stats:
+        benchmark.extra_info['queries_per_second'] = round(len(queries) / benchmark.stats.stats.mean, 1)
+    assert len(results) == len(queries)
+    assert peak < HOT_PATH_MEMORY_BUDGET_KIB, f"hot path peak memory {peak:.0f} KiB > {HOT_PATH_MEMORY_BUDGET_KIB} KiB"
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+scripts/db_publish.py
+
+Staging database + atomic snapshot publishing for enhanced_music.db.
+
+The importer writes to `enhanced_music.staging.db` and, at the end of each
+phase, publishes a read-optimized copy over `enhanced_music.db`:
+
+  1. commit and checkpoint the staging WAL
+  2. VACUUM INTO a temp file next to the target (compact, defragmented copy
+     with every index already built)
+  3. ANALYZE the copy so the query planner has statistics, and switch it to
+     rollback-journal mode so readers need no -wal/-shm files
+  4. fsync, then os.replace() it over the published file
+
+Readers (the web app, verify scripts) only ever open the published file, so
+they never wait on the importer's write transactions, and a reader that
+already has the old file open keeps a consistent view of it until it reopens.
+Each phase republishes from the same staging DB, so phases stay incremental.
+
+Usage:
+  python scripts/db_publish.py                   # publish enhanced_music.staging.db -> enhanced_music.db
+  python scripts/db_publish.py path/to/music.db  # publish path/to/music.staging.db -> path/to/music.db
+"""
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+STAGING_SUFFIX = '.staging'
+
+# os.replace over a file another process has open fails on Windows; retry briefly
+REPLACE_RETRIES = 10
+REPLACE_BACKOFF = 0.5
+
+
+def staging_path(db_path):
+    """enhanced_music.db -> enhanced_music.staging.db"""
+    path = Path(db_path)
+    return path.with_name(path.stem + STAGING_SUFFIX + path.suffix)
+
+
+def prepare_staging(db_path):
+    """
+    Return the staging path for `db_path`, seeding it from the published DB
+    on first use so a new phase continues from what is already there.
+    """
+    published, staging = Path(db_path), staging_path(db_path)
+    if staging.exists() or not published.exists():
+        return staging
+
+    src = sqlite3.connect(str(published))
+    try:
+        # Fold any WAL left from when writers used the published file directly;
+        # a stale -wal next to a replaced file would be replayed onto it
+        src.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        src.execute("PRAGMA journal_mode=DELETE")
+        dst = sqlite3.connect(str(staging))
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    print(f"✅ Seeded staging DB {staging.name} from {published.name}")
+    return staging
+
+
+def _replace(src, dst):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(REPLACE_BACKOFF * (attempt + 1))
+
+
+def publish(conn, db_path):
+    """
+    Publish the DB behind `conn` (the staging connection) as `db_path`.
+    Returns {'seconds': ..., 'size_mb': ...}.
+    """
+    start = time.time()
+    target = Path(db_path)
+    tmp = target.with_name(target.name + '.publish-tmp')
+    if tmp.exists():
+        tmp.unlink()  # left over from an interrupted publish
+
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM INTO ?", (str(tmp),))
+
+    snapshot = sqlite3.connect(str(tmp))
+    try:
+        snapshot.execute("ANALYZE")
+        snapshot.execute("PRAGMA journal_mode=DELETE")
+        snapshot.commit()
+    finally:
+        snapshot.close()
+
+    with open(tmp, 'rb') as f:
+        os.fsync(f.fileno())
+    _replace(tmp, target)
+    return {'seconds': time.time() - start, 'size_mb': target.stat().st_size / (1024 * 1024)}
+
+
+def main():
+    db_path = Path(sys.argv[1] if len(sys.argv) > 1 else 'enhanced_music.db')
+    staging = staging_path(db_path)
+    if not staging.exists():
+        print(f"No staging DB at {staging}; nothing to publish")
+        sys.exit(1)
+
+    conn = sqlite3.connect(str(staging))
+    try:
+        result = publish(conn, db_path)
+    finally:
+        conn.close()
+    print(f"✅ Published {staging.name} -> {db_path.name} ({result['size_mb']:.1f} MB in {result['seconds']:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+scripts/embedding_store.py
+
+Compact binary storage for embedding vectors.
+
+Embeddings are stored as raw little-endian float16 BLOBs (1 KB for a
+512-dim OpenL3 vector, vs ~10 KB as a JSON text array or ~2.7 KB as base64
+float32). Helpers here encode/decode single vectors, load a whole column
+into one NumPy matrix for scoring or FAISS rebuilds, and export/open a
+memory-mapped `.npy` matrix keyed by row id for zero-copy access.
+
+Usage:
+  python scripts/embedding_store.py migrate enhanced_music.db        # JSON text -> BLOB
+  python scripts/embedding_store.py export audio_features.db openl3  # -> openl3.npy + openl3.ids.npy
+  python scripts/embedding_store.py drop-pg-base64 "$DATABASE_URL"   # retire audio_features.embedding_base64
+"""
+import argparse
+import base64
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+EMBEDDING_DTYPE = np.dtype('<f2')  # float16, little-endian
+
+
+def encode_embedding(vector, dtype=EMBEDDING_DTYPE):
+    """Vector -> BLOB bytes (None passes through)"""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=dtype).tobytes()
+
+
+def decode_embedding(blob, dtype=EMBEDDING_DTYPE):
+    """BLOB -> read-only NumPy view over the bytes (no copy). Legacy JSON text is parsed."""
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return np.asarray(json.loads(blob), dtype=np.float32)
+    if isinstance(blob, (list, tuple, np.ndarray)):
+        return np.asarray(blob, dtype=np.float32)
+    return np.frombuffer(blob, dtype=dtype)
+
+
+def load_matrix(conn, table, column='embedding', id_column='id', where=None, params=(), dtype=EMBEDDING_DTYPE):
+    """Load every non-null BLOB in `table.column` as (ids, float32 matrix).
+
+    The BLOBs are joined into one buffer and viewed as an (n, dim) array, so
+    there is a single copy for the concatenation and one for the float32 cast.
+    """
+    sql = f"SELECT {id_column}, {column} FROM {table} WHERE {column} IS NOT NULL AND typeof({column}) = 'blob'"
+    if where:
+        sql += f" AND ({where})"
+    ids = []
+    blobs = []
+    for row_id, blob in conn.execute(sql, params):
+        ids.append(row_id)
+        blobs.append(blob)
+    if not blobs:
+        return ids, np.zeros((0, 0), dtype=np.float32)
+    dim = len(blobs[0]) // dtype.itemsize
+    matrix = np.frombuffer(b''.join(blobs), dtype=dtype).reshape(len(blobs), dim)
+    return ids, matrix.astype(np.float32)
+
+
+def stack_embeddings(values, dtype=EMBEDDING_DTYPE, dim=None):
+    """Stack per-row embeddings (BLOB, JSON text or array, None allowed) into one matrix.
+
+    Returns (row positions that had an embedding of `dim` values, float32
+    matrix). Without `dim` the first embedding's size is used; rows of any
+    other size are left out, like rows without one. Same-size BLOBs are
+    joined and viewed in one go rather than decoded row by row.
+    """
+    rows = [i for i, v in enumerate(values) if v is not None]
+    if not rows:
+        return rows, np.zeros((0, 0), dtype=np.float32)
+    present = [values[i] for i in rows]
+    if all(isinstance(v, (bytes, memoryview)) for v in present):
+        size = len(present[0]) if dim is None else dim * dtype.itemsize
+        if any(len(v) != size for v in present):
+            kept = [(i, v) for i, v in zip(rows, present) if len(v) == size]
+            rows, present = [i for i, _ in kept], [v for _, v in kept]
+        if not rows:
+            return rows, np.zeros((0, 0), dtype=np.float32)
+        matrix = np.frombuffer(b''.join(present), dtype=dtype).reshape(len(present), size // dtype.itemsize)
+    else:
+        vectors = [decode_embedding(v, dtype) for v in present]
+        size = len(vectors[0]) if dim is None else dim
+        kept = [(i, v) for i, v in zip(rows, vectors) if len(v) == size]
+        if not kept:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        rows = [i for i, _ in kept]
+        matrix = np.vstack([v for _, v in kept])
+    return rows, matrix.astype(np.float32)
+
+
+def load_vectors(conn, table, ids, column='embedding', id_column='id', dtype=EMBEDDING_DTYPE):
+    """Fetch embeddings for specific ids -> {id: float32 vector}"""
+    if not ids:
+        return {}
+    placeholders = ','.join('?' * len(ids))
+    cursor = conn.execute(
+        f"SELECT {id_column}, {column} FROM {table} WHERE {id_column} IN ({placeholders}) AND {column} IS NOT NULL",
+        list(ids),
+    )
+    return {row_id: decode_embedding(blob, dtype).astype(np.float32) for row_id, blob in cursor}
+
+
+def export_npy(conn, table, path, column='embedding', id_column='id'):
+    """Write `<path>.npy` (float16 matrix) and `<path>.ids.npy` for memory-mapped use"""
+    ids, matrix = load_matrix(conn, table, column=column, id_column=id_column)
+    base = Path(path).with_suffix('')
+    np.save(f"{base}.npy", matrix.astype(EMBEDDING_DTYPE))
+    np.save(f"{base}.ids.npy", np.asarray(ids))
+    return len(ids)
+
+
+def open_npy(path):
+    """Memory-map an exported matrix: (ids, matrix) without reading it into RAM"""
+    base = Path(path).with_suffix('')
+    matrix = np.load(f"{base}.npy", mmap_mode='r')
+    ids = np.load(f"{base}.ids.npy", mmap_mode='r', allow_pickle=False)
+    return ids, matrix
+
+
+def migrate_json_embeddings(conn, table='songs', column='embedding', id_column='id', batch_size=5000):
+    """Rewrite JSON text-array embeddings in place as float16 BLOBs. Returns rows converted."""
+    converted = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT {id_column}, {column} FROM {table} WHERE typeof({column}) = 'text' LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            f"UPDATE {table} SET {column} = ? WHERE {id_column} = ?",
+            [(encode_embedding(json.loads(text)), row_id) for row_id, text in rows],
+        )
+        conn.commit()
+        converted += len(rows)
+    return converted
+
+
+def drop_pg_embedding_base64(pg_conn):
+    """
+    One-off Postgres migration: copy base64 float32 embeddings that have no
+    audio_vectors row into audio_vectors, then drop audio_features.embedding_base64.
+    Runs in one transaction. Returns vectors backfilled, or None if there is no column.
+    """
+    cur = pg_conn.cursor()
+    try:
+        cur.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'audio_features' AND column_name = 'embedding_base64'
+        """)
+        if cur.fetchone() is None:
+            return None
+        cur.execute("""
+            SELECT f.id, f.embedding_base64 FROM audio_features f
+            LEFT JOIN audio_vectors v ON v.id = f.id
+            WHERE f.embedding_base64 IS NOT NULL AND v.id IS NULL
+        """)
+        missing = cur.fetchall()
+        for row_id, text in missing:
+            vector = np.frombuffer(base64.b64decode(text), dtype=np.float32)
+            literal = '[' + ','.join('%.8g' % v for v in vector) + ']'
+            cur.execute("INSERT INTO audio_vectors (id, embedding) VALUES (%s, %s::vector)", (row_id, literal))
+        cur.execute("ALTER TABLE audio_features DROP COLUMN embedding_base64")
+        pg_conn.commit()
+        return len(missing)
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain binary embedding storage")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_migrate = sub.add_parser('migrate', help="convert JSON text embeddings to BLOBs")
+    p_migrate.add_argument('db')
+    p_migrate.add_argument('--table', default='songs')
+
+    p_export = sub.add_parser('export', help="export embeddings to a memory-mappable .npy matrix")
+    p_export.add_argument('db')
+    p_export.add_argument('output')
+    p_export.add_argument('--table', default='features')
+
+    p_drop = sub.add_parser('drop-pg-base64', help="backfill audio_vectors from, then drop, the legacy Postgres base64 column")
+    p_drop.add_argument('database_url')
+
+    args = parser.parse_args()
+    if args.command == 'drop-pg-base64':
+        import psycopg2
+        pg_conn = psycopg2.connect(args.database_url)
+        try:
+            backfilled = drop_pg_embedding_base64(pg_conn)
+        finally:
+            pg_conn.close()
+        if backfilled is None:
+            print("✅ audio_features has no embedding_base64 column; nothing to do")
+        else:
+            print(f"✅ Backfilled {backfilled:,} vectors into audio_vectors and dropped audio_features.embedding_base64")
+        return
+    if not Path(args.db).exists():
+        print(f"Database not found at {args.db}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'migrate':
+            converted = migrate_json_embeddings(conn, table=args.table)
+            print(f"✅ Converted {converted:,} embeddings to float16 BLOBs")
+        else:
+            count = export_npy(conn, args.table, args.output)
+            print(f"✅ Exported {count:,} embeddings to {Path(args.output).with_suffix('')}.npy")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -20,14 +20,86 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock, RLock
 import threading
 
+from artist_aggregates import aggregate_artists
+from artist_gazetteer import build_gazetteer, gazetteer_path
+from artist_enrichment import artists_to_enrich, ensure_artist_cache, fetch_artists, propagate, source_from_env
+from db_publish import prepare_staging, publish
+from harmonic import build_harmonic_index, ensure_harmonic_index
+from import_metrics import ImportMetrics
+from import_progress import ImportProgress
+from known_mbids import KnownMBIDs
+from fetch_planner import PAGE_SIZE, FetchPlan, plan_fetch
+from mb_dump import iter_dump, recording_to_song
+from mood_tagger import tag_moods
+from response_archive import ACOUSTICBRAINZ_LOWLEVEL, MUSICBRAINZ_SEARCH, ResponseArchive, lowlevel_features, replay, segments
+from song_embeddings import sync_song_embeddings
+from song_stats import ensure_song_stats, read_song_stats, top_genres
+from text_normalize import ensure_search_keys, search_key
+
+# Write to enhanced_music.staging.db and publish snapshots over enhanced_music.db
+# (see db_publish.py); IMPORT_STAGING=0 writes the published file directly
+USE_STAGING = os.environ.get('IMPORT_STAGING', '1') != '0'
+# Probe tag counts and plan pages per genre (see fetch_planner.py); IMPORT_PLAN=0 splits evenly
+USE_PLANNER = os.environ.get('IMPORT_PLAN', '1') != '0'
+# Stop paging a genre once fewer than this share of a page is new (see known_mbids.py); 0 pages to the end
+MIN_NEW_FRACTION = float(os.environ.get('IMPORT_MIN_NEW_FRACTION', '0.1'))
+# Append raw API responses to this directory for --replay (see response_archive.py)
+ARCHIVE_DIR = os.environ.get('IMPORT_ARCHIVE') or None
+
+INSERT_SONG_SQL = """
+    INSERT OR REPLACE INTO songs (
+        id, mbid, title, artist, album, genres, subgenres, moods, tags,
+        bpm, key, camelot, energy, danceability, acousticness, instrumentalness,
+        valence, loudness, popularity_score, release_year, duration_ms,
+        language, source, title_norm, artist_norm
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rows per executemany/commit when bulk-loading a local dump
+DUMP_BATCH_SIZE = 5000
+
+
+def estimate_popularity(energy: Optional[float], danceability: Optional[float]) -> Optional[int]:
+    """Simple heuristic: higher energy + danceability = more popular"""
+    if energy and danceability:
+        return min(100, max(0, int((energy + danceability) / 2 * 100)))
+    return None
+
+
+def song_row(song: Dict) -> tuple:
+    """Parameters for INSERT_SONG_SQL"""
+    # Estimate popularity from audio features if not available
+    if not song.get('popularity_score'):
+        song['popularity_score'] = estimate_popularity(song.get('energy'), song.get('danceability'))
+    return (
+        song['id'], song['mbid'], song['title'], song['artist'],
+        song.get('album'), song['genres'], song.get('subgenres'),
+        song.get('moods'), song['tags'], song.get('bpm'), song.get('key'),
+        song.get('camelot'), song.get('energy'), song.get('danceability'), song.get('acousticness'),
+        song.get('instrumentalness'), song.get('valence'), song.get('loudness'),
+        song.get('popularity_score'), song.get('release_year'),
+        song.get('duration_ms'), song.get('language'), song['source'],
+        search_key(song['title']), search_key(song['artist'])
+    )
+
 # Force UTF-8 output on Windows
 if sys.platform == 'win32':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 class EnhancedMusicImporter:
-    def __init__(self, db_path: str = "enhanced_music.db", use_threading: bool = True, max_workers: int = 10):
-        self.db_path = db_path
+    def __init__(self, db_path: str = "enhanced_music.db", use_threading: bool = True, max_workers: int = 10,
+                 metrics: Optional[ImportMetrics] = None, target_songs: Optional[int] = None,
+                 staging: bool = USE_STAGING, archive: Optional[str] = ARCHIVE_DIR):
+        # Readers open publish_path; all writes go to db_path
+        self.publish_path = db_path
+        self.db_path = str(prepare_staging(db_path)) if staging else db_path
+        self.metrics = metrics or ImportMetrics()
+        self.target_songs = target_songs
+        self.progress = None
+        self.known_mbids = None
+        # Raw responses for --replay; None when IMPORT_ARCHIVE is unset
+        self.archive = ResponseArchive(archive) if archive else None
         self.conn = None
         self.cursor = None
         self.use_threading = use_threading
@@ -38,10 +110,13 @@ class EnhancedMusicImporter:
         self.mb_delays = {}  # Per-thread rate limiting
         self.ab_delay_lock = Lock()
         self.ab_last_request = 0
+        self.lastfm_lock = Lock()
+        self.lastfm_last_request = 0
         
         # Shared rate limiting across all threads
         self.mb_delay = 0.15  # With threading, can be more aggressive (respecting MusicBrainz's 1/s limit)
         self.ab_delay = 0.05   # With threading, distribute across threads
+        self.lastfm_delay = 0.2  # Last.fm asks for at most 5 requests/second
         
         self.session = requests.Session()
         self.session.headers.update({
@@ -57,6 +132,8 @@ class EnhancedMusicImporter:
     def init_db(self):
         """Initialize database with enhanced schema"""
         self.conn = sqlite3.connect(self.db_path)
+        # WAL: monitors reading import_progress never block the writer (or vice versa)
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self.cursor = self.conn.cursor()
         
         # Create tables
@@ -73,6 +150,7 @@ class EnhancedMusicImporter:
                 tags TEXT,
                 bpm REAL,
                 key TEXT,
+                camelot TEXT,
                 energy REAL,
                 danceability REAL,
                 acousticness REAL,
@@ -85,9 +163,11 @@ class EnhancedMusicImporter:
                 language TEXT,
                 similar_artists TEXT,
                 collaborators TEXT,
-                embedding TEXT,
+                embedding BLOB,
                 source TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                title_norm TEXT,
+                artist_norm TEXT
             );
             
             CREATE TABLE IF NOT EXISTS artists (
@@ -117,31 +197,167 @@ class EnhancedMusicImporter:
             CREATE INDEX IF NOT EXISTS idx_energy ON songs(energy);
             CREATE INDEX IF NOT EXISTS idx_popularity ON songs(popularity_score DESC);
         """)
+        self._ensure_columns('songs', {'camelot': 'TEXT'})
+        # Casefolded/accent-free title and artist keys (text_normalize.py), filled for older rows
+        ensure_search_keys(self.conn)
+        ensure_harmonic_index(self.conn)
         self.conn.commit()
-        print("✅ Database initialized")
+        # Coverage counts and genre/artist histograms, kept current by triggers
+        ensure_song_stats(self.conn)
+        # Per-artist Last.fm lookups, shared by every song of the artist
+        ensure_artist_cache(self.conn)
+        # Monitors read this row instead of polling COUNT(*)
+        self.progress = ImportProgress(self.conn, self.target_songs)
+        # Recordings already stored are skipped before enrichment
+        start = time.time()
+        self.known_mbids = KnownMBIDs.from_db(self.conn)
+        print(f"✅ Database initialized ({len(self.known_mbids):,} known MBIDs, "
+              f"{self.known_mbids.nbytes() / (1024 * 1024):.1f} MB, {time.time() - start:.1f}s)")
+    
+    def _ensure_columns(self, table: str, columns: Dict[str, str]):
+        """Add columns introduced after a database was first created"""
+        existing = {row[1] for row in self.cursor.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns.items():
+            if name not in existing:
+                self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
     
     def _rate_limit(self, api_name: str):
         """Respect API rate limits (thread-safe)"""
+        waited = 0.0
         if api_name == 'musicbrainz':
             with self.rate_limit_lock:
                 elapsed = time.time() - self.mb_delays.get(threading.current_thread().ident, 0)
                 if elapsed < self.mb_delay:
-                    time.sleep(self.mb_delay - elapsed)
+                    waited = self.mb_delay - elapsed
+                    time.sleep(waited)
                 self.mb_delays[threading.current_thread().ident] = time.time()
         elif api_name == 'acousticbrainz':
             with self.ab_delay_lock:
                 elapsed = time.time() - self.ab_last_request
                 if elapsed < self.ab_delay:
-                    time.sleep(self.ab_delay - elapsed)
+                    waited = self.ab_delay - elapsed
+                    time.sleep(waited)
                 self.ab_last_request = time.time()
+        elif api_name == 'lastfm':
+            with self.lastfm_lock:
+                elapsed = time.time() - self.lastfm_last_request
+                if elapsed < self.lastfm_delay:
+                    waited = self.lastfm_delay - elapsed
+                    time.sleep(waited)
+                self.lastfm_last_request = time.time()
+        if waited:
+            self.metrics.inc('rate_limit_wait_seconds', waited, api=api_name)
     
-    def import_from_musicbrainz(self, genres: List[str] = None, per_genre: int = 500) -> List[Dict]:
+    def _fetch_page(self, genre: str, offset: int, limit: int = 100) -> Dict:
+        """One /ws/2/recording tag search page, with retries; failures yield an empty page"""
+        url = "https://musicbrainz.org/ws/2/recording/"
+        metrics = self.metrics
+        retries = 0
+        max_retries = 3
+        data = None
+        
+        while retries < max_retries and data is None:
+            try:
+                self._rate_limit('musicbrainz')
+                
+                params = {
+                    'query': f'tag:{genre}',
+                    'fmt': 'json',
+                    'limit': limit,  # Max 100 per request
+                    'offset': offset,
+                }
+                
+                request_start = time.perf_counter()
+                try:
+                    response = self.session.get(url, params=params, timeout=30)
+                finally:
+                    metrics.observe('musicbrainz_request_seconds', time.perf_counter() - request_start)
+                metrics.inc('musicbrainz_requests', status=response.status_code)
+                response.raise_for_status()
+                data = response.json()
+                if self.archive:
+                    self.archive.record(MUSICBRAINZ_SEARCH, {'tag': genre, 'offset': offset, 'limit': limit},
+                                        response.status_code, response.text)
+            except (ConnectionError, ConnectionResetError, TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout, OSError, EOFError) as e:
+                # Catch socket/SSL/connection errors
+                retries += 1
+                metrics.inc('musicbrainz_errors', error=type(e).__name__)
+                if retries < max_retries:
+                    metrics.inc('musicbrainz_retries', reason='connection')
+                    wait_time = 5 * retries  # Exponential backoff: 5s, 10s, 15s
+                    error_name = type(e).__name__
+                    # print(f"    ⚠️  {error_name} (retry {retries}/{max_retries} after {wait_time}s): {genre}")
+                    time.sleep(wait_time)
+                    continue  # Retry the request
+                else:
+                    # print(f"    ⚠️  Max retries reached for {genre} offset {offset}")
+                    data = {'recordings': []}
+                    break
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 503:
+                    # Service temporarily unavailable - quick retry
+                    retries += 1
+                    if retries < max_retries:
+                        metrics.inc('musicbrainz_retries', reason='503')
+                        wait_time = 2 * (retries)  # Short backoff for 503: 2s, 4s, 6s
+                        # print(f"    ⚠️  Service unavailable (retry {retries}/{max_retries}): {genre} offset {offset}")
+                        time.sleep(wait_time)
+                        continue  # Retry the request
+                    else:
+                        # Silently skip - don't log max retries for 503
+                        data = {'recordings': []}
+                        break
+                else:
+                    # Other HTTP error - don't retry
+                    print(f"    ⚠️  HTTP {e.response.status_code} error fetching {genre} offset {offset}")
+                    data = {'recordings': []}
+                    break
+            except Exception as e:
+                # Final catch-all for unexpected errors
+                error_name = type(e).__name__
+                retries += 1
+                metrics.inc('musicbrainz_errors', error=error_name)
+                if retries < max_retries:
+                    metrics.inc('musicbrainz_retries', reason='other')
+                    # print(f"    ⚠️  {error_name} (retry {retries}/{max_retries}): {genre}")
+                    time.sleep(3)
+                    continue
+                else:
+                    # print(f"    ⚠️  Skipping {genre} offset {offset} after {error_name}")
+                    data = {'recordings': []}
+                    break
+        
+        return data
+    
+    def plan_musicbrainz(self, genres: List[str], target_songs: int) -> FetchPlan:
+        """Probe every tag once and plan pages per genre (see fetch_planner.py)"""
+        print(f"\n🧭 Probing {len(genres)} MusicBrainz tags to plan the fetch...")
+        self.metrics.set_stage('plan')
+        self.progress.start_stage('plan', len(genres))
+        with self.metrics.timer('stage_seconds', stage='plan'):
+            plan = plan_fetch(self._fetch_page, genres, target_songs,
+                              on_probe=lambda genre, page: self.progress.advance(), known=self.known_mbids)
+        print(f"✅ Plan: {plan.summary(target_songs)}")
+        return plan
+    
+    def import_from_musicbrainz(self, genres: List[str] = None, per_genre: int = 500,
+                                plan: Optional[FetchPlan] = None) -> List[Dict]:
         """
         Import songs from MusicBrainz by genre
         
         MusicBrainz has ~50M recordings. We'll import by genre to get good coverage.
         Supports threading for faster imports.
+        With a `plan` (see fetch_planner.py) each genre gets its planned page
+        count instead of `per_genre`, and the probe pages are not re-fetched.
         """
+        first_pages = {}
+        limits = {}
+        if plan is not None:
+            genres = plan.genres()
+            first_pages = plan.first_pages
+            limits = {genre: pages * PAGE_SIZE for genre, pages in plan.pages.items()}
+            per_genre = max(limits.values(), default=0)
+
         if genres is None:
             genres = [
                 'pop', 'rock', 'hip-hop', 'electronic', 'house', 'techno', 'dubstep',
@@ -153,10 +369,17 @@ class EnhancedMusicImporter:
         
         print(f"\n📥 Importing from MusicBrainz...")
         print(f"   Genres: {', '.join(genres[:5])}... ({len(genres)} total)")
-        print(f"   Songs per genre: {per_genre}")
-        print(f"   Total target: {len(genres) * per_genre:,} songs")
+        if plan is not None:
+            print(f"   Pages per genre: planned, {plan.requests():,} requests for ~{plan.expected_unique():,.0f} unique songs")
+        else:
+            print(f"   Songs per genre: {per_genre}")
+            print(f"   Total target: {len(genres) * per_genre:,} songs")
         print(f"   Threading: {'✅ Enabled' if self.use_threading else '❌ Disabled'}")
         
+        metrics = self.metrics
+        metrics.set_stage('musicbrainz')
+        metrics.set_gauge('queue_depth', len(genres), stage='musicbrainz')
+        self.progress.start_stage('musicbrainz', len(genres))
         all_songs = []
         all_songs_lock = Lock()
         stats = {'total': 0, 'errors': 0}
@@ -165,130 +388,50 @@ class EnhancedMusicImporter:
         def fetch_genre(genre):
             """Fetch songs for a single genre (can be called in parallel)"""
             genre_songs = []
+            skipped = 0
+            saturated = False
             try:
                 print(f"  ⏳ Fetching {genre}...")
                 
-                url = "https://musicbrainz.org/ws/2/recording/"
-                
                 # Paginate through results
-                for offset in range(0, per_genre, 100):
-                    retries = 0
-                    max_retries = 3
-                    data = None
-                    
-                    while retries < max_retries and data is None:
-                        try:
-                            self._rate_limit('musicbrainz')
-                            
-                            params = {
-                                'query': f'tag:{genre}',
-                                'fmt': 'json',
-                                'limit': 100,  # Max 100 per request
-                                'offset': offset,
-                            }
-                            
-                            response = self.session.get(url, params=params, timeout=30)
-                            response.raise_for_status()
-                            data = response.json()
-                        except (ConnectionError, ConnectionResetError, TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout, OSError, EOFError) as e:
-                            # Catch socket/SSL/connection errors
-                            retries += 1
-                            if retries < max_retries:
-                                wait_time = 5 * retries  # Exponential backoff: 5s, 10s, 15s
-                                error_name = type(e).__name__
-                                # print(f"    ⚠️  {error_name} (retry {retries}/{max_retries} after {wait_time}s): {genre}")
-                                time.sleep(wait_time)
-                                continue  # Retry the request
-                            else:
-                                # print(f"    ⚠️  Max retries reached for {genre} offset {offset}")
-                                data = {'recordings': []}
-                                break
-                        except requests.exceptions.HTTPError as e:
-                            if e.response.status_code == 503:
-                                # Service temporarily unavailable - quick retry
-                                retries += 1
-                                if retries < max_retries:
-                                    wait_time = 2 * (retries)  # Short backoff for 503: 2s, 4s, 6s
-                                    # print(f"    ⚠️  Service unavailable (retry {retries}/{max_retries}): {genre} offset {offset}")
-                                    time.sleep(wait_time)
-                                    continue  # Retry the request
-                                else:
-                                    # Silently skip - don't log max retries for 503
-                                    data = {'recordings': []}
-                                    break
-                            else:
-                                # Other HTTP error - don't retry
-                                print(f"    ⚠️  HTTP {e.response.status_code} error fetching {genre} offset {offset}")
-                                data = {'recordings': []}
-                                break
-                        except Exception as e:
-                            # Final catch-all for unexpected errors
-                            error_name = type(e).__name__
-                            retries += 1
-                            if retries < max_retries:
-                                # print(f"    ⚠️  {error_name} (retry {retries}/{max_retries}): {genre}")
-                                time.sleep(3)
-                                continue
-                            else:
-                                # print(f"    ⚠️  Skipping {genre} offset {offset} after {error_name}")
-                                data = {'recordings': []}
-                                break
+                for offset in range(0, limits.get(genre, per_genre), 100):
+                    if genre in first_pages and offset == 0:
+                        data = first_pages[genre]  # already fetched by the planner's probe
+                    else:
+                        data = self._fetch_page(genre, offset)
                     
                     if data is None:
                         continue
                     
+                    page_songs = []
                     for recording in data.get('recordings', []):
                         try:
-                            artist_credit = recording.get('artist-credit', [{}])[0]
-                            artist_name = artist_credit.get('artist', {}).get('name', 'Unknown')
-                            
-                            song = {
-                                'id': f"{recording.get('id')}",
-                                'mbid': recording.get('id'),
-                                'title': recording.get('title'),
-                                'artist': artist_name,
-                                'album': None,
-                                'genres': json.dumps([genre]),
-                                'subgenres': json.dumps([genre]),
-                                'moods': None,
-                                'tags': json.dumps([genre]),
-                                'bpm': None,
-                                'key': None,
-                                'energy': None,
-                                'danceability': None,
-                                'acousticness': None,
-                                'instrumentalness': None,
-                                'valence': None,
-                                'loudness': None,
-                                'popularity_score': None,
-                                'release_year': None,
-                                'duration_ms': recording.get('length'),
-                                'language': None,
-                                'similar_artists': None,
-                                'source': 'musicbrainz',
-                            }
-                            
-                            # Try to get album from first release
-                            if recording.get('releases'):
-                                first_release = recording['releases'][0]
-                                song['album'] = first_release.get('title')
-                                release_date = first_release.get('date')
-                                if release_date:
-                                    try:
-                                        song['release_year'] = int(release_date.split('-')[0])
-                                    except:
-                                        pass
-                            
-                            genre_songs.append(song)
+                            song = recording_to_song(recording, [genre])
+                            page_songs.append(song)
                         except Exception as e:
                             with stats_lock:
                                 stats['errors'] += 1
                     
+                    # Known recordings (stored earlier, or claimed by another genre this run) are dropped here
+                    new_flags = self.known_mbids.add_new([song['mbid'] for song in page_songs])
+                    new_songs = [song for song, new in zip(page_songs, new_flags) if new]
+                    genre_songs.extend(new_songs)
+                    skipped += len(page_songs) - len(new_songs)
+                    
                     if len(data.get('recordings', [])) < 100:
                         break
+                    if page_songs and len(new_songs) / len(page_songs) < MIN_NEW_FRACTION:
+                        saturated = True  # deeper pages of a relevance-sorted search are no fresher
+                        break
 
                 
-                print(f"  ✅ {genre}: {len(genre_songs)} songs")
+                if skipped:
+                    metrics.inc('known_mbids_skipped', skipped)
+                if saturated:
+                    metrics.inc('genres_saturated')
+                print(f"  ✅ {genre}: {len(genre_songs)} songs"
+                      f"{f', {skipped} already known' if skipped else ''}{' (saturated)' if saturated else ''}")
+                metrics.inc('songs_fetched', len(genre_songs))
                 with all_songs_lock:
                     all_songs.extend(genre_songs)
                     with stats_lock:
@@ -298,29 +441,164 @@ class EnhancedMusicImporter:
                 print(f"    ❌ Critical error with genre '{genre}': {str(e)[:50]}")
                 with stats_lock:
                     stats['errors'] += 1
+            finally:
+                metrics.inc('genres_done')
+            return len(genre_songs)
         
         # Import genres (sequential or parallel)
         if self.use_threading and len(genres) > 1:
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 futures = [executor.submit(fetch_genre, genre) for genre in genres]
-                for future in as_completed(futures):
+                for i, future in enumerate(as_completed(futures), 1):
+                    metrics.set_gauge('queue_depth', len(genres) - i, stage='musicbrainz')
                     try:
-                        future.result()
+                        self.progress.advance(fetched=future.result())
                     except Exception as e:
+                        self.progress.advance()
                         print(f"  ❌ Thread error: {e}")
         else:
-            for genre in genres:
-                fetch_genre(genre)
+            for i, genre in enumerate(genres, 1):
+                fetched = fetch_genre(genre)
+                metrics.set_gauge('queue_depth', len(genres) - i, stage='musicbrainz')
+                self.progress.advance(fetched=fetched)
         
         print(f"\n✅ Fetched {stats['total']} songs from MusicBrainz (errors: {stats['errors']})")
         return all_songs
     
+    def import_from_dump(self, dump_path: str, genres: List[str], per_genre: Optional[int] = None) -> int:
+        """
+        Stream a local MusicBrainz dump (see mb_dump.py) straight into songs
+        
+        No network and no rate limit: recordings tagged with one of `genres`
+        are mapped like API results and bulk-loaded in batches, so the stage
+        is bound by decompression and SQLite. Progress is bytes of dump read.
+        """
+        print(f"\n📦 Loading MusicBrainz dump {dump_path}...")
+        print(f"   Genres: {', '.join(genres[:5])}... ({len(genres)} total)")
+        print(f"   Songs per genre: {per_genre or 'all'}")
+        
+        self.metrics.set_stage('dump')
+        progress = self.progress
+        progress.start_stage('dump')
+        start = time.time()
+        stats = {}
+        
+        def on_progress(done, total):
+            progress.row['stage_total'] = total
+            progress.row['stage_done'] = done
+        
+        with self.metrics.timer('stage_seconds', stage='dump'):
+            stored = self._bulk_store(iter_dump(dump_path, genres, per_genre, on_progress, stats), 'dump',
+                                      lambda: f"{stats.get('scanned', 0):,} scanned")
+        
+        print(f"\n✅ Loaded {stored:,} songs from {stats.get('scanned', 0):,} dump recordings "
+              f"in {time.time() - start:.0f}s (unreadable: {stats.get('errors', 0)})")
+        return stored
+    
+    def _bulk_store(self, songs, stage: str, position=lambda: '') -> int:
+        """executemany `songs` in DUMP_BATCH_SIZE batches, committing progress with each batch"""
+        metrics = self.metrics
+        progress = self.progress
+        start = time.time()
+        stored = 0
+        
+        def flush(batch):
+            nonlocal stored
+            try:
+                self.cursor.executemany(INSERT_SONG_SQL, [song_row(song) for song in batch])
+                added = len(batch)
+            except sqlite3.Error:
+                # One bad row fails the whole executemany; retry row by row to keep the rest
+                added = 0
+                for song in batch:
+                    try:
+                        self.cursor.execute(INSERT_SONG_SQL, song_row(song))
+                        added += 1
+                    except sqlite3.Error as e:
+                        metrics.inc('store_errors')
+                        print(f"    Error storing song: {e}")
+            stored += added
+            progress.row['stored'] += added
+            progress.row['fetched'] += len(batch)
+            metrics.inc('songs_fetched', len(batch))
+            metrics.inc('songs_stored', added)
+            progress.write(commit=False)
+            with metrics.timer('commit_seconds', stage=stage):
+                self.conn.commit()
+            elapsed = time.time() - start
+            metrics.set_gauge('store_rows_per_second', stored / elapsed if elapsed > 0 else 0.0)
+            print(f"  [{position()}] Stored {stored:,} songs...")
+        
+        batch = []
+        for song in songs:
+            batch.append(song)
+            if len(batch) >= DUMP_BATCH_SIZE:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        return stored
+    
+    def import_from_archive(self, archive_dir: str, workers: Optional[int] = None) -> int:
+        """
+        Rebuild songs from archived raw responses (see response_archive.py)
+        
+        Segments are decompressed and parsed in parallel worker processes and
+        applied in archive order: a recording keeps the genre of the first
+        page it appeared on, as in the live run, and AcousticBrainz features
+        are applied once every song before them is stored. Rows are written
+        with INSERT OR REPLACE, so parsing fixes overwrite what is there.
+        """
+        print(f"\n📼 Replaying response archive {archive_dir}...")
+        metrics = self.metrics
+        metrics.set_stage('replay')
+        progress = self.progress
+        progress.start_stage('replay', len(segments(archive_dir)))
+        start = time.time()
+        seen = set()
+        totals = {'records': 0, 'pages': 0, 'lowlevel': 0, 'errors': 0}
+        stored = 0
+        enriched = 0
+        
+        with metrics.timer('stage_seconds', stage='replay'):
+            for number, songs, features, counts in replay(archive_dir, workers):
+                for name, count in counts.items():
+                    totals[name] += count
+                new_songs = []
+                for song in songs:
+                    if song['mbid'] not in seen:
+                        seen.add(song['mbid'])
+                        new_songs.append(song)
+                stored += self._bulk_store(new_songs, 'replay', lambda: f"segment {number:06d}")
+                # Features reference songs from this or an earlier segment, all stored by now
+                rows = [(f.get('bpm'), f.get('key'), f.get('camelot'), f.get('energy'), f.get('danceability'),
+                         estimate_popularity(f.get('energy'), f.get('danceability')), mbid)
+                        for mbid, f in features.items() if f]
+                self.cursor.executemany("""
+                    UPDATE songs SET bpm = ?, key = ?, camelot = ?, energy = ?, danceability = ?,
+                                     popularity_score = COALESCE(popularity_score, ?), last_updated = CURRENT_TIMESTAMP
+                    WHERE mbid = ?
+                """, rows)
+                self.conn.commit()
+                enriched += len(rows)
+                progress.advance(enriched=len(rows))
+                metrics.inc('archive_records_replayed', counts['records'])
+        
+        print(f"\n✅ Replayed {totals['records']:,} responses ({totals['pages']:,} search pages, "
+              f"{totals['lowlevel']:,} AcousticBrainz documents, {totals['errors']} unreadable): "
+              f"{stored:,} songs, {enriched:,} with audio features in {time.time() - start:.0f}s")
+        return stored
+    
     def enrich_with_acousticbrainz(self, songs: List[Dict]) -> List[Dict]:
         """Enrich songs with audio features from AcousticBrainz (threaded)"""
         print(f"\n🎵 Enriching with AcousticBrainz features...")
         print(f"   Songs to enrich: {len(songs)}")
         print(f"   Threading: {'✅ Enabled' if self.use_threading else '❌ Disabled'}")
         
+        metrics = self.metrics
+        metrics.set_stage('acousticbrainz')
+        metrics.set_gauge('queue_depth', len(songs), stage='acousticbrainz')
+        self.progress.start_stage('acousticbrainz', len(songs))
         enriched = {'count': 0}
         enriched_lock = Lock()
         
@@ -328,134 +606,143 @@ class EnhancedMusicImporter:
             """Enrich a single song (can be called in parallel)"""
             try:
                 if not song.get('mbid'):
-                    return
+                    metrics.inc('acousticbrainz_lookups', result='no_mbid')
+                    return False
                 
                 self._rate_limit('acousticbrainz')
                 url = f"https://acousticbrainz.org/api/v1/{song['mbid']}/low-level"
                 
-                response = self.session.get(url, timeout=10)
+                with metrics.timer('acousticbrainz_request_seconds'):
+                    response = self.session.get(url, timeout=10)
+                # hit = features found; miss = 404 (recording not in AcousticBrainz)
+                metrics.inc('acousticbrainz_lookups', result='hit' if response.status_code == 200 else
+                            'miss' if response.status_code == 404 else f'http_{response.status_code}')
+                if self.archive and response.status_code in (200, 404):
+                    self.archive.record(ACOUSTICBRAINZ_LOWLEVEL, {'mbid': song['mbid']}, response.status_code,
+                                        response.text if response.status_code == 200 else None)
                 if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Extract audio features
-                    if 'rhythm' in data:
-                        song['bpm'] = data['rhythm'].get('bpm')
-                    
-                    if 'tonal' in data:
-                        song['key'] = data['tonal'].get('key_key')
-                    
-                    if 'lowlevel' in data:
-                        lowlevel = data['lowlevel']
-                        if 'energy' in lowlevel and 'mean' in lowlevel['energy']:
-                            song['energy'] = lowlevel['energy']['mean']
-                        if 'danceability' in lowlevel and 'mean' in lowlevel['danceability']:
-                            song['danceability'] = lowlevel['danceability']['mean']
+                    # Extract audio features (same parser replay uses)
+                    song.update(lowlevel_features(response.json()))
                     
                     with enriched_lock:
                         enriched['count'] += 1
+                    return True
             except Exception as e:
+                metrics.inc('acousticbrainz_lookups', result='error')
                 pass  # Silently skip if enrichment fails (but song still gets stored with what we have)
+            return False
         
         # Enrich songs (sequential or parallel)
         if self.use_threading:
             with ThreadPoolExecutor(max_workers=self.max_workers * 2) as executor:
                 futures = [executor.submit(enrich_song, song) for song in songs]
                 for i, future in enumerate(as_completed(futures)):
+                    metrics.set_gauge('queue_depth', len(songs) - i - 1, stage='acousticbrainz')
                     if i % 5000 == 0:
                         print(f"  [{i}/{len(songs)}] Enriched {enriched['count']} songs...")
                     try:
-                        future.result()
+                        self.progress.advance(enriched=int(future.result()))
                     except:
-                        pass
+                        self.progress.advance()
         else:
             for i, song in enumerate(songs):
                 if i % 100 == 0:
                     print(f"  [{i}/{len(songs)}] Enriched {enriched['count']} songs...")
-                enrich_song(song)
+                found = enrich_song(song)
+                metrics.set_gauge('queue_depth', len(songs) - i - 1, stage='acousticbrainz')
+                self.progress.advance(enriched=int(found))
         
         print(f"✅ Enriched {enriched['count']}/{len(songs)} songs with audio features")
         return songs
     
-    def enrich_with_lastfm(self, songs: List[Dict]) -> List[Dict]:
-        """Enrich with Last.fm tags and popularity"""
-        print(f"\n🏷️  Enriching with Last.fm tags...")
+    def enrich_artists(self) -> Optional[Dict]:
+        """
+        Fetch tags, popularity and similar artists once per artist (see
+        artist_enrichment.py) and copy them to that artist's songs in bulk
         
-        enriched = 0
-        for i, song in enumerate(songs):
-            if i % 100 == 0:
-                print(f"  [{i}/{len(songs)}] Enriched {enriched} songs...")
-            
-            try:
-                self._rate_limit('lastfm')
-                
-                # Note: Last.fm requires API key, skip for now
-                # This would be: artist.getTopTags, track.getTags
-                pass
-            
-            except Exception as e:
-                pass
+        Runs on what is stored, so it covers API, dump and replay imports
+        alike. Artists already in artist_cache are not fetched again.
+        """
+        source = source_from_env(self.session, lambda: self._rate_limit('lastfm'))
+        if source is None:
+            print("\n🏷️  Artist enrichment skipped (set LASTFM_API_KEY or LASTFM_ARTISTS_FILE)")
+            return None
         
-        print(f"✅ Enriched {enriched}/{len(songs)} with Last.fm data")
-        return songs
+        metrics = self.metrics
+        artists = artists_to_enrich(self.conn)
+        total_songs = self.conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+        print(f"\n🏷️  Enriching artists from {source.name}...")
+        print(f"   Artists to look up: {len(artists):,} (covering {total_songs:,} songs)")
+        
+        metrics.set_stage('artists')
+        metrics.set_gauge('queue_depth', len(artists), stage='artists')
+        self.progress.start_stage('artists', len(artists))
+        
+        def on_progress(done):
+            metrics.set_gauge('queue_depth', len(artists) - done, stage='artists')
+            self.progress.advance()
+            if done % 1000 == 0:
+                print(f"  [{done:,}/{len(artists):,}] artists looked up...")
+        
+        with metrics.timer('stage_seconds', stage='artists'):
+            counts = fetch_artists(self.conn, source, artists, on_progress,
+                                   on_result=lambda result: metrics.inc('artist_lookups', result=result))
+            songs_updated, artists_updated = propagate(self.conn)
+        
+        print(f"✅ Artists: {counts['found']:,} found, {counts['missing']:,} unknown, {counts['errors']} errors; "
+              f"updated {songs_updated:,} songs and {artists_updated:,} artists")
+        return {**counts, 'songs_updated': songs_updated, 'artists_updated': artists_updated}
     
     def store_songs(self, songs: List[Dict]) -> int:
         """Store songs in database"""
         print(f"\n💾 Storing {len(songs)} songs...")
         
+        metrics = self.metrics
+        metrics.set_stage('store')
+        progress = self.progress
+        progress.start_stage('store', len(songs))
+        start = time.time()
         stored = 0
         for i, song in enumerate(songs):
             if i % 1000 == 0:
+                if i:
+                    # Commit in batches; the progress row goes out in the same transaction
+                    progress.row['stage_done'] = i
+                    progress.write(commit=False)
+                    self.conn.commit()
                 print(f"  [{i}/{len(songs)}] Stored {stored} songs...")
+                elapsed = time.time() - start
+                metrics.set_gauge('store_rows_per_second', stored / elapsed if elapsed > 0 else 0.0)
+                metrics.set_gauge('queue_depth', len(songs) - i, stage='store')
             
             try:
-                # Estimate popularity from audio features if not available
-                if not song.get('popularity_score'):
-                    # Simple heuristic: higher energy + danceability = more popular
-                    if song.get('energy') and song.get('danceability'):
-                        score = int((song['energy'] + song['danceability']) / 2 * 100)
-                        song['popularity_score'] = min(100, max(0, score))
-                
-                self.cursor.execute("""
-                    INSERT OR REPLACE INTO songs (
-                        id, mbid, title, artist, album, genres, subgenres, moods, tags,
-                        bpm, key, energy, danceability, acousticness, instrumentalness,
-                        valence, loudness, popularity_score, release_year, duration_ms,
-                        language, source
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    song['id'], song['mbid'], song['title'], song['artist'],
-                    song.get('album'), song['genres'], song.get('subgenres'),
-                    song.get('moods'), song['tags'], song.get('bpm'), song.get('key'),
-                    song.get('energy'), song.get('danceability'), song.get('acousticness'),
-                    song.get('instrumentalness'), song.get('valence'), song.get('loudness'),
-                    song.get('popularity_score'), song.get('release_year'),
-                    song.get('duration_ms'), song.get('language'), song['source']
-                ))
+                self.cursor.execute(INSERT_SONG_SQL, song_row(song))
                 
+                progress.row['stored'] += 1
                 stored += 1
+                metrics.inc('songs_stored')
             except Exception as e:
+                metrics.inc('store_errors')
                 print(f"    Error storing song: {e}")
         
-        self.conn.commit()
+        progress.row['stage_done'] = len(songs)
+        progress.write(commit=False)
+        with metrics.timer('commit_seconds', stage='store'):
+            self.conn.commit()
+        elapsed = time.time() - start
+        metrics.set_gauge('store_rows_per_second', stored / elapsed if elapsed > 0 else 0.0)
+        metrics.set_gauge('queue_depth', 0, stage='store')
         print(f"✅ Stored {stored}/{len(songs)} songs")
         return stored
     
     def verify_import(self) -> Dict:
-        """Check what was imported"""
-        self.cursor.execute("SELECT COUNT(*) FROM songs")
-        total = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT COUNT(*) FROM songs WHERE bpm IS NOT NULL")
-        with_bpm = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT COUNT(*) FROM songs WHERE energy IS NOT NULL")
-        with_energy = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT COUNT(*) FROM songs WHERE genres IS NOT NULL")
-        with_genres = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT COUNT(*) FROM songs WHERE popularity_score IS NOT NULL")
-        with_popularity = self.cursor.fetchone()[0]
+        """Check what was imported (reads the trigger-maintained stats, no table scans)"""
+        stats = read_song_stats(self.conn)
+        total = stats['total']
+        with_bpm = stats['bpm']
+        with_energy = stats['energy']
+        with_genres = stats['genres']
+        with_popularity = stats['popularity_score']
         
         self.cursor.execute("SELECT title, artist, bpm, energy, genres FROM songs LIMIT 3")
         samples = self.cursor.fetchall()
@@ -466,6 +753,8 @@ class EnhancedMusicImporter:
         print(f"  With Energy: {with_energy} ({100*with_energy/max(total,1):.1f}%)")
         print(f"  With Genres: {with_genres} ({100*with_genres/max(total,1):.1f}%)")
         print(f"  With Popularity: {with_popularity} ({100*with_popularity/max(total,1):.1f}%)")
+        print(f"  Unique artists: {stats['unique_artists']}")
+        print(f"  Top genres: {', '.join(f'{genre} ({count})' for genre, count in top_genres(self.conn, 5))}")
         
         print(f"\n  Sample songs:")
         for title, artist, bpm, energy, genres in samples:
@@ -480,8 +769,20 @@ class EnhancedMusicImporter:
             'with_popularity': with_popularity,
         }
     
+    def publish(self) -> Optional[Dict]:
+        """Publish a compacted, analyzed snapshot of the staging DB for readers"""
+        if self.db_path == self.publish_path:
+            return None
+        self.metrics.set_stage('publish')
+        with self.metrics.timer('stage_seconds', stage='publish'):
+            result = publish(self.conn, self.publish_path)
+        print(f"✅ Published snapshot {self.publish_path} ({result['size_mb']:.1f} MB in {result['seconds']:.1f}s)")
+        return result
+    
     def close(self):
         """Close database connection"""
+        if self.archive:
+            self.archive.close()
         if self.conn:
             self.conn.close()
 
@@ -628,16 +929,40 @@ def main():
     
     # Parse command line for target size (default: 10k for Phase 1)
     target_songs = 10_000
-    if len(sys.argv) > 1:
+    args = sys.argv[1:]
+    
+    # --dump PATH: read recordings from a local MusicBrainz dump instead of the API (see mb_dump.py)
+    dump_path = None
+    if '--dump' in args:
+        i = args.index('--dump')
+        dump_path = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+        if not dump_path or not os.path.exists(dump_path):
+            print(f"❌ Dump not found: {dump_path}")
+            return
+    
+    # --replay DIR: rebuild songs from archived raw responses (see response_archive.py)
+    replay_dir = None
+    if '--replay' in args:
+        i = args.index('--replay')
+        replay_dir = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+        if not replay_dir or not os.path.isdir(replay_dir):
+            print(f"❌ Archive not found: {replay_dir}")
+            return
+    
+    if args:
         try:
-            target_songs = int(sys.argv[1])
+            target_songs = int(args[0])
         except:
-            print(f"Usage: python enhanced-music-importer.py [target_songs]")
+            print(f"Usage: python enhanced-music-importer.py [target_songs] [--dump PATH | --replay DIR]")
             print(f"Examples:")
             print(f"  python enhanced-music-importer.py 10000    # Phase 1 (10k songs)")
             print(f"  python enhanced-music-importer.py 40000    # Phase 2 (40k songs)")
             print(f"  python enhanced-music-importer.py 150000   # Phase 3 (150k songs)")
             print(f"  python enhanced-music-importer.py 800000   # Phase 4 (800k songs)")
+            print(f"  python enhanced-music-importer.py 1000000 --dump recording.tar.xz   # local dump, no API")
+            print(f"  python enhanced-music-importer.py --replay archive                  # rebuild from IMPORT_ARCHIVE")
             return
     
     per_genre = max(1, target_songs // len(all_genres))
@@ -647,13 +972,20 @@ def main():
     print(f"  Target total: {target_songs:,} songs")
     print(f"  Per genre: ~{per_genre:,} songs")
     print(f"  Threading: ❌ Disabled (sequential mode)")
+    if dump_path:
+        print(f"  Source: local dump {dump_path} (no API calls, no AcousticBrainz step)")
+    if replay_dir:
+        print(f"  Source: response archive {replay_dir} (no API calls)")
+    elif ARCHIVE_DIR:
+        print(f"  Archiving raw responses to: {ARCHIVE_DIR}")
     
     # Calculate time estimate
     mb_time_hours = (per_genre / 100 * len(all_genres) * 0.3) / 3600
     ab_time_hours = (target_songs * 0.1) / 3600
     total_hours = mb_time_hours + ab_time_hours
     
-    print(f"  Estimated time: {total_hours:.1f} hours (~{total_hours/24:.2f} days)")
+    if not dump_path and not replay_dir:
+        print(f"  Estimated time: {total_hours:.1f} hours (~{total_hours/24:.2f} days)")
     print()
     print("PHASED IMPORT SCHEDULE:")
     print("  Phase 1: python enhanced-music-importer.py 10000     (~0.3 hours)")
@@ -666,35 +998,99 @@ def main():
     use_threading = False
     max_workers = 10
     
+    # Per-stage counters/latencies: JSON snapshot (IMPORT_METRICS_FILE) and optional
+    # Prometheus endpoint (IMPORT_METRICS_PORT); see import_metrics.py
+    metrics = ImportMetrics().start()
+    metrics.set_gauge('target_songs', target_songs)
+    
     importer = EnhancedMusicImporter(
         "enhanced_music.db", 
         use_threading=use_threading,
-        max_workers=max_workers
+        max_workers=max_workers,
+        metrics=metrics,
+        target_songs=target_songs,
+        archive=None if replay_dir else ARCHIVE_DIR,  # never append to the archive being replayed
     )
     
     try:
         start_time = time.time()
         
-        # Step 1: Import from MusicBrainz
-        songs = importer.import_from_musicbrainz(genres=all_genres, per_genre=per_genre)
-        print(f"\n✅ Step 1 Complete: Fetched {len(songs)} songs from MusicBrainz")
+        if replay_dir:
+            # Steps 1-3 from archived responses: parsed again, nothing fetched
+            stored = importer.import_from_archive(replay_dir)
+            print(f"✅ Steps 1-3 Complete: Replayed {stored:,} songs from {replay_dir}")
+        elif dump_path:
+            # Steps 1-3 from disk: filter, map and bulk-load in one streaming pass.
+            # Per-song AcousticBrainz lookups would put the API back on the critical
+            # path, so dump loads leave audio features to a separate enrichment run.
+            stored = importer.import_from_dump(dump_path, genres=all_genres, per_genre=per_genre)
+            print(f"✅ Steps 1-3 Complete: Loaded {stored:,} songs from {dump_path}")
+        else:
+            # Step 1: Import from MusicBrainz, with a page budget planned from per-tag counts
+            plan = importer.plan_musicbrainz(all_genres, target_songs) if USE_PLANNER else None
+            songs = importer.import_from_musicbrainz(genres=all_genres, per_genre=per_genre, plan=plan)
+            print(f"\n✅ Step 1 Complete: Fetched {len(songs)} songs from MusicBrainz")
+            
+            # Step 2: Enrich with AcousticBrainz features (with error handling)
+            try:
+                songs = importer.enrich_with_acousticbrainz(songs)
+                print(f"✅ Step 2 Complete: Enriched songs with audio features")
+            except Exception as e:
+                print(f"⚠️  Step 2 Warning: Enrichment encountered an issue, but continuing with what we have")
+                print(f"   Error: {str(e)[:100]}")
+                # Don't fail - just use the songs as-is
+            
+            # Step 3: Store in database (CRITICAL - MUST HAPPEN)
+            print(f"\n🔄 Step 3: Storing {len(songs)} songs to database...")
+            stored = importer.store_songs(songs)
+            print(f"✅ Step 3 Complete: Stored {stored} songs")
         
-        # Step 2: Enrich with AcousticBrainz features (with error handling)
+        # Step 3b: Artist tags/popularity/similar artists, one lookup per artist
         try:
-            songs = importer.enrich_with_acousticbrainz(songs)
-            print(f"✅ Step 2 Complete: Enriched songs with audio features")
+            importer.enrich_artists()
         except Exception as e:
-            print(f"⚠️  Step 2 Warning: Enrichment encountered an issue, but continuing with what we have")
-            print(f"   Error: {str(e)[:100]}")
-            # Don't fail - just use the songs as-is
+            print(f"⚠️  Artist enrichment failed, continuing without it: {str(e)[:100]}")
+        
+        # Step 3c: Mood labels from audio features, for songs that have none yet
+        metrics.set_stage('moods')
+        importer.progress.start_stage('moods')
+        with metrics.timer('stage_seconds', stage='moods'):
+            result = tag_moods(importer.conn)
+        print(f"✅ Moods: tagged {result['tagged']:,} of {result['scanned']:,} songs with features in {result['seconds']:.1f}s")
+        
+        # Step 3d: Per-artist totals/genres/popularity, recomputed only for changed artists
+        metrics.set_stage('artist_aggregates')
+        importer.progress.start_stage('artist_aggregates')
+        with metrics.timer('stage_seconds', stage='artist_aggregates'):
+            result = aggregate_artists(importer.conn)
+        print(f"✅ Artist aggregates ({result['mode']}): {result['artists']:,} artists in {result['seconds']:.1f}s")
         
-        # Step 3: Store in database (CRITICAL - MUST HAPPEN)
-        print(f"\n🔄 Step 3: Storing {len(songs)} songs to database...")
-        stored = importer.store_songs(songs)
-        print(f"✅ Step 3 Complete: Stored {stored} songs")
+        # Step 3e: OpenL3 vectors from audio_features.db for seed ("more like this") scoring
+        result = sync_song_embeddings(importer.conn)
+        if result is not None:
+            print(f"✅ Embeddings: {result['updated']:,} songs updated, {result['cleared']:,} cleared, from "
+                  f"{result['mbid'] + result['name']:,} linked songs ({result['unmatched']:,} audio files unmatched)")
         
-        # Step 4: Verify
+        # Step 4: Refresh the key/BPM compatibility index for harmonic-mixing queries
+        metrics.set_stage('harmonic_index')
+        importer.progress.start_stage('harmonic_index')
+        with metrics.timer('stage_seconds', stage='harmonic_index'):
+            indexed = build_harmonic_index(importer.conn)
+        print(f"✅ Step 4 Complete: Harmonic index covers {indexed:,} songs")
+        
+        # Step 5: Verify
+        metrics.set_stage('verify')
+        importer.progress.start_stage('verify')
         stats = importer.verify_import()
+        importer.progress.finish()
+        
+        # Step 6: Swap the finished phase in for readers
+        importer.publish()
+        
+        # Step 7: Known-artist names for QueryAnalyzer, next to the published DB
+        path = gazetteer_path(importer.publish_path)
+        print(f"✅ Artist gazetteer: {build_gazetteer(importer.conn, path):,} names -> {path}")
+        metrics.set_stage('done')
         
         elapsed = time.time() - start_time
         hours = elapsed / 3600
@@ -706,9 +1102,8 @@ def main():
         print(f"   Average rate: {stats['total'] / hours:.0f} songs/hour")
         
         # Calculate storage
-        import os
-        if os.path.exists("enhanced_music.db"):
-            db_size_mb = os.path.getsize("enhanced_music.db") / (1024 * 1024)
+        if os.path.exists(importer.publish_path):
+            db_size_mb = os.path.getsize(importer.publish_path) / (1024 * 1024)
             print(f"   Database size: {db_size_mb:.1f} MB")
         
         # Show next step
@@ -738,11 +1133,15 @@ def main():
             try:
                 importer.conn.commit()
                 print(f"✅ Database committed")
+                importer.progress.finish('failed')
             except:
                 pass
     
     finally:
+        if importer.progress.row['status'] == 'running':
+            importer.progress.finish('interrupted')  # e.g. Ctrl+C
         importer.close()
+        metrics.stop()
 
 
 if __name__ == "__main__":
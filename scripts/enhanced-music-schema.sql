@@ -18,7 +18,8 @@ CREATE TABLE IF NOT EXISTS songs (
   
   -- Audio Features (Spotify/AcousticBrainz)
   bpm REAL,                        -- Beats per minute
-  key TEXT,                        -- Musical key (C, Cm, C#, etc)
+  key TEXT,                        -- Musical key with mode ('C major', 'A minor')
+  camelot TEXT,                    -- Camelot code ('8B', '8A'); see scripts/harmonic.py
   energy REAL,                     -- 0-1 (intensity and activity)
   danceability REAL,               -- 0-1 (rhythmic regularity)
   acousticness REAL,               -- 0-1 (acoustic vs electronic)
@@ -38,12 +39,16 @@ CREATE TABLE IF NOT EXISTS songs (
   remixes TEXT,                    -- JSON array of remix titles
   
   -- Embeddings (optional, for semantic search)
-  embedding TEXT,                  -- JSON array (384-dim vector from text embedding)
+  embedding BLOB,                  -- float16 little-endian vector (see scripts/embedding_store.py)
   
   -- Metadata
   source TEXT,                     -- "musicbrainz", "spotify", "lastfm"
   last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   
+  -- Search keys, written with title/artist (see scripts/text_normalize.py)
+  title_norm TEXT,                 -- 'blinding lights'
+  artist_norm TEXT,                -- 'weeknd' (casefolded, accents, punctuation and leading "the" removed)
+  
   -- Indexes for fast queries
   FOREIGN KEY (artist) REFERENCES artists(name)
 );
@@ -56,6 +61,8 @@ CREATE INDEX IF NOT EXISTS idx_tags ON songs(tags);
 -- Index for artist queries: "justin bieber"
 CREATE INDEX IF NOT EXISTS idx_artist ON songs(artist);
 CREATE INDEX IF NOT EXISTS idx_title ON songs(title);
+CREATE INDEX IF NOT EXISTS idx_songs_title_norm ON songs(title_norm);
+CREATE INDEX IF NOT EXISTS idx_songs_artist_norm ON songs(artist_norm);
 
 -- Index for audio feature queries
 CREATE INDEX IF NOT EXISTS idx_bpm ON songs(bpm);
@@ -78,6 +85,33 @@ CREATE TABLE IF NOT EXISTS artists (
   last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Key/BPM buckets for harmonic mixing: BPM folded into one octave so
+-- half/double-time tracks share a band (maintained by scripts/harmonic.py)
+CREATE TABLE IF NOT EXISTS harmonic_index (
+  camelot TEXT NOT NULL,
+  bpm_band INTEGER NOT NULL,
+  song_id TEXT NOT NULL,
+  bpm REAL,
+  PRIMARY KEY (camelot, bpm_band, song_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_harmonic_song ON harmonic_index(song_id);
+
+-- Coverage statistics, kept current by triggers installed by scripts/song_stats.py
+CREATE TABLE IF NOT EXISTS song_stats (
+  name TEXT PRIMARY KEY,          -- "total", "bpm_sum", "unique_artists" or a songs column (non-null count)
+  value NUMERIC NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS genre_counts (
+  genre TEXT PRIMARY KEY,
+  songs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artist_counts (
+  artist TEXT PRIMARY KEY,
+  songs INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_genre_counts_songs ON genre_counts(songs DESC);
+CREATE INDEX IF NOT EXISTS idx_artist_counts_songs ON artist_counts(songs DESC);
+
 -- Create artist index
 CREATE INDEX IF NOT EXISTS idx_artist_name ON artists(name);
 
@@ -3,7 +3,8 @@
 scripts/extract_audio_features.py
 
 Batch-extract audio features and embeddings for local audio files.
-Saves scalar features to a local SQLite DB (dev) and embeddings to a FAISS index.
+Saves scalar features to a local SQLite DB (dev) and embeddings to a FAISS index
+keyed by features.id (IndexIDMap2).
 
 Behavior:
 - Looks for audio files under `audio/` relative to repo root.
@@ -17,33 +18,21 @@ Notes:
 import os
 import sys
 from pathlib import Path
-import sqlite3
-import os
-import uuid
 try:
     import psycopg2
     from pgvector.psycopg2 import register_vector
-    from pgvector import Vector
 except Exception:
     psycopg2 = None
     register_vector = None
-    Vector = None
 import numpy as np
 from tqdm import tqdm
 
-# Optional imports; script will print a helpful message if missing
-try:
-    import librosa
-except Exception:
-    print("Missing dependency: librosa. Install with: pip install librosa")
-    sys.exit(1)
-
-try:
-    import openl3
-except Exception:
-    print("Missing dependency: openl3. Install with: pip install openl3")
-    sys.exit(1)
+from feature_writer import FeatureWriter, open_features_db
+from audio_features import ALL_FEATURES, EMBED_DIM, AudioDecodeError, FeatureCache, extract
+from pg_bulk_loader import PgFeatureBulkLoader
 
+# librosa and openl3 are imported by audio_features.py when a file actually needs
+# decoding or an embedding, so re-runs over cached files work without them
 try:
     import faiss
 except Exception:
@@ -54,9 +43,8 @@ except Exception:
 AUDIO_DIR = Path(__file__).resolve().parents[1] / "audio"
 DB_PATH = Path(__file__).resolve().parents[1] / "audio_features.db"
 FAISS_INDEX_PATH = Path(__file__).resolve().parents[1] / "openl3.index"
-FAISS_MAP_PATH = Path(__file__).resolve().parents[1] / "faiss_id_map.txt"
-SAMPLE_RATE = 48000
-EMBED_DIM = 512  # using openl3 embedding_size=512
+FAISS_MAP_PATH = Path(__file__).resolve().parents[1] / "faiss_id_map.txt"  # legacy positional map, migrated on load
+FEATURE_BATCH_SIZE = int(os.getenv('FEATURE_BATCH_SIZE', '100'))  # SQLite rows per transaction
 
 # Ensure audio dir exists
 if not AUDIO_DIR.exists():
@@ -64,29 +52,16 @@ if not AUDIO_DIR.exists():
     sys.exit(0)
 
 # SQLite setup (dev fallback)
-conn = sqlite3.connect(str(DB_PATH))
+conn = open_features_db(DB_PATH)
 c = conn.cursor()
-c.execute(
-    """
-    CREATE TABLE IF NOT EXISTS features (
-        id INTEGER PRIMARY KEY,
-        filename TEXT UNIQUE,
-        duration REAL,
-        bpm REAL,
-        key TEXT,
-        energy REAL,
-        danceability REAL,
-        rhythm_strength REAL,
-        spectral_centroid REAL,
-        processed_at TEXT
-    )
-    """
-)
-conn.commit()
+FEATURE_CACHE = FeatureCache(conn)
 
 # Postgres (production) setup when DATABASE_URL provided
 PG_CONN = None
 PG_CUR = None
+PG_LOADER = None
+PG_BATCH_SIZE = int(os.getenv('PG_BATCH_SIZE', '500'))
+PG_VECTOR_INDEX = os.getenv('PG_VECTOR_INDEX', 'hnsw')  # hnsw | ivfflat | none
 DATABASE_URL = os.getenv('DATABASE_URL')
 if DATABASE_URL and psycopg2 is not None:
     PG_CONN = psycopg2.connect(DATABASE_URL)
@@ -106,11 +81,12 @@ if DATABASE_URL and psycopg2 is not None:
             danceability REAL,
             rhythm_strength REAL,
             spectral_centroid REAL,
-            embedding_base64 TEXT,
             created_at TIMESTAMP DEFAULT now()
         )
         """
     )
+    # Vectors live only in audio_vectors; an older embedding_base64 column is left alone
+    # (nothing writes it) until `embedding_store.py drop-pg-base64` removes it
     PG_CUR.execute(
         """
         CREATE TABLE IF NOT EXISTS audio_vectors (
@@ -120,12 +96,41 @@ if DATABASE_URL and psycopg2 is not None:
         """ % EMBED_DIM
     )
     PG_CONN.commit()
+    PG_LOADER = PgFeatureBulkLoader(PG_CONN, embed_dim=EMBED_DIM, batch_size=PG_BATCH_SIZE)
 elif DATABASE_URL and psycopg2 is None:
     print("DATABASE_URL provided but psycopg2/pgvector Python packages are missing. Install psycopg2-binary and pgvector to enable Postgres ingestion.")
 
-# Load or create FAISS index
+# Load or create FAISS index.
+# Vectors are keyed by features.id through an IndexIDMap2, so the SQLite
+# features table is the id -> file mapping and rows can be updated/removed.
 index = None
-id_map = []
+indexed_ids = set()
+
+
+def _new_index():
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(EMBED_DIM))  # inner-product index on normalized vectors
+
+
+def _migrate_positional_index(flat):
+    """Re-key a legacy positional index (row i <-> line i of faiss_id_map.txt) by features.id"""
+    migrated = _new_index()
+    if not FAISS_MAP_PATH.exists() or flat.ntotal == 0:
+        return migrated
+    with open(FAISS_MAP_PATH, "r", encoding="utf-8") as f:
+        paths = [l.strip() for l in f if l.strip()]
+    ids_by_file = {fn: fid for fn, fid in c.execute("SELECT filename, id FROM features")}
+    latest = {}
+    for row, path in enumerate(paths[:flat.ntotal]):
+        if path in ids_by_file:
+            latest[ids_by_file[path]] = row  # duplicates: the last appended vector wins
+    if latest:
+        rows = np.fromiter(latest.values(), dtype='int64')
+        ids = np.fromiter(latest.keys(), dtype='int64')
+        vectors = np.vstack([flat.reconstruct(int(r)) for r in rows]).astype('float32')
+        migrated.add_with_ids(vectors, ids)
+    print(f"Migrated {migrated.ntotal} vectors from positional {FAISS_MAP_PATH.name} to features.id keys.")
+    return migrated
+
 
 if faiss is not None:
     if FAISS_INDEX_PATH.exists():
@@ -137,84 +142,49 @@ if faiss is not None:
             print("Failed to load existing FAISS index, creating a new one.", e)
             index = None
 
+    if index is not None and not isinstance(index, faiss.IndexIDMap2):
+        index = _migrate_positional_index(index)
+
     if index is None:
-        index = faiss.IndexFlatIP(EMBED_DIM)  # inner-product index on normalized vectors
+        index = _new_index()
 
-    if FAISS_MAP_PATH.exists():
-        with open(FAISS_MAP_PATH, "r", encoding="utf-8") as f:
-            id_map = [l.strip() for l in f if l.strip()]
+    indexed_ids = set(faiss.vector_to_array(index.id_map).tolist())
 else:
     index = None
 
 
-def estimate_key(y, sr):
-    # Simple chroma-based estimation (very approximate)
-    chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-    chroma_mean = chroma.mean(axis=1)
-    pitch_class = int(np.argmax(chroma_mean))
-    NOTES = ['C','C#','D','D#','E','F','F#','G','G#','A','A#','B']
-    note = NOTES[pitch_class]
-    return note
+def _index_unchanged(feature_id, emb):
+    """True when the index already holds exactly this vector for feature_id"""
+    if feature_id not in indexed_ids:
+        return False
+    return np.array_equal(index.reconstruct(int(feature_id)), emb)
 
 
-def compute_danceability(bpm, beat_strength, energy):
-    # Simple heuristic combining bpm, beat strength and energy
-    if bpm is None:
-        bpm_factor = 0.5
-    else:
-        bpm_clamped = min(max(bpm, 60), 180)
-        bpm_factor = (bpm_clamped - 60) / (180 - 60)
-    score = 0.4 * bpm_factor + 0.4 * beat_strength + 0.2 * energy
-    return float(max(0.0, min(1.0, score)))
+def flush_index(pending):
+    """Apply buffered {features.id: vector} updates: one remove_ids for replaced ids, one add_with_ids"""
+    if index is None or not pending:
+        return
+    ids = np.fromiter(pending.keys(), dtype='int64', count=len(pending))
+    replaced = np.array([i for i in pending if i in indexed_ids], dtype='int64')
+    try:
+        if replaced.size:
+            # remove_ids scans and compacts the whole flat index, so it runs once per batch
+            index.remove_ids(replaced)
+        index.add_with_ids(np.vstack(list(pending.values())), ids)
+        indexed_ids.update(pending)
+    except Exception as e:
+        print(f"Failed to add {len(pending)} embeddings to FAISS: {e}")
+    pending.clear()
 
 
 def process_file(path):
+    # Cached features are reused; audio is only decoded for what changed
     try:
-        y, sr = librosa.load(path, sr=SAMPLE_RATE, mono=True)
-    except Exception as exc:
+        meta, _ = extract(path, FEATURE_CACHE, names=ALL_FEATURES)
+    except AudioDecodeError as exc:
         print(f"Failed to load {path}: {exc}")
         return None
-
-    duration = librosa.get_duration(y=y, sr=sr)
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    try:
-        tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sr)
-        bpm = float(tempo[0]) if tempo.size else None
-    except Exception:
-        bpm = None
-
-    beat_strength = float(onset_env.mean()) if onset_env.size else 0.0
-    rms = librosa.feature.rms(y=y)
-    energy = float(np.mean(rms))
-    spec_cent = float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
-    key = estimate_key(y, sr)
-
-    # OpenL3 embedding (average over frames)
-    try:
-        emb, ts = openl3.get_audio_embedding(y, sr, input_repr="mel256", content_type="music", embedding_size=EMBED_DIM)
-        emb_mean = np.mean(emb, axis=0)
-        # normalize
-        norm = np.linalg.norm(emb_mean)
-        if norm > 0:
-            emb_norm = (emb_mean / norm).astype('float32')
-        else:
-            emb_norm = emb_mean.astype('float32')
-    except Exception as e:
-        print(f"openl3 failed for {path}: {e}")
-        emb_norm = None
-
-    danceability = compute_danceability(bpm, beat_strength, energy)
-
-    return {
-        "duration": duration,
-        "bpm": bpm,
-        "key": key,
-        "energy": energy,
-        "danceability": danceability,
-        "rhythm_strength": beat_strength,
-        "spectral_centroid": spec_cent,
-        "embedding": emb_norm,
-    }
+    return meta
 
 
 def main():
@@ -225,64 +195,70 @@ def main():
 
     print(f"Found {len(files)} files. Processing...")
 
-    for file in tqdm(files):
-        meta = process_file(str(file))
-        if meta is None:
-            continue
+    interrupted = False
+    pending = {}  # features.id -> new or changed vector, applied to FAISS per batch
+    with FeatureWriter(conn, batch_size=FEATURE_BATCH_SIZE) as writer:
+        try:
+            for file in tqdm(files):
+                meta = process_file(str(file))
+                if meta is None:
+                    continue
+
+                # Upsert scalar features into local SQLite (dev); committed per batch
+                feature_id = writer.upsert(str(file), meta)
+
+                # Queue for FAISS (dev index) unless it already holds this exact vector
+                if index is not None and meta.get('embedding') is not None:
+                    emb = np.asarray(meta['embedding'], dtype='float32').reshape(-1)
+                    if not _index_unchanged(feature_id, emb):
+                        pending[feature_id] = emb
+                        if len(pending) >= FEATURE_BATCH_SIZE:
+                            flush_index(pending)
+
+                # If Postgres is configured, buffer scalars + vectors for the bulk loader
+                if PG_LOADER is not None and meta.get('embedding') is not None:
+                    try:
+                        PG_LOADER.add(str(file), meta)
+                    except Exception as e:
+                        print(f"Failed to write batch to Postgres: {e}")
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\nInterrupted — flushing processed results before exit...")
+
+        flush_index(pending)
+
+        # Drop rows and vectors for files that have been removed from the audio folder
+        if not interrupted:
+            on_disk = {str(p) for p in files}
+            stale = [fid for fid, fn in c.execute("SELECT id, filename FROM features") if fn.startswith(str(AUDIO_DIR)) and fn not in on_disk]
+            if stale:
+                writer.delete(stale)
+                if index is not None:
+                    index.remove_ids(np.array(stale, dtype='int64'))
+                    indexed_ids.difference_update(stale)
+                print(f"Removed {len(stale)} entries for files no longer on disk.")
+
+    print(f"SQLite rows written: {writer.written}")
+
+    if PG_LOADER is not None:
+        try:
+            if interrupted:
+                PG_LOADER.flush()
+            else:
+                PG_LOADER.finish(PG_VECTOR_INDEX)
+            print(f"Postgres load complete. Rows written: {PG_LOADER.loaded}")
+            for filename, error in PG_LOADER.failed:
+                print(f"Postgres rejected {filename}: {error}")
+        except Exception as e:
+            print(f"Failed to finish Postgres load: {e}")
 
-        # Upsert scalar features into local SQLite (dev)
-        c.execute(
-            "INSERT OR REPLACE INTO features (filename, duration, bpm, key, energy, danceability, rhythm_strength, spectral_centroid, processed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
-            (str(file), meta['duration'], meta['bpm'], meta['key'], meta['energy'], meta['danceability'], meta['rhythm_strength'], meta['spectral_centroid'])
-        )
-        conn.commit()
-
-        # Add to FAISS (dev index)
-        if index is not None and meta.get('embedding') is not None:
-            emb = meta['embedding'].reshape(1, -1).astype('float32')
-            try:
-                index.add(emb)
-                id_map.append(str(file))
-            except Exception as e:
-                print(f"Failed to add embedding for {file} to FAISS: {e}")
-
-        # If Postgres is configured, write scalars + vectors to Postgres/pgvector
-        if PG_CUR is not None and meta.get('embedding') is not None:
-            rec_id = str(uuid.uuid4())
-            # store base64 embedding as fallback
-            try:
-                import base64
-                emb_bytes = meta['embedding'].tobytes()
-                emb_b64 = base64.b64encode(emb_bytes).decode('ascii')
-            except Exception:
-                emb_b64 = None
-
-            try:
-                PG_CUR.execute(
-                    "INSERT INTO audio_features (id, filename, duration, bpm, key, energy, danceability, rhythm_strength, spectral_centroid, embedding_base64) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (filename) DO UPDATE SET duration = EXCLUDED.duration, bpm = EXCLUDED.bpm, key = EXCLUDED.key, energy = EXCLUDED.energy, danceability = EXCLUDED.danceability, rhythm_strength = EXCLUDED.rhythm_strength, spectral_centroid = EXCLUDED.spectral_centroid, embedding_base64 = EXCLUDED.embedding_base64",
-                    (rec_id, str(file), meta['duration'], meta['bpm'], meta['key'], meta['energy'], meta['danceability'], meta['rhythm_strength'], meta['spectral_centroid'], emb_b64)
-                )
-                # Insert vector into audio_vectors (upsert)
-                vec = Vector(meta['embedding'].tolist())
-                PG_CUR.execute(
-                    "INSERT INTO audio_vectors (id, embedding) VALUES (%s, %s) ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding",
-                    (rec_id, vec)
-                )
-                PG_CONN.commit()
-            except Exception as e:
-                PG_CONN.rollback()
-                print(f"Failed to write to Postgres for {file}: {e}")
-
-    # Save index and id map when FAISS is available
+    # Save index when FAISS is available (ids live in the features table)
     if index is not None and faiss is not None:
         try:
             faiss.write_index(index, str(FAISS_INDEX_PATH))
-            with open(FAISS_MAP_PATH, 'w', encoding='utf-8') as f:
-                for p in id_map:
-                    f.write(p + "\n")
             print("Indexing complete. Total vectors:", index.ntotal)
         except Exception as e:
-            print("Failed to save FAISS index or id map:", e)
+            print("Failed to save FAISS index:", e)
 
 
 if __name__ == '__main__':
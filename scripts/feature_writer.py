@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+scripts/feature_writer.py
+
+Shared SQLite writer for the audio feature extractors.
+
+Embeddings are stored alongside the scalar features as float16 BLOBs
+(see embedding_store.py).
+
+Upserts are executed as they arrive but committed in batches of
+`batch_size`, with the database in WAL mode, so a run costs one fsync per
+batch instead of one per file. Used as a context manager the writer commits
+whatever is pending on exit, including Ctrl+C and SIGTERM, so no processed
+result is lost when a long extraction is interrupted.
+"""
+import signal
+import sqlite3
+
+from embedding_store import encode_embedding
+
+FEATURES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS features (
+        id INTEGER PRIMARY KEY,
+        filename TEXT UNIQUE,
+        duration REAL,
+        bpm REAL,
+        key TEXT,
+        camelot TEXT,
+        energy REAL,
+        danceability REAL,
+        rhythm_strength REAL,
+        spectral_centroid REAL,
+        processed_at TEXT,
+        embedding BLOB
+    )
+"""
+
+FEATURE_COLUMNS = ('duration', 'bpm', 'key', 'camelot', 'energy', 'danceability', 'rhythm_strength', 'spectral_centroid')
+
+# ON CONFLICT keeps features.id stable across re-runs (the FAISS index is keyed by it).
+# A run without embeddings (the simple extractor) keeps the stored vector.
+UPSERT_SQL = (
+    f"INSERT INTO features (filename, {', '.join(FEATURE_COLUMNS)}, processed_at, embedding) "
+    f"VALUES (?, {', '.join('?' * len(FEATURE_COLUMNS))}, datetime('now'), ?) "
+    f"ON CONFLICT(filename) DO UPDATE SET "
+    + ', '.join(f"{col} = excluded.{col}" for col in FEATURE_COLUMNS + ('processed_at',))
+    + ", embedding = COALESCE(excluded.embedding, features.embedding)"
+)
+
+
+def open_features_db(path):
+    """Open the features DB in WAL mode and make sure the table exists"""
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps the DB consistent; fsync happens at checkpoints
+    conn.execute(FEATURES_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(features)")}
+    for column, decl in (('camelot', 'TEXT'), ('embedding', 'BLOB')):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE features ADD COLUMN {column} {decl}")
+    conn.commit()
+    return conn
+
+
+class FeatureWriter:
+    """Batch feature upserts into transactions of `batch_size` rows"""
+
+    def __init__(self, conn, batch_size=100):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.pending = 0
+        self.written = 0
+        self._previous_sigterm = None
+
+    def upsert(self, filename, meta):
+        """Upsert one file's features and return its stable features.id"""
+        values = [meta.get(col) for col in FEATURE_COLUMNS]
+        self.conn.execute(UPSERT_SQL, [filename] + values + [encode_embedding(meta.get('embedding'))])
+        feature_id = self.conn.execute("SELECT id FROM features WHERE filename = ?", (filename,)).fetchone()[0]
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+        return feature_id
+
+    def delete(self, feature_ids):
+        self.conn.executemany("DELETE FROM features WHERE id = ?", [(fid,) for fid in feature_ids])
+        self.pending += len(feature_ids)
+
+    def flush(self):
+        """Commit the open batch"""
+        if self.pending:
+            self.conn.commit()
+            self.written += self.pending
+            self.pending = 0
+
+    def _on_sigterm(self, signum, frame):
+        # Route SIGTERM through the normal interrupt path so __exit__ commits
+        raise KeyboardInterrupt
+
+    def __enter__(self):
+        try:
+            self._previous_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+        except ValueError:
+            # Not on the main thread; Ctrl+C still unwinds through __exit__
+            self._previous_sigterm = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Rows already executed are complete results, so commit them even when interrupted
+        self.flush()
+        if self._previous_sigterm is not None:
+            signal.signal(signal.SIGTERM, self._previous_sigterm)
+        return False
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+scripts/fetch_planner.py
+
+Count-aware page budget for the MusicBrainz tag searches.
+
+Splitting the target evenly (`target_songs // len(genres)`) wastes requests
+at both ends: tiny tags run out after one page while big tags are cut short,
+and tags that mostly return the same recordings (trap / hip-hop, new wave /
+synth-pop) pay for duplicates. The planner instead:
+
+1. probes every tag once. One search page is one request at 1 req/s whatever
+   its size, so the probe asks for a full 100-row page rather than limit=1:
+   it reads the tag's `count` and doubles as that tag's first page.
+2. estimates each tag's overlap as the share of its first-page MBIDs that also
+   appear in another tag's first page, or are already in the database (when
+   given the importer's KnownMBIDs, see known_mbids.py).
+3. hands out further pages greedily, always to the tag whose next page is
+   expected to add the most new MBIDs (rows left x (1 - overlap)), until the
+   expected unique total reaches the target.
+
+Every tag with results keeps its probe page, so small genres stay covered.
+Near-duplicate genre names (case, spacing, hyphens) are merged before
+probing, so they cost one probe, not two. The first spelling in the list is
+kept, because it becomes the songs' genre: 'IDM' stays 'IDM', as in dump
+and replication loads.
+
+Usage:
+  from fetch_planner import plan_fetch
+  plan = plan_fetch(importer._fetch_page, genres, target_songs)
+  songs = importer.import_from_musicbrainz(plan=plan)
+"""
+import heapq
+import math
+import re
+
+PAGE_SIZE = 100  # MusicBrainz search maximum
+
+
+def normalize_genres(genres):
+    """Collapse spacing and merge names equal up to case, hyphens and 'and'/'&'; the first spelling wins"""
+    seen = {}
+    for genre in genres:
+        name = re.sub(r'\s+', ' ', genre.strip())
+        key = re.sub(r'[\s_-]+', ' ', name.lower()).replace(' and ', ' & ')
+        if name and key not in seen:
+            seen[key] = name
+    return list(seen.values())
+
+
+def _mbids(page):
+    return {rec.get('id') for rec in (page or {}).get('recordings', []) if rec.get('id')}
+
+
+def estimate_overlap(first_pages, known=None):
+    """{genre: share of its first-page MBIDs also returned for some other tag, or already known}"""
+    seen_in = {}
+    for genre, page in first_pages.items():
+        for mbid in _mbids(page):
+            seen_in[mbid] = seen_in.get(mbid, 0) + 1
+    known_ids = set()
+    if known is not None and seen_in:
+        ids = list(seen_in)
+        known_ids = {mbid for mbid, flag in zip(ids, known.known_flags(ids)) if flag}
+    overlap = {}
+    for genre, page in first_pages.items():
+        ids = _mbids(page)
+        repeated = sum(1 for mbid in ids if seen_in[mbid] > 1 or mbid in known_ids)
+        overlap[genre] = repeated / len(ids) if ids else 0.0
+    return overlap
+
+
+def allocate_pages(counts, overlap, target_songs, base_unique=0, page_size=PAGE_SIZE):
+    """
+    {genre: pages} including the probe page. `base_unique` is the number of
+    distinct MBIDs the probe pages already returned.
+    """
+    pages = {genre: 1 if count > 0 else 0 for genre, count in counts.items()}
+    expected = base_unique
+
+    def next_page_value(genre):
+        rows = min(page_size, counts[genre] - pages[genre] * page_size)
+        return rows * (1.0 - overlap.get(genre, 0.0)) if rows > 0 else 0.0
+
+    heap = [(-next_page_value(g), g) for g in pages if pages[g] and next_page_value(g) > 0]
+    heapq.heapify(heap)
+    while heap and expected < target_songs:
+        value, genre = heapq.heappop(heap)
+        pages[genre] += 1
+        expected += -value
+        value = next_page_value(genre)
+        if value > 0:
+            heapq.heappush(heap, (-value, genre))
+    return pages, expected
+
+
+def even_split(counts, overlap, per_genre, base_unique=0, page_size=PAGE_SIZE):
+    """(requests, expected unique) for the old even split, which stops at the first short page"""
+    requests, expected = 0, base_unique
+    for genre, count in counts.items():
+        pages = min(math.ceil(per_genre / page_size), count // page_size + 1)
+        requests += pages
+        rows_after_first = max(0, min(pages * page_size, count) - page_size)
+        expected += rows_after_first * (1.0 - overlap.get(genre, 0.0))
+    return requests, expected
+
+
+class FetchPlan:
+    """Planned pages per genre, with the probe pages to reuse as page one"""
+
+    def __init__(self, first_pages, pages, overlap, expected, base_unique):
+        self.first_pages = first_pages
+        self.pages = pages
+        self.overlap = overlap
+        self.base_unique = base_unique
+        self._expected = expected
+        self.counts = {genre: (page or {}).get('count', 0) for genre, page in first_pages.items()}
+
+    def genres(self):
+        return [genre for genre, pages in self.pages.items() if pages > 0]
+
+    def requests(self):
+        """Requests the plan makes, probes included"""
+        return len(self.first_pages) + sum(max(0, pages - 1) for pages in self.pages.values())
+
+    def expected_unique(self):
+        return self._expected
+
+    def summary(self, target_songs):
+        per_genre = max(1, target_songs // max(len(self.counts), 1))
+        empty = sum(1 for count in self.counts.values() if count == 0)
+        even_requests, even_expected = even_split(self.counts, self.overlap, per_genre, self.base_unique)
+        return (f"{len(self.counts)} tags ({empty} empty), {self.requests():,} requests for "
+                f"~{self._expected:,.0f} unique songs (even split: {even_requests:,} requests for ~{even_expected:,.0f})")
+
+
+def plan_fetch(fetch_page, genres, target_songs, on_probe=None, known=None):
+    """
+    Probe each tag with `fetch_page(genre, offset, limit)` (returns the search
+    JSON with `count` and `recordings`) and allocate pages up to target_songs.
+    `known` (a KnownMBIDs) discounts recordings the database already has.
+    """
+    first_pages = {}
+    for genre in normalize_genres(genres):
+        first_pages[genre] = fetch_page(genre, 0, PAGE_SIZE)
+        if on_probe:
+            on_probe(genre, first_pages[genre])
+
+    overlap = estimate_overlap(first_pages, known)
+    counts = {genre: (page or {}).get('count', 0) for genre, page in first_pages.items()}
+    probed = list(set().union(*(_mbids(page) for page in first_pages.values()))) if first_pages else []
+    base_unique = len(probed) - (sum(known.known_flags(probed)) if known is not None and probed else 0)
+    pages, expected = allocate_pages(counts, overlap, target_songs, base_unique)
+    return FetchPlan(first_pages, pages, overlap, expected, base_unique)
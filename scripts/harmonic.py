@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+scripts/harmonic.py
+
+Musical key handling and a key/BPM compatibility index for harmonic mixing.
+
+- Key estimation from a mean chroma vector (Krumhansl-Kessler profiles),
+  giving a pitch class *and* mode instead of just the loudest pitch class.
+- Conversion between free-text keys ("C#", "Dbm", "A minor", AcousticBrainz
+  key_key/key_scale), Camelot codes ("8A") and Open Key codes ("1m").
+- A `harmonic_index` table bucketing tracks by (Camelot code, BPM band),
+  where BPM is folded into one octave so half/double-time tracks share a
+  band. "Tracks that mix with this one" reads only the compatible buckets:
+  same code, +/-1 on the wheel, and the relative major/minor.
+
+Usage:
+  python scripts/harmonic.py build enhanced_music.db
+  python scripts/harmonic.py mix enhanced_music.db <song id> [--limit 20]
+  python scripts/harmonic.py build audio_features.db --table features
+"""
+import argparse
+import math
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from db_publish import prepare_staging, publish
+
+NOTES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLATS = {'DB': 1, 'EB': 3, 'FB': 4, 'GB': 6, 'AB': 8, 'BB': 10, 'CB': 11}
+
+# Krumhansl-Kessler key profiles, index 0 = tonic
+MAJOR_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+MINOR_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+
+# BPMs are folded into [BPM_FOLD_LOW, 2*BPM_FOLD_LOW) so half/double time land together
+BPM_FOLD_LOW = 80.0
+BPM_BAND_WIDTH = 4.0
+
+CAMELOT_RE = re.compile(r'^(1[0-2]|[1-9])([AB])$', re.IGNORECASE)
+OPEN_KEY_RE = re.compile(r'^(1[0-2]|[1-9])([DM])$', re.IGNORECASE)
+KEY_RE = re.compile(r'^([A-G])\s*([#B♯♭]?)\s*(MAJOR|MINOR|MAJ|MIN|M)?$', re.IGNORECASE)
+
+
+def estimate_key_from_chroma(chroma_mean):
+    """Best-correlated (pitch_class, mode) for a 12-bin mean chroma vector"""
+    import numpy as np
+
+    chroma = np.asarray(chroma_mean, dtype=float)
+    best = (0, 'major', -math.inf)
+    for mode, profile in (('major', MAJOR_PROFILE), ('minor', MINOR_PROFILE)):
+        for tonic in range(12):
+            corr = np.corrcoef(chroma, np.roll(profile, tonic))[0, 1]
+            if np.isfinite(corr) and corr > best[2]:
+                best = (tonic, mode, corr)
+    return best[0], best[1]
+
+
+def key_label(pitch_class, mode):
+    """(9, 'minor') -> 'A minor'"""
+    return f"{NOTES[pitch_class % 12]} {mode}"
+
+
+def camelot_code(pitch_class, mode):
+    """(0, 'major') -> '8B', (9, 'minor') -> '8A'"""
+    if mode == 'minor':
+        # A minor shares its wheel number with its relative major, C
+        return f"{((7 * ((pitch_class + 3) % 12)) % 12 + 7) % 12 + 1}A"
+    return f"{((7 * (pitch_class % 12)) % 12 + 7) % 12 + 1}B"
+
+
+def open_key_code(camelot):
+    """'8B' -> '1d', '8A' -> '1m'"""
+    number, letter = int(camelot[:-1]), camelot[-1].upper()
+    return f"{(number - 8) % 12 + 1}{'d' if letter == 'B' else 'm'}"
+
+
+def _from_camelot(number, letter):
+    """Camelot code -> (pitch_class, mode)"""
+    # Invert camelot_code: number = 7*pc + 7 (mod 12) + 1, and 7 is its own inverse mod 12
+    major_pc = (7 * (number - 8)) % 12
+    if letter.upper() == 'B':
+        return major_pc, 'major'
+    return (major_pc - 3) % 12, 'minor'
+
+
+def parse_key(text, scale=None):
+    """
+    Parse free-text keys into (pitch_class, mode), or None.
+    Accepts 'C', 'C#m', 'Dbm', 'A minor', 'F# maj', Camelot ('8A') and
+    Open Key ('1m'). `scale` ('major'/'minor', as in AcousticBrainz
+    key_scale) overrides the mode. A bare note is taken as major.
+    """
+    if not text:
+        return None
+    value = str(text).strip().replace('♯', '#').replace('♭', 'b')
+    match = CAMELOT_RE.match(value)
+    if match:
+        return _from_camelot(int(match.group(1)), match.group(2))
+    match = OPEN_KEY_RE.match(value)
+    if match:
+        number = (int(match.group(1)) + 6) % 12 + 1  # Open Key 1 == Camelot 8
+        return _from_camelot(number, 'B' if match.group(2).upper() == 'D' else 'A')
+
+    match = KEY_RE.match(value)
+    if not match:
+        return None
+    letter, accidental, quality = match.group(1).upper(), match.group(2), match.group(3)
+    if accidental == '#':
+        pitch_class = (NOTES.index(letter) + 1) % 12
+    elif accidental.lower() == 'b':
+        pitch_class = FLATS.get(letter + 'B', (NOTES.index(letter) - 1) % 12)
+    else:
+        pitch_class = NOTES.index(letter)
+
+    mode = 'major'
+    if quality:
+        # A lone 'm' means minor; 'M' conventionally means major
+        if quality.lower() in ('minor', 'min') or quality == 'm':
+            mode = 'minor'
+    if scale:
+        mode = 'minor' if str(scale).lower().startswith('min') else 'major'
+    return pitch_class, mode
+
+
+def to_camelot(text, scale=None):
+    """Free-text key -> Camelot code, or None"""
+    parsed = parse_key(text, scale)
+    return camelot_code(*parsed) if parsed else None
+
+
+def compatible_codes(camelot):
+    """Same code, one step either way on the wheel, and the relative major/minor"""
+    number, letter = int(camelot[:-1]), camelot[-1].upper()
+    other = 'A' if letter == 'B' else 'B'
+    return [
+        f"{number}{letter}",
+        f"{(number % 12) + 1}{letter}",
+        f"{((number - 2) % 12) + 1}{letter}",
+        f"{number}{other}",
+    ]
+
+
+def fold_bpm(bpm):
+    """Fold half/double-time into one octave: 70 -> 140, 174 -> 87 (None for missing, NaN, inf or <= 0)"""
+    if not bpm or not math.isfinite(bpm) or bpm <= 0:
+        return None
+    while bpm < BPM_FOLD_LOW:
+        bpm *= 2
+    while bpm >= 2 * BPM_FOLD_LOW:
+        bpm /= 2
+    return bpm
+
+
+def bpm_band(bpm):
+    folded = fold_bpm(bpm)
+    return None if folded is None else int(folded // BPM_BAND_WIDTH)
+
+
+def _neighbour_bands(band, tolerance):
+    """Bands within `tolerance`, wrapping across the octave fold"""
+    lowest = int(BPM_FOLD_LOW // BPM_BAND_WIDTH)
+    count = int(BPM_FOLD_LOW // BPM_BAND_WIDTH)  # bands per octave
+    return sorted({lowest + (band - lowest + d) % count for d in range(-tolerance, tolerance + 1)})
+
+
+def ensure_harmonic_index(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS harmonic_index (
+            camelot TEXT NOT NULL,
+            bpm_band INTEGER NOT NULL,
+            song_id TEXT NOT NULL,
+            bpm REAL,
+            PRIMARY KEY (camelot, bpm_band, song_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_harmonic_song ON harmonic_index(song_id);
+    """)
+
+
+def build_harmonic_index(conn, table='songs', id_column='id'):
+    """Rebuild harmonic_index from `table` (key, bpm). Returns rows indexed."""
+    ensure_harmonic_index(conn)
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    key_expr = "COALESCE(camelot, key)" if 'camelot' in columns else "key"
+
+    rows = []
+    for song_id, key, bpm in conn.execute(
+        f"SELECT {id_column}, {key_expr}, bpm FROM {table} WHERE key IS NOT NULL AND bpm IS NOT NULL"
+    ):
+        code = to_camelot(key)
+        band = bpm_band(bpm)
+        if code and band is not None:
+            rows.append((code, band, str(song_id), bpm))
+
+    conn.execute("DELETE FROM harmonic_index")
+    conn.executemany("INSERT OR REPLACE INTO harmonic_index (camelot, bpm_band, song_id, bpm) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    return len(rows)
+
+
+def compatible_tracks(conn, camelot, bpm, bpm_tolerance=1, limit=50, exclude_id=None):
+    """
+    Tracks that mix with (camelot, bpm): reads only the compatible buckets.
+    Returns [(song_id, camelot, bpm), ...] ordered by BPM distance.
+    """
+    band = bpm_band(bpm)
+    if band is None or not camelot:
+        return []
+    buckets = [(code, b) for code in compatible_codes(camelot) for b in _neighbour_bands(band, bpm_tolerance)]
+    clause = ' OR '.join(['(camelot = ? AND bpm_band = ?)'] * len(buckets))
+    params = [v for bucket in buckets for v in bucket]
+    rows = conn.execute(f"SELECT song_id, camelot, bpm FROM harmonic_index WHERE {clause}", params).fetchall()
+
+    target = fold_bpm(bpm)
+    results = [r for r in rows if r[0] != (str(exclude_id) if exclude_id is not None else None)]
+    results.sort(key=lambda r: (r[1] != camelot, abs(fold_bpm(r[2]) - target)))
+    return results[:limit]
+
+
+def tracks_that_mix_with(conn, song_id, bpm_tolerance=1, limit=50):
+    """Compatible tracks for an indexed song"""
+    row = conn.execute("SELECT camelot, bpm FROM harmonic_index WHERE song_id = ?", (str(song_id),)).fetchone()
+    if row is None:
+        return []
+    return compatible_tracks(conn, row[0], row[1], bpm_tolerance=bpm_tolerance, limit=limit, exclude_id=song_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Key/BPM compatibility index for harmonic mixing")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="(re)build harmonic_index")
+    p_build.add_argument('db')
+    p_build.add_argument('--table', default='songs', help="songs (enhanced_music.db) or features (audio_features.db)")
+
+    p_mix = sub.add_parser('mix', help="tracks that mix with a song")
+    p_mix.add_argument('db')
+    p_mix.add_argument('song_id')
+    p_mix.add_argument('--limit', type=int, default=20)
+    p_mix.add_argument('--tolerance', type=int, default=1, help="BPM bands either side")
+
+    args = parser.parse_args()
+    if not Path(args.db).exists():
+        print(f"Database not found at {args.db}")
+        sys.exit(1)
+
+    if args.command == 'build' and args.table == 'songs':
+        # enhanced_music.db is rebuilt in staging and published, like the importer does
+        staging = prepare_staging(args.db)
+        conn = sqlite3.connect(str(staging))
+        try:
+            count = build_harmonic_index(conn, table=args.table)
+            print(f"✅ Indexed {count:,} tracks by (Camelot key, BPM band)")
+            result = publish(conn, args.db)
+            print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+        finally:
+            conn.close()
+        return
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'build':
+            count = build_harmonic_index(conn, table=args.table)
+            print(f"✅ Indexed {count:,} tracks by (Camelot key, BPM band)")
+        else:
+            ensure_harmonic_index(conn)
+            results = tracks_that_mix_with(conn, args.song_id, bpm_tolerance=args.tolerance, limit=args.limit)
+            if not results:
+                print("No compatible tracks (is the song indexed? run 'build' first)")
+            for song_id, code, bpm in results:
+                print(f"  {code:>3} ({open_key_code(code):>3})  {bpm:6.1f} BPM  {song_id}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scripts/import_dashboard.py
+
+Live import dashboard: one screen, refreshed in place.
+
+Reads only cheap sources, so it can poll every second:
+- the `import_progress` row in enhanced_music.db, or in its staging DB while
+  an import writes there (see import_progress.py, db_publish.py)
+- the importer's metrics snapshot, import_metrics.json (see import_metrics.py)
+
+Rates are computed over a rolling window (default 60 s) from successive
+snapshots, not as total/elapsed since the monitor started. They are shown
+per stage (fetch, enrich, store) together with MusicBrainz latency
+percentiles, retries, AcousticBrainz hit rate, rate-limit wait and queue
+depths. The target comes from the progress row, not a hardcoded number.
+
+For second-by-second rates start the importer with IMPORT_METRICS_INTERVAL=1
+(the progress row itself is rewritten every few seconds).
+
+Usage:
+  python scripts/import_dashboard.py                    # refresh every second
+  python scripts/import_dashboard.py --interval 5 --window 300
+  python scripts/import_dashboard.py --once             # print one report and exit
+  python scripts/import_dashboard.py --until-done       # exit when the import finishes
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from import_progress import read_progress
+
+ROOT = Path(__file__).resolve().parents[1]
+CLEAR = "\033[H\033[J"
+
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    os.system('')  # enable ANSI escapes in the Windows console
+
+
+def find_file(name):
+    """`name` in the working directory, else in the repo root"""
+    for candidate in (Path(name), ROOT / name):
+        if candidate.exists():
+            return candidate
+    return Path(name)
+
+
+def read_metrics(path):
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None  # not written yet, or caught mid-replace
+
+
+# --- Snapshot helpers ----------------------------------------------------------
+
+def counter(snapshot, name, **labels):
+    """Sum of counter `name` over every label set matching `labels`"""
+    if not snapshot:
+        return 0
+    return sum(
+        row['value'] for row in snapshot['counters']
+        if row['name'] == name and all(row['labels'].get(k) == str(v) for k, v in labels.items())
+    )
+
+
+def counter_by(snapshot, name, label):
+    """{label value: total} for counter `name`"""
+    totals = {}
+    for row in (snapshot or {}).get('counters', []):
+        if row['name'] == name:
+            key = row['labels'].get(label)
+            totals[key] = totals.get(key, 0) + row['value']
+    return totals
+
+
+def gauge_by(snapshot, name, label):
+    return {row['labels'].get(label): row['value'] for row in (snapshot or {}).get('gauges', []) if row['name'] == name}
+
+
+def histogram(snapshot, name):
+    """(buckets, counts, count) for histogram `name`, summed over labels"""
+    buckets, counts, total = None, None, 0
+    for row in (snapshot or {}).get('histograms', []):
+        if row['name'] != name:
+            continue
+        hist = row['value']
+        if buckets is None:
+            buckets, counts = hist['buckets'], [0] * len(hist['counts'])
+        counts = [a + b for a, b in zip(counts, hist['counts'])]
+        total += hist['count']
+    return buckets, counts, total
+
+
+def percentile(buckets, counts, total, q):
+    """Upper bound of the bucket holding the q-th quantile (None if empty or beyond the last bucket)"""
+    if not buckets or total <= 0:
+        return None
+    rank = q * total
+    cumulative = 0
+    for bound, count in zip(buckets, counts):
+        cumulative += count
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+class Window:
+    """Rolling window of (timestamp, value) pairs keyed by the source's own timestamps"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()
+
+    def add(self, stamp, value):
+        if stamp is None or (self.samples and stamp <= self.samples[-1][0]):
+            return  # same snapshot as last poll
+        self.samples.append((stamp, value))
+        while len(self.samples) > 2 and stamp - self.samples[1][0] >= self.seconds:
+            self.samples.popleft()
+
+    def span(self):
+        """(oldest, newest) samples, or None until there are two"""
+        if len(self.samples) < 2:
+            return None
+        return self.samples[0], self.samples[-1]
+
+    def rate(self, read):
+        """Per-second change of read(value) across the window"""
+        span = self.span()
+        if span is None:
+            return None
+        (t0, old), (t1, new) = span
+        return (read(new) - read(old)) / (t1 - t0) if t1 > t0 else None
+
+
+# --- Rendering -----------------------------------------------------------------
+
+def fmt_rate(value, unit='/s'):
+    return "   -   " if value is None else f"{value:7.1f}{unit}"
+
+
+def fmt_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return f"{seconds // 3600}h {(seconds % 3600) // 60:02d}m {seconds % 60:02d}s"
+
+
+def pct(part, whole):
+    return f"{100 * (part or 0) / max(whole or 0, 1):.1f}%"
+
+
+def bar(done, total, width=30):
+    filled = int(width * done / total) if total else 0
+    return "█" * filled + "░" * (width - filled)
+
+
+def render(db_path, metrics_path, progress, progress_window, metrics_window, window, target):
+    lines = []
+    now = time.time()
+    lines.append("=" * 78)
+    lines.append(f"IMPORT DASHBOARD  {db_path}  {time.strftime('%H:%M:%S')}  (rates over last {window:.0f}s)")
+    lines.append("=" * 78)
+
+    if progress is None:
+        lines.append("No import_progress row yet - start scripts/enhanced-music-importer.py")
+    else:
+        target = target or progress['target_songs']
+        age = now - (progress['updated_at'] or now)
+        lines.append(f"{progress['phase'] or 'Import'}: {progress['status']} | target {target or 0:,} | "
+                     f"running {fmt_duration(now - progress['started_at'])} | updated {age:.0f}s ago")
+
+        done, total = progress['stage_done'] or 0, progress['stage_total'] or 0
+        span = progress_window.span()
+        if span is not None and span[0][1]['stage_started_at'] == progress['stage_started_at']:
+            stage_rate = progress_window.rate(lambda p: p['stage_done'])
+        else:
+            stage_rate = progress['rate_per_sec']  # stage began inside the window: average since it started
+        eta = (total - done) / stage_rate if stage_rate and total > done else None
+        lines.append(f"Stage {progress['stage']:<15} {bar(done, total)} {done:,}/{total:,} "
+                     f"({pct(done, total)})  {fmt_rate(stage_rate).strip()}  ETA {fmt_duration(eta)}")
+
+        songs = progress['total_songs'] or 0
+        lines.append(f"Songs {songs:,} | BPM {pct(progress['with_bpm'], songs)} | Energy {pct(progress['with_energy'], songs)} | "
+                     f"Genres {pct(progress['with_genres'], songs)} | Popularity {pct(progress['with_popularity'], songs)} | "
+                     f"{progress['unique_artists'] or 0:,} artists | {progress['size_mb']:.1f} MB")
+        lines.append(f"This run: fetched {progress['fetched']:,} | enriched {progress['enriched']:,} | stored {progress['stored']:,}")
+
+    lines.append("")
+    metrics = metrics_window.samples[-1][1] if metrics_window.samples else None
+    if metrics is None:
+        lines.append(f"No metrics at {metrics_path} (importer writes it every IMPORT_METRICS_INTERVAL seconds)")
+        return "\n".join(lines)
+
+    rate = metrics_window.rate
+    lines.append("Throughput")
+    lines.append(f"  fetch   {fmt_rate(rate(lambda m: counter(m, 'songs_fetched')))} songs    "
+                 f"{fmt_rate(rate(lambda m: counter(m, 'genres_done')))} genres")
+    hits = rate(lambda m: counter(m, 'acousticbrainz_lookups', result='hit'))
+    lookups = rate(lambda m: counter(m, 'acousticbrainz_lookups'))
+    hit_rate = f"{100 * hits / lookups:.0f}%" if hits is not None and lookups else "-"
+    lines.append(f"  enrich  {fmt_rate(lookups)} lookups  hit rate {hit_rate}")
+    lines.append(f"  store   {fmt_rate(rate(lambda m: counter(m, 'songs_stored')))} rows     "
+                 f"errors {counter(metrics, 'store_errors'):,}")
+
+    lines.append("MusicBrainz")
+    span = metrics_window.span()
+    if span is not None:
+        (_, old), (_, new) = span
+        buckets, new_counts, new_total = histogram(new, 'musicbrainz_request_seconds')
+        _, old_counts, old_total = histogram(old, 'musicbrainz_request_seconds')
+        if buckets and old_counts:
+            new_counts = [a - b for a, b in zip(new_counts, old_counts)]
+            new_total -= old_total
+        p50 = percentile(buckets, new_counts, new_total, 0.5)
+        p95 = percentile(buckets, new_counts, new_total, 0.95)
+    else:
+        p50 = p95 = None
+    latency = f"p50 <= {p50}s  p95 <= {p95}s" if p50 is not None else "p50/p95 -"
+    lines.append(f"  {fmt_rate(rate(lambda m: counter(m, 'musicbrainz_requests')), ' req/s')}  {latency}  "
+                 f"retries {fmt_rate(rate(lambda m: counter(m, 'musicbrainz_retries'))).strip()}")
+    statuses = counter_by(metrics, 'musicbrainz_requests', 'status')
+    retries = counter_by(metrics, 'musicbrainz_retries', 'reason')
+    lines.append(f"  status {', '.join(f'{k}: {v:,}' for k, v in sorted(statuses.items())) or '-'} | "
+                 f"retries {', '.join(f'{k}: {v:,}' for k, v in sorted(retries.items())) or '-'}")
+
+    waits = counter_by(metrics, 'rate_limit_wait_seconds', 'api')
+    if span is not None and waits:
+        (_, old), (_, new) = span
+        share = {api: (counter(new, 'rate_limit_wait_seconds', api=api) - counter(old, 'rate_limit_wait_seconds', api=api))
+                 / (new['timestamp'] - old['timestamp']) for api in waits if new['timestamp'] > old['timestamp']}
+        lines.append("Rate-limit wait  " + ", ".join(f"{api} {100 * v:.0f}% of wall time" for api, v in share.items()))
+
+    queues = gauge_by(metrics, 'queue_depth', 'stage')
+    lines.append("Queues  " + (" | ".join(f"{stage} {depth:,}" for stage, depth in queues.items()) or "-"))
+    active = [stage for stage, on in gauge_by(metrics, 'stage_active', 'stage').items() if on]
+    lines.append(f"Active stage (metrics): {active[0] if active else '-'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live dashboard for enhanced-music-importer.py")
+    parser.add_argument('--db', default=None, help="database (default: enhanced_music.db here or in the repo root)")
+    parser.add_argument('--metrics', default=None, help="metrics snapshot (default: import_metrics.json)")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between refreshes")
+    parser.add_argument('--window', type=float, default=60.0, help="rolling window for rates, seconds")
+    parser.add_argument('--target', type=int, default=None, help="override the run's target song count")
+    parser.add_argument('--once', action='store_true', help="print one report and exit")
+    parser.add_argument('--until-done', action='store_true', help="exit once the import is no longer running")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db) if args.db else find_file("enhanced_music.db")
+    metrics_path = Path(args.metrics) if args.metrics else find_file(os.environ.get('IMPORT_METRICS_FILE', 'import_metrics.json'))
+    progress_window = Window(args.window)
+    metrics_window = Window(args.window)
+    in_place = sys.stdout.isatty() and not args.once
+
+    try:
+        while True:
+            progress = read_progress(str(db_path))
+            if progress is not None:
+                progress_window.add(progress['updated_at'], progress)
+            metrics = read_metrics(metrics_path)
+            if metrics is not None:
+                metrics_window.add(metrics['timestamp'], metrics)
+
+            frame = render(db_path, metrics_path, progress, progress_window, metrics_window, args.window, args.target)
+            print((CLEAR if in_place else "") + frame, flush=True)
+
+            if args.once:
+                return
+            if args.until_done and progress is not None and progress['status'] != 'running':
+                print(f"\n✅ Import {progress['status']}")
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nMonitoring stopped.")
+
+
+if __name__ == '__main__':
+    main()
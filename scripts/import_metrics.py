@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+scripts/import_metrics.py
+
+Per-stage counters, gauges and latency histograms for the importer.
+
+The importer records into one thread-safe `ImportMetrics` instance; the
+numbers can be read two ways while an import runs:
+
+- Prometheus text format on `http://<host>:<port>/metrics`
+  (`IMPORT_METRICS_PORT`, off by default)
+- a JSON snapshot rewritten every `IMPORT_METRICS_INTERVAL` seconds
+  (`IMPORT_METRICS_FILE`, default `import_metrics.json`; empty disables)
+
+Neither needs a database connection, so watching a long phase no longer
+costs a `COUNT(*)` over `songs` per poll.
+
+Usage:
+  IMPORT_METRICS_PORT=9108 python scripts/enhanced-music-importer.py 800000
+  python scripts/import_metrics.py import_metrics.json     # print a snapshot as Prometheus text
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Seconds; covers fast AcousticBrainz 404s through slow MusicBrainz search pages
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_FILE = os.environ.get('IMPORT_METRICS_FILE', 'import_metrics.json')
+METRICS_PORT = int(os.environ.get('IMPORT_METRICS_PORT', '0') or 0)
+METRICS_INTERVAL = float(os.environ.get('IMPORT_METRICS_INTERVAL', '15'))
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class ImportMetrics:
+    """Thread-safe counters, gauges and histograms keyed by (name, labels)"""
+
+    def __init__(self, prefix='importer_'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._server = None
+        self._writer = None
+        self._stop = threading.Event()
+
+    # --- Recording -------------------------------------------------------
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = _Histogram(buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the block into histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def set_stage(self, stage):
+        """Mark `stage` as the active pipeline stage (others drop to 0)"""
+        with self.lock:
+            for key in [k for k in self.gauges if k[0] == 'stage_active']:
+                self.gauges[key] = 0
+            self.gauges[('stage_active', _label_key({'stage': stage}))] = 1
+
+    # --- Reading ---------------------------------------------------------
+
+    def snapshot(self):
+        """JSON-serialisable copy of every metric"""
+        with self.lock:
+            def rows(items, value):
+                return [{'name': name, 'labels': dict(key), 'value': value(v)} for (name, key), v in items]
+
+            return {
+                'timestamp': time.time(),
+                'started': self.started,
+                'uptime_seconds': time.time() - self.started,
+                'counters': rows(self.counters.items(), lambda v: v),
+                'gauges': rows(self.gauges.items(), lambda v: v),
+                'histograms': rows(self.histograms.items(), lambda h: {
+                    'buckets': list(h.buckets), 'counts': list(h.counts), 'sum': h.sum, 'count': h.count,
+                }),
+            }
+
+    def render_prometheus(self):
+        return render_prometheus(self.snapshot(), self.prefix)
+
+    # --- Exporting -------------------------------------------------------
+
+    def write_json(self, path):
+        """Atomically replace `path` with the current snapshot"""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(self.snapshot()), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def start_json_writer(self, path, interval=METRICS_INTERVAL):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.write_json(path)
+                except OSError as e:
+                    print(f"⚠️  Could not write metrics to {path}: {e}")
+
+        self._json_path = path
+        self._writer = threading.Thread(target=loop, name='metrics-json', daemon=True)
+        self._writer.start()
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{port}/metrics")
+
+    def start(self, path=METRICS_FILE, port=METRICS_PORT, interval=METRICS_INTERVAL):
+        """Start whichever exporters are configured"""
+        if path:
+            self.start_json_writer(path, interval)
+        if port:
+            try:
+                self.start_http_server(port)
+            except OSError as e:
+                print(f"⚠️  Metrics endpoint disabled (port {port}): {e}")
+        return self
+
+    def stop(self):
+        """Stop exporters, writing one final snapshot so the file shows the finished run"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            try:
+                self.write_json(self._json_path)
+            except OSError:
+                pass
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def render_prometheus(snapshot, prefix='importer_'):
+    """Prometheus text exposition for a snapshot dict"""
+    lines = []
+    typed = set()
+
+    def type_line(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for row in sorted(snapshot['counters'], key=lambda r: r['name']):
+        name = f"{prefix}{row['name']}_total"
+        type_line(name, 'counter')
+        lines.append(f"{name}{_format_labels(_label_key(row['labels']))} {row['value']}")
+
+    for row in sorted(snapshot['gauges'], key=lambda r: r['name']):
+        name = f"{prefix}{row['name']}"
+        type_line(name, 'gauge')
+        lines.append(f"{name}{_format_labels(_label_key(row['labels']))} {row['value']}")
+
+    for row in sorted(snapshot['histograms'], key=lambda r: r['name']):
+        name = f"{prefix}{row['name']}"
+        type_line(name, 'histogram')
+        key = _label_key(row['labels'])
+        hist = row['value']
+        cumulative = 0
+        for bound, count in zip(hist['buckets'], hist['counts']):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', repr(float(bound)))])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist['count']}")
+        lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+        lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+
+    gauge = f"{prefix}uptime_seconds"
+    lines.append(f"# TYPE {gauge} gauge")
+    lines.append(f"{gauge} {snapshot['uptime_seconds']:.1f}")
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE)
+    if not path.exists():
+        print(f"No metrics file at {path} (is the importer running?)")
+        sys.exit(1)
+    print(render_prometheus(json.loads(path.read_text(encoding='utf-8'))), end='')
+
+
+if __name__ == '__main__':
+    main()
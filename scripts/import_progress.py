@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+scripts/import_progress.py
+
+Single-row `import_progress` table maintained by the importer.
+
+The importer rewrites the one progress row every few seconds and at every
+batch commit, copying totals and enrichment counts from the trigger-kept
+`song_stats` table (see song_stats.py). Monitors read that row instead
+of running `COUNT(*) ... WHERE bpm IS NOT NULL` over the whole table, so
+watching an import costs O(1) and never competes with the writer.
+
+The row is committed in its own transaction only when the importer's
+connection has nothing else pending. While a batch is open it is written
+into that batch and committed with it, so a progress update never commits
+half a batch.
+
+Usage (monitors):
+  from import_progress import read_progress
+  progress = read_progress("enhanced_music.db")   # dict, or None before the first run
+"""
+import os
+import sqlite3
+import time
+
+from db_publish import staging_path
+from song_stats import read_song_stats
+
+PROGRESS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS import_progress (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        phase TEXT,
+        stage TEXT,
+        status TEXT,
+        target_songs INTEGER,
+        total_songs INTEGER,
+        with_artist INTEGER,
+        with_genres INTEGER,
+        with_bpm INTEGER,
+        with_energy INTEGER,
+        with_popularity INTEGER,
+        unique_artists INTEGER,
+        fetched INTEGER,
+        enriched INTEGER,
+        stored INTEGER,
+        stage_done INTEGER,
+        stage_total INTEGER,
+        rate_per_sec REAL,
+        eta_seconds REAL,
+        started_at REAL,
+        stage_started_at REAL,
+        updated_at REAL
+    )
+"""
+
+# song_stats name -> import_progress column
+COPIED_STATS = {
+    'total': 'total_songs',
+    'artist': 'with_artist',
+    'genres': 'with_genres',
+    'bpm': 'with_bpm',
+    'energy': 'with_energy',
+    'popularity_score': 'with_popularity',
+    'unique_artists': 'unique_artists',
+}
+
+PHASES = {10_000: 'Phase 1', 40_000: 'Phase 2', 150_000: 'Phase 3', 800_000: 'Phase 4'}
+
+
+def phase_name(target_songs):
+    return PHASES.get(target_songs, f"{target_songs:,} songs")
+
+
+class ImportProgress:
+    """Keeps the import_progress row current from the importer's own connection.
+    Counts are copied from song_stats, so ensure_song_stats(conn) must have run."""
+
+    def __init__(self, conn, target_songs=None, min_interval=5.0):
+        self.conn = conn
+        self.min_interval = min_interval
+        self.last_write = 0.0
+        now = time.time()
+        self.row = {
+            'phase': phase_name(target_songs) if target_songs else None,
+            'stage': 'starting',
+            'status': 'running',
+            'target_songs': target_songs,
+            'fetched': 0,
+            'enriched': 0,
+            'stored': 0,
+            'stage_done': 0,
+            'stage_total': 0,
+            'rate_per_sec': 0.0,
+            'eta_seconds': None,
+            'started_at': now,
+            'stage_started_at': now,
+        }
+        conn.execute(PROGRESS_SCHEMA)
+        self.write()
+
+    def start_stage(self, stage, total=0):
+        self.row.update(stage=stage, stage_done=0, stage_total=total, rate_per_sec=0.0,
+                        eta_seconds=None, stage_started_at=time.time())
+        self.write()
+
+    def advance(self, done=1, **counters):
+        """Mark `done` more items of the current stage; bump e.g. fetched=/enriched="""
+        self.row['stage_done'] += done
+        for key, value in counters.items():
+            self.row[key] += value
+        if time.time() - self.last_write >= self.min_interval:
+            self.write()
+
+    def write(self, commit=True):
+        """
+        Upsert the progress row. It is committed on its own only if the connection
+        had no open transaction; otherwise (or with commit=False) it rides along
+        with the writer's next commit.
+        """
+        own_transaction = commit and not self.conn.in_transaction
+        now = time.time()
+        elapsed = now - self.row['stage_started_at']
+        done, total = self.row['stage_done'], self.row['stage_total']
+        rate = done / elapsed if elapsed > 0 else 0.0
+        self.row['rate_per_sec'] = rate
+        self.row['eta_seconds'] = (total - done) / rate if rate > 0 and total > done else None
+        self.row['updated_at'] = now
+        stats = read_song_stats(self.conn) or {}
+        for name, column in COPIED_STATS.items():
+            self.row[column] = stats.get(name)
+
+        columns = list(self.row)
+        self.conn.execute(
+            f"INSERT INTO import_progress (id, {', '.join(columns)}) VALUES (1, {', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns)}",
+            [self.row[c] for c in columns],
+        )
+        if own_transaction:
+            self.conn.commit()
+        self.last_write = now
+
+    def finish(self, status='complete'):
+        self.row.update(stage='done' if status == 'complete' else self.row['stage'], status=status)
+        self.write()
+
+
+def read_progress(db_path):
+    """The import_progress row as a dict (plus db size), or None if there is none yet.
+    Reads the staging DB the importer writes to when there is one (see db_publish.py)."""
+    staging = staging_path(db_path)
+    if staging.exists():
+        db_path = str(staging)
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
+    try:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM import_progress WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None  # table not created yet: the importer has not run on this DB
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    progress = dict(row)
+    progress['size_mb'] = os.path.getsize(db_path) / (1024 * 1024)
+    progress['age_seconds'] = time.time() - (progress['updated_at'] or 0)
+    return progress
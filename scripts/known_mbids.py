@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+scripts/known_mbids.py
+
+Compact set of the MusicBrainz recording ids already in `songs`.
+
+Re-running a phase returns search pages full of recordings the database
+already has. The importer loads this set once at startup and uses it to:
+
+- drop known recordings from each page before enrichment and storage
+- stop paging a genre once a page is mostly known (IMPORT_MIN_NEW_FRACTION)
+- discount saturated tags when planning pages (fetch_planner.py)
+
+MBIDs are UUIDs, so each is stored as its 16 raw bytes in one sorted NumPy
+`S16` array (16 MB for 1M songs, binary-searched a page at a time).
+Recordings found during the run, plus any id that is not a UUID, go to a
+small Python set. Without NumPy everything goes to the Python set, which is
+several times larger but behaves the same.
+
+Usage:
+  python scripts/known_mbids.py enhanced_music.db      # load and report size/time
+"""
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+LOAD_CHUNK = 100_000
+
+
+def mbid_key(mbid):
+    """UUID string -> 16 bytes, or None if it is not a UUID"""
+    if not mbid:
+        return None
+    try:
+        key = bytes.fromhex(mbid.replace('-', ''))
+    except ValueError:
+        return None
+    return key if len(key) == 16 else None
+
+
+class KnownMBIDs:
+    """Membership test for recording ids; thread-safe add()"""
+
+    def __init__(self, keys=None):
+        self.sorted = keys if keys is not None else (np.empty(0, dtype='S16') if np is not None else None)
+        self.extra = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, conn):
+        chunks, extra = [], set()
+        cursor = conn.execute("SELECT mbid FROM songs WHERE mbid IS NOT NULL")
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK)
+            if not rows:
+                break
+            uuids = [mbid for (mbid,) in rows if len(mbid) == 36]
+            extra.update(mbid for (mbid,) in rows if len(mbid) != 36)
+            try:
+                # One hex decode per chunk rather than one per MBID
+                packed = bytes.fromhex(''.join(uuids).replace('-', ''))
+            except ValueError:
+                packed = None
+            if packed is None or len(packed) != 16 * len(uuids):
+                keys = [mbid_key(m) for m in uuids]
+                extra.update(m for m, key in zip(uuids, keys) if key is None)
+                packed = b''.join(key for key in keys if key is not None)
+            if np is not None:
+                chunks.append(np.frombuffer(packed, dtype='S16'))
+            else:
+                extra.update(packed[i:i + 16] for i in range(0, len(packed), 16))
+        known = cls(np.unique(np.concatenate(chunks)) if np is not None and chunks else None)
+        known.extra = extra
+        return known
+
+    def __len__(self):
+        return (len(self.sorted) if self.sorted is not None else 0) + len(self.extra)
+
+    def nbytes(self):
+        """Approximate memory held, in bytes"""
+        array = self.sorted.nbytes if self.sorted is not None else 0
+        with self.lock:
+            return array + sys.getsizeof(self.extra) + sum(sys.getsizeof(k) for k in self.extra)
+
+    def _in_array(self, keys):
+        if self.sorted is None or len(self.sorted) == 0 or not keys:
+            return [False] * len(keys)
+        probe = np.array(keys, dtype='S16')
+        pos = np.searchsorted(self.sorted, probe)
+        pos[pos == len(self.sorted)] = 0
+        return list(self.sorted[pos] == probe)
+
+    def known_flags(self, mbids):
+        """[bool] per mbid: already in the DB or seen earlier in this run"""
+        keys = [mbid_key(m) for m in mbids]
+        array_keys = [k for k in keys if k is not None]
+        in_array = iter(self._in_array(array_keys))
+        flags = []
+        with self.lock:
+            for mbid, key in zip(mbids, keys):
+                if key is None:
+                    flags.append(mbid in self.extra)
+                else:
+                    flags.append(bool(next(in_array)) or key in self.extra)
+        return flags
+
+    def __contains__(self, mbid):
+        return self.known_flags([mbid])[0]
+
+    def add(self, mbid):
+        key = mbid_key(mbid)
+        with self.lock:
+            self.extra.add(mbid if key is None else key)
+
+    def add_new(self, mbids):
+        """Add `mbids`, returning [bool] of which were new. Atomic, so two threads never both claim one."""
+        keys = [mbid_key(m) for m in mbids]
+        array_keys = [k for k in keys if k is not None]
+        in_array = iter(self._in_array(array_keys))
+        new = []
+        with self.lock:
+            for mbid, key in zip(mbids, keys):
+                item = mbid if key is None else key
+                fresh = not (key is not None and next(in_array)) and item not in self.extra
+                if fresh:
+                    self.extra.add(item)
+                new.append(fresh)
+        return new
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'enhanced_music.db'
+    start = time.time()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        known = KnownMBIDs.from_db(conn)
+    finally:
+        conn.close()
+    backend = 'NumPy S16 array' if np is not None else 'Python set (NumPy not installed)'
+    print(f"✅ {len(known):,} known MBIDs in {known.nbytes() / (1024 * 1024):.1f} MB "
+          f"({backend}), loaded in {time.time() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+scripts/mb_dump.py
+
+Offline MusicBrainz source: stream recordings from local dump files instead
+of paging the /ws/2/recording search API at 1 request/second.
+
+Two dump formats are understood:
+
+- JSON dump (data.metabrainz.org/pub/musicbrainz/data/json-dumps/<date>/recording.tar.xz):
+  one recording per line in `mbdump/recording`. The .tar.xz is read as a
+  stream, and a bare JSON Lines file (optionally .gz/.bz2/.xz) works too.
+- PostgreSQL dump (mbdump.tar.bz2 extracted to a directory): the `recording`,
+  `artist_credit_name`, `artist`, `tag` and `recording_tag` tables, plus
+  `recording_first_release_date` when present, joined here in a few
+  streaming passes. The tables carry no release title, so album stays empty.
+
+Recordings are kept when one of their tags or genres is in the requested
+genre list, and are mapped to `songs` rows by recording_to_song(), the same
+mapping the API path uses: the artist is the first credited artist's name
+(not the full "X feat. Y" credit) and genres keep the requested spelling
+('IDM', not 'idm'). A full catalog load is bounded by disk and CPU
+and takes minutes.
+
+Usage:
+  python scripts/enhanced-music-importer.py 1000000 --dump recording.tar.xz
+  python scripts/enhanced-music-importer.py 1000000 --dump mbdump/          # PostgreSQL tables
+  python scripts/mb_dump.py recording.tar.xz phonk hardstyle                # print matches
+"""
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import sys
+import tarfile
+from pathlib import Path
+
+JSON_DUMP_MEMBER = 'mbdump/recording'
+PG_TABLES = ('recording', 'artist_credit_name', 'artist', 'tag', 'recording_tag')
+
+
+def recording_to_song(recording, genres):
+    """MusicBrainz recording JSON (search result or dump line) -> songs row dict"""
+    artist_credit = recording.get('artist-credit', [{}])[0]
+    artist_name = artist_credit.get('artist', {}).get('name', 'Unknown')
+    genre_list = json.dumps(list(genres))
+
+    song = {
+        'id': f"{recording.get('id')}",
+        'mbid': recording.get('id'),
+        'title': recording.get('title'),
+        'artist': artist_name,
+        'album': None,
+        'genres': genre_list,
+        'subgenres': genre_list,
+        'moods': None,
+        'tags': genre_list,
+        'bpm': None,
+        'key': None,
+        'energy': None,
+        'danceability': None,
+        'acousticness': None,
+        'instrumentalness': None,
+        'valence': None,
+        'loudness': None,
+        'popularity_score': None,
+        'release_year': None,
+        'duration_ms': recording.get('length'),
+        'language': None,
+        'similar_artists': None,
+        'source': 'musicbrainz',
+    }
+
+    # Album and year from the first release; dumps also carry first-release-date
+    release_date = None
+    if recording.get('releases'):
+        first_release = recording['releases'][0]
+        song['album'] = first_release.get('title')
+        release_date = first_release.get('date')
+    release_date = release_date or recording.get('first-release-date')
+    if release_date:
+        try:
+            song['release_year'] = int(release_date.split('-')[0])
+        except ValueError:
+            pass
+    return song
+
+
+# --- Reading ---------------------------------------------------------------------
+
+class _CountingReader(io.RawIOBase):
+    """Wraps a binary file and counts bytes read from disk (for progress on compressed input)"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        self.bytes_read += n or 0
+        return n
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def _decompress(stream, name):
+    if name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=stream)
+    if name.endswith('.bz2'):
+        return bz2.BZ2File(stream)
+    if name.endswith('.xz'):
+        return lzma.LZMAFile(stream)
+    return stream
+
+
+def _json_lines(path, counter):
+    """Yield raw JSON lines from a JSON dump tarball or a (compressed) JSON Lines file"""
+    name = path.name
+    if '.tar' in name:
+        with tarfile.open(fileobj=counter, mode='r|*') as tar:
+            for member in tar:
+                if member.isfile() and member.name.endswith(JSON_DUMP_MEMBER):
+                    yield from io.BufferedReader(tar.extractfile(member), 1 << 20)
+                    return
+        raise ValueError(f"{path} has no {JSON_DUMP_MEMBER} member")
+    yield from io.BufferedReader(_decompress(io.BufferedReader(counter, 1 << 20), name), 1 << 20)
+
+
+def _wanted_genres(genres):
+    """{lowercased genre: requested spelling}, in request order; the first spelling wins"""
+    wanted = {}
+    for genre in genres:
+        wanted.setdefault(genre.lower(), genre)
+    return wanted
+
+
+def _matching_genres(names, wanted):
+    """Wanted genres (in request order, requested spelling) present among `names`"""
+    present = {name.lower() for name in names if name}
+    return [genre for key, genre in wanted.items() if key in present]
+
+
+def _take(matched, per_genre, counts):
+    """Count a recording against the first of its genres that still has room"""
+    for genre in matched:
+        if per_genre is None or counts.get(genre, 0) < per_genre:
+            counts[genre] = counts.get(genre, 0) + 1
+            return True
+    return False
+
+
+def iter_json_dump(path, genres, per_genre=None, on_progress=None, stats=None):
+    """Yield songs rows for recordings in a JSON dump tagged with one of `genres`"""
+    path = Path(path)
+    wanted = _wanted_genres(genres)
+    counts = {}
+    stats = stats if stats is not None else {}
+    stats.setdefault('scanned', 0)
+    stats.setdefault('errors', 0)
+    total = path.stat().st_size
+    counter = _CountingReader(open(path, 'rb'))
+    try:
+        for line in _json_lines(path, counter):
+            stats['scanned'] += 1
+            if on_progress and stats['scanned'] % 10_000 == 0:
+                on_progress(counter.bytes_read, total)
+            try:
+                recording = json.loads(line)
+                names = [t.get('name') for t in recording.get('genres') or []]
+                names += [t.get('name') for t in recording.get('tags') or []]
+                matched = _matching_genres(names, wanted)
+                if matched and _take(matched, per_genre, counts):
+                    yield recording_to_song(recording, matched)
+            except (ValueError, AttributeError, IndexError, TypeError):
+                stats['errors'] += 1
+            if per_genre is not None and len(counts) == len(wanted) and min(counts.values()) >= per_genre:
+                break  # every genre is full
+    finally:
+        counter.close()
+    if on_progress:
+        on_progress(total, total)
+
+
+_COPY_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+_COPY_ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def pg_copy_rows(lines):
+    """Rows of PostgreSQL COPY text lines: tab-separated, \\N for NULL, backslash escapes"""
+    for line in lines:
+        fields = line.rstrip('\n').split('\t')
+        yield [None if v == '\\N' else _COPY_ESCAPE_RE.sub(lambda m: _COPY_ESCAPES.get(m.group(1), m.group(1)), v)
+               for v in fields]
+
+
+def pg_table_rows(path):
+    """Rows of one extracted dump table file"""
+    with open(path, encoding='utf-8', newline='\n') as f:
+        yield from pg_copy_rows(f)
+
+
+def iter_pg_dump(directory, genres, per_genre=None, on_progress=None, stats=None):
+    """Yield songs rows from extracted PostgreSQL dump tables in `directory`"""
+    directory = Path(directory)
+    missing = [t for t in PG_TABLES if not (directory / t).exists()]
+    if missing:
+        raise FileNotFoundError(f"{directory} is missing dump tables: {', '.join(missing)}")
+    wanted = _wanted_genres(genres)
+    stats = stats if stats is not None else {}
+    stats.setdefault('scanned', 0)
+    stats.setdefault('errors', 0)
+    files = [directory / t for t in PG_TABLES + ('recording_first_release_date',) if (directory / t).exists()]
+    total = sum(f.stat().st_size for f in files)
+    done = 0
+
+    def finished(table):
+        nonlocal done
+        done += (directory / table).stat().st_size
+        if on_progress:
+            on_progress(done, total)
+
+    # tag(id, name, ref_count)
+    tag_names = {row[0]: row[1].lower() for row in pg_table_rows(directory / 'tag') if row[1] and row[1].lower() in wanted}
+    finished('tag')
+
+    # recording_tag(recording, tag, count, ...)
+    recording_tags = {}
+    for row in pg_table_rows(directory / 'recording_tag'):
+        name = tag_names.get(row[1])
+        if name:
+            recording_tags.setdefault(row[0], set()).add(name)
+    finished('recording_tag')
+
+    # recording(id, gid, name, artist_credit, length, ...)
+    counts = {}
+    recordings = []
+    for row in pg_table_rows(directory / 'recording'):
+        stats['scanned'] += 1
+        names = recording_tags.get(row[0])
+        if not names:
+            continue
+        matched = _matching_genres(names, wanted)
+        if _take(matched, per_genre, counts):
+            recordings.append((row[0], row[1], row[2], row[3], int(row[4]) if row[4] else None, matched))
+    del recording_tags
+    finished('recording')
+
+    # artist_credit_name(artist_credit, position, artist, name, join_phrase): the
+    # first credited artist, as the API's artist-credit[0].artist
+    needed = {r[3] for r in recordings}
+    first_artist = {row[0]: row[2] for row in pg_table_rows(directory / 'artist_credit_name')
+                    if row[1] == '0' and row[0] in needed}
+    finished('artist_credit_name')
+
+    # artist(id, gid, name, ...)
+    artist_ids = set(first_artist.values())
+    artist_names = {row[0]: row[2] for row in pg_table_rows(directory / 'artist') if row[0] in artist_ids}
+    credits = {credit: artist_names[artist] for credit, artist in first_artist.items() if artist in artist_names}
+    finished('artist')
+
+    # recording_first_release_date(recording, year, month, day)
+    years = {}
+    if (directory / 'recording_first_release_date').exists():
+        ids = {r[0] for r in recordings}
+        years = {row[0]: row[1] for row in pg_table_rows(directory / 'recording_first_release_date') if row[0] in ids and row[1]}
+        finished('recording_first_release_date')
+
+    for rec_id, gid, title, credit, length, matched in recordings:
+        yield recording_to_song({
+            'id': gid,
+            'title': title,
+            'length': length,
+            'artist-credit': [{'artist': {'name': credits.get(credit, 'Unknown')}}],
+            'first-release-date': years.get(rec_id),
+        }, matched)
+
+
+def iter_dump(path, genres, per_genre=None, on_progress=None, stats=None):
+    """JSON dump file or PostgreSQL dump directory, by what `path` is"""
+    if os.path.isdir(path):
+        return iter_pg_dump(path, genres, per_genre, on_progress, stats)
+    return iter_json_dump(path, genres, per_genre, on_progress, stats)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python scripts/mb_dump.py <dump file or mbdump dir> <genre> [genre ...]")
+        sys.exit(1)
+    stats = {}
+    found = 0
+    for song in iter_dump(sys.argv[1], sys.argv[2:], stats=stats):
+        found += 1
+        if found <= 20:
+            print(f"  {song['artist']} - {song['title']} ({song['release_year'] or '?'}) {song['genres']}")
+    print(f"✅ {found:,} matching recordings out of {stats['scanned']:,} scanned ({stats['errors']} unreadable)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+scripts/mood_tagger.py
+
+Derive `songs.moods` from audio features at import time, so mood queries
+match stored labels instead of guessing from bpm/energy per request.
+
+MOOD_RULES maps feature conditions to labels from QueryAnalyzer's mood
+vocabulary; a rule emits all of its synonyms ('chill', 'relaxing', 'calm',
+'mellow') so whichever word the user types is an exact hit in
+MusicScorer._score_mood. Features are read in chunks into NumPy arrays with
+NaN for missing values; a missing feature fails every comparison on it, so
+a song is labelled only from what it has. Rows with no matching rule keep
+moods NULL.
+
+Each chunk is evaluated as a boolean label matrix, rows are grouped by
+their label bitmask (a handful of distinct combinations), one JSON string
+is built per combination and the chunk is written back with executemany.
+
+Usage:
+  python scripts/mood_tagger.py enhanced_music.db          # songs without moods
+  python scripts/mood_tagger.py enhanced_music.db --all    # re-tag everything (after changing rules)
+
+Run on its own, it works on the staging DB and publishes when done (db_publish.py).
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from db_publish import prepare_staging, publish
+
+CHUNK_ROWS = 100_000
+
+FEATURES = ('bpm', 'energy', 'danceability', 'valence', 'acousticness', 'minor')
+
+# (labels, condition over feature arrays); thresholds assume 0-1 energy/danceability/valence
+MOOD_RULES = (
+    (('chill', 'relaxing', 'calm', 'mellow'), lambda f: (f['energy'] < 0.4) & ~(f['bpm'] >= 110)),
+    (('peaceful', 'sleep'), lambda f: (f['energy'] < 0.25) & (f['bpm'] < 90)),
+    (('focus', 'study'), lambda f: (f['energy'] >= 0.2) & (f['energy'] < 0.5) & (f['danceability'] < 0.5)),
+    (('upbeat', 'energetic'), lambda f: (f['energy'] >= 0.65) & (f['bpm'] >= 110)),
+    (('happy',), lambda f: (f['valence'] >= 0.65) & ~(f['minor'] == 1)),
+    (('sad', 'melancholic'), lambda f: ((f['valence'] < 0.35) & (f['energy'] < 0.5))
+                                       | ((f['minor'] == 1) & (f['energy'] < 0.4) & (f['bpm'] < 100))),
+    (('dark',), lambda f: (f['minor'] == 1) & ((f['valence'] < 0.4) | ((f['acousticness'] < 0.2) & (f['energy'] >= 0.6)))),
+    (('moody',), lambda f: (f['minor'] == 1) & (f['energy'] < 0.5)),
+    (('intense', 'aggressive'), lambda f: (f['energy'] >= 0.8) & (f['bpm'] >= 130)),
+    (('party',), lambda f: (f['danceability'] >= 0.7) & (f['energy'] >= 0.6)),
+    (('workout',), lambda f: (f['energy'] >= 0.7) & (f['bpm'] >= 120) & (f['bpm'] <= 170)),
+    (('groovy', 'funky'), lambda f: (f['danceability'] >= 0.65) & (f['bpm'] >= 90) & (f['bpm'] <= 125)),
+    (('smooth',), lambda f: (f['energy'] < 0.5) & (f['danceability'] >= 0.5)),
+    (('romantic', 'love'), lambda f: (f['valence'] >= 0.5) & (f['energy'] < 0.5) & (f['bpm'] < 110)),
+)
+
+SELECT_FEATURES = """
+    SELECT rowid, bpm, energy, danceability, valence, acousticness,
+           CASE WHEN key IS NULL THEN NULL WHEN key LIKE '% minor' THEN 1 ELSE 0 END
+    FROM songs
+    WHERE rowid > ? AND (bpm IS NOT NULL OR energy IS NOT NULL OR danceability IS NOT NULL OR valence IS NOT NULL)
+"""
+
+
+def label_matrix(features):
+    """(rows x rules) bool matrix; comparisons against NaN are False, so missing features never match"""
+    with np.errstate(invalid='ignore'):
+        return np.column_stack([np.asarray(rule(features), dtype=bool) for _, rule in MOOD_RULES])
+
+
+def mood_json(matrix):
+    """Per-row JSON label list (None where no rule matched), built once per distinct bitmask"""
+    weights = np.left_shift(1, np.arange(matrix.shape[1], dtype=np.int64))
+    codes = matrix.astype(np.int64) @ weights
+    unique, inverse = np.unique(codes, return_inverse=True)
+    strings = []
+    for code in unique:
+        labels = [label for bit, (names, _) in enumerate(MOOD_RULES) if code >> bit & 1 for label in names]
+        strings.append(json.dumps(labels) if labels else None)
+    return [strings[i] for i in inverse]
+
+
+def tag_moods(conn, retag=False, on_chunk=None):
+    """Label songs (all with features if `retag`, else only those without moods); returns counts"""
+    start = time.time()
+    scope = "" if retag else " AND moods IS NULL"
+    counts = {'scanned': 0, 'tagged': 0}
+    last_rowid = 0
+    while True:
+        rows = conn.execute(SELECT_FEATURES + scope + " ORDER BY rowid LIMIT ?", (last_rowid, CHUNK_ROWS)).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        data = np.array(rows, dtype=np.float64)  # None -> nan
+        features = {name: data[:, i + 1] for i, name in enumerate(FEATURES)}
+        moods = mood_json(label_matrix(features))
+        rowids = data[:, 0].astype(np.int64).tolist()
+        updates = [(m, r) for m, r in zip(moods, rowids) if m is not None or retag]
+        conn.executemany("UPDATE songs SET moods = ? WHERE rowid = ?", updates)
+        conn.commit()
+        counts['scanned'] += len(rows)
+        counts['tagged'] += sum(1 for m in moods if m is not None)
+        if on_chunk:
+            on_chunk(counts['scanned'])
+    counts['seconds'] = time.time() - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive songs.moods from audio features")
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    parser.add_argument('--all', action='store_true', help="re-tag songs that already have moods")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(str(prepare_staging(args.db)))
+    try:
+        counts = tag_moods(conn, retag=args.all)
+        print(f"✅ Tagged {counts['tagged']:,} of {counts['scanned']:,} songs with features in {counts['seconds']:.1f}s")
+        result = publish(conn, args.db)
+        print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,20 @@ Context-Aware Music Scoring Algorithm
 Scores songs based on query type with appropriate weighting
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from enum import Enum
+from functools import lru_cache
 import json
 import re
 
+import numpy as np
+
+from embedding_store import load_vectors, stack_embeddings
+from text_normalize import search_key
+
+# Query strings repeat for every candidate; normalize each once
+_query_key = lru_cache(maxsize=1024)(search_key)
+
 class QueryType(Enum):
     ARTIST = "artist"
     GENRE = "genre"
@@ -18,7 +27,10 @@ class QueryType(Enum):
 class MusicScorer:
     """Score songs based on parsed query"""
     
-    def __init__(self):
+    def __init__(self, similarity_weight: float = 0.4):
+        # Share of the final score given to embedding similarity in seed mode
+        self.similarity_weight = similarity_weight
+        
         # Different weight distributions for different query types
         self.weights = {
             QueryType.ARTIST: {
@@ -83,11 +95,15 @@ class MusicScorer:
         
         weights = self.weights[query_type]
         
+        # Search keys: stored with the song (title_norm/artist_norm) and the
+        # parsed query (artist_key), normalized here only when missing
+        artist_key = parsed_query.get('artist_key') or _query_key(parsed_query.get('artist') or '')
+        
         # 1. Artist matching (for artist queries)
         if 'artist_exact' in weights:
             artist_score = self._score_artist_exact(
-                song.get('artist', ''),
-                parsed_query.get('artist', '')
+                song.get('artist_norm') or search_key(song.get('artist')),
+                artist_key
             )
             breakdown['artist_exact'] = artist_score
             score += weights.get('artist_exact', 0) * artist_score
@@ -95,8 +111,8 @@ class MusicScorer:
         # 2. Title/keyword matching
         if 'title_keyword' in weights and parsed_query.get('artist'):
             title_score = self._score_title_keyword(
-                song.get('title', ''),
-                parsed_query.get('artist', '')
+                song.get('title_norm') or search_key(song.get('title')),
+                artist_key
             )
             breakdown['title_keyword'] = title_score
             score += weights.get('title_keyword', 0) * title_score
@@ -144,53 +160,42 @@ class MusicScorer:
     
     def _score_artist_exact(self, song_artist: str, query_artist: str) -> float:
         """
-        Score artist exact match
+        Score artist exact match (both search keys, see text_normalize.py)
         Returns 0-1
         """
-        if not query_artist:
+        if not query_artist or not song_artist:
             return 0
         
-        song_artist_lower = song_artist.lower().strip()
-        query_artist_lower = query_artist.lower().strip()
-        
-        # Exact match
-        if song_artist_lower == query_artist_lower:
+        # Exact match ("The Weeknd" and "the weeknd" are both "weeknd")
+        if song_artist == query_artist:
             return 1.0
         
-        # Substring match (e.g., "The Weeknd" matches "weeknd")
-        if query_artist_lower in song_artist_lower or song_artist_lower in query_artist_lower:
+        # Substring match (e.g., "weeknd" in "weeknd and ariana grande")
+        if query_artist in song_artist or song_artist in query_artist:
             return 0.8
         
         # Levenshtein-like similarity (simple version)
-        if self._string_similarity(song_artist_lower, query_artist_lower) > 0.7:
+        if self._string_similarity(song_artist, query_artist) > 0.7:
             return 0.6
         
         return 0
     
     def _score_title_keyword(self, song_title: str, keyword: str) -> float:
         """
-        Score title containing keyword
+        Score title containing keyword (both search keys)
         Returns 0-1
         """
-        if not keyword:
+        if not keyword or not song_title:
             return 0
         
-        song_title_lower = song_title.lower().strip()
-        keyword_lower = keyword.lower().strip()
-        
         # Exact title match
-        if song_title_lower == keyword_lower:
+        if song_title == keyword:
             return 1.0
         
         # Keyword in title
-        if keyword_lower in song_title_lower:
+        if keyword in song_title:
             return 0.7
         
-        # Partial word match
-        words = song_title_lower.split()
-        if any(keyword_lower in word for word in words):
-            return 0.5
-        
         return 0
     
     def _score_genre_exact(self, song_genres: str, query_genre: str) -> float:
@@ -254,12 +259,14 @@ class MusicScorer:
         
         query_mood_lower = query_mood.lower().strip()
         
-        # Exact match
-        if any(m.lower() == query_mood_lower for m in moods):
+        # Exact match: the importer stores every synonym of a mood (see mood_tagger.py),
+        # so this set lookup is the common case
+        mood_set = {m.lower() for m in moods}
+        if query_mood_lower in mood_set:
             return 1.0
         
         # Substring match
-        if any(query_mood_lower in m.lower() for m in moods):
+        if any(query_mood_lower in m for m in mood_set):
             return 0.8
         
         return 0
@@ -333,22 +340,71 @@ class MusicScorer:
         matches = sum(1 for a, b in zip(s1, s2) if a == b)
         return matches / max(len(s1), len(s2))
     
+    @staticmethod
+    def fetch_seeds(conn, seed_ids: List[str]) -> List[Dict]:
+        """
+        Load seed songs' embeddings from the songs table
+        (songs.embedding is copied from audio_features.db by song_embeddings.py;
+        seeds without linked audio are dropped)
+        Returns: [{'id': ..., 'embedding': np.ndarray}, ...]
+        """
+        vectors = load_vectors(conn, 'songs', list(seed_ids))
+        return [{'id': song_id, 'embedding': vec} for song_id, vec in vectors.items()]
+    
+    def _seed_vector(self, seeds: List[Dict]) -> Optional[np.ndarray]:
+        """Normalized centroid of the seed embeddings (None if no seed has one)"""
+        _, matrix = stack_embeddings([seed.get('embedding') for seed in seeds])
+        if len(matrix) == 0:
+            return None
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        centroid = matrix.mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        return centroid / norm if norm > 0 else None
+    
+    def _score_similarity(self, songs: List[Dict], seed_vector: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of every candidate to the seed centroid
+        One matrix-vector product over the candidate block; songs without
+        an embedding (or a different dimension) score 0. Returns 0-1 per song.
+        """
+        sims = np.zeros(len(songs), dtype=np.float32)
+        rows, matrix = stack_embeddings([song.get('embedding') for song in songs], dim=seed_vector.shape[0])
+        if len(rows) == 0:
+            return sims
+        norms = np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+        sims[rows] = np.clip((matrix @ seed_vector) / norms, 0.0, 1.0)
+        return sims
+    
     def score_songs(
         self,
         songs: List[Dict],
         query: str,
         query_type: QueryType,
         parsed_query: Dict,
-        limit: int = 20
+        limit: int = 20,
+        seeds: Optional[List[Dict]] = None
     ) -> List[Tuple[Dict, float, Dict]]:
         """
         Score multiple songs and return top results
+        With `seeds` (songs carrying an 'embedding', see fetch_seeds) the
+        query score is blended with cosine similarity to the seeds, giving
+        "more like this" ranking over the same candidate block.
         Returns: [(song, score, breakdown), ...]
         """
+        seed_vector = self._seed_vector(seeds) if seeds else None
+        if seed_vector is not None:
+            seed_ids = {seed.get('id') for seed in seeds}
+            songs = [song for song in songs if song.get('id') not in seed_ids]
+            similarities = self._score_similarity(songs, seed_vector)
+        
         results = []
         
-        for song in songs:
+        for i, song in enumerate(songs):
             score, breakdown = self.score_song(song, query, query_type, parsed_query)
+            if seed_vector is not None:
+                similarity = float(similarities[i])
+                breakdown['embedding_similarity'] = similarity
+                score = (1 - self.similarity_weight) * score + self.similarity_weight * similarity
             results.append((song, score, breakdown))
         
         # Sort by score (highest first)
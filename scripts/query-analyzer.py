@@ -3,10 +3,21 @@ Smart Query Analyzer
 Detects query intent and parses components for context-aware scoring
 """
 
+import os
 import re
 from typing import TypedDict
 from enum import Enum
 
+from text_normalize import normalize_text, search_key
+
+try:
+    from artist_gazetteer import ArtistGazetteer
+except Exception:
+    ArtistGazetteer = None
+
+# Sorted artist-name file built by artist_gazetteer.py; used when present
+GAZETTEER_PATH = os.environ.get('ARTIST_GAZETTEER', 'artists.gazetteer')
+
 class QueryType(Enum):
     ARTIST = "artist"           # "justin bieber", "the weeknd"
     GENRE = "genre"             # "pop", "phonk", "hardstyle"
@@ -18,6 +29,7 @@ class ParsedQuery(TypedDict):
     query_type: QueryType
     confidence: float            # 0-1, how sure we are about type
     artist: str | None
+    artist_key: str | None       # search_key(artist): equals songs.artist_norm
     genre: str | None
     mood: str | None
     bpm_range: tuple[int, int] | None  # (min, max)
@@ -27,7 +39,11 @@ class ParsedQuery(TypedDict):
     components: dict             # Raw extracted components
 
 class QueryAnalyzer:
-    def __init__(self):
+    def __init__(self, gazetteer='auto'):
+        """
+        gazetteer: 'auto' loads GAZETTEER_PATH if it exists, a path loads that
+        file, an ArtistGazetteer is used as is, None disables it (regex-only)
+        """
         # Known genres (expand as needed)
         self.known_genres = {
             'pop', 'rock', 'hip-hop', 'rap', 'electronic', 'edm', 'house', 'techno',
@@ -60,6 +76,14 @@ class QueryAnalyzer:
             'garage': (130, 150),
         }
         
+        self.gazetteer = self._load_gazetteer(gazetteer)
+        # A known-name match made only of these words is a descriptor, not an artist
+        self.non_artist_words = set()
+        for phrase in (self.known_genres | self.known_moods | set(self.bpm_descriptors) |
+                       {'songs', 'music', 'remix', 'by', 'featuring', 'ft', 'at', 'with', 'from',
+                        'the', 'and', 'of', 'bpm', 'hits', 'covers', 'vibes', 'energy', 'high', 'low', 'medium'}):
+            self.non_artist_words.update(phrase.split())
+        
         # Energy descriptors
         self.energy_descriptors = {
             'low energy': (0, 0.3),
@@ -94,6 +118,7 @@ class QueryAnalyzer:
             query_type=query_type,
             confidence=confidence,
             artist=artist_match,
+            artist_key=search_key(artist_match) if artist_match else None,
             genre=genre_match,
             mood=mood_match,
             bpm_range=bpm_range,
@@ -110,15 +135,40 @@ class QueryAnalyzer:
             }
         )
     
+    def _load_gazetteer(self, gazetteer):
+        if gazetteer is None or ArtistGazetteer is None:
+            return None
+        if gazetteer == 'auto':
+            gazetteer = GAZETTEER_PATH if os.path.exists(GAZETTEER_PATH) else None
+            if gazetteer is None:
+                return None
+        if isinstance(gazetteer, ArtistGazetteer):
+            return gazetteer
+        return ArtistGazetteer(gazetteer)
+    
     def _extract_artist(self, query: str) -> str | None:
         """Try to extract artist name from query"""
-        # Common patterns: "by [artist]", "[artist] songs", etc
-        patterns = [
-            r'by\s+([a-z\s]+?)(?:\s+(?:songs|music|remix|ft\.|featuring)|\s+at\s+|\s+with\s+|$)',
-            r'([a-z\s]+?)\s+(?:songs|music|remix)',
-            r'featuring\s+([a-z\s]+?)(?:\s+|$)',
-            r'^([a-z\s]+?)(?:\s+(?:songs|covers|hits))?$',  # Entire query might be artist
-        ]
+        if self.gazetteer is not None:
+            # Known artists only: longest run of query tokens that is a catalog artist
+            artist = self.gazetteer.longest_match(
+                normalize_text(query).split(),
+                skip=lambda tokens: all(t in self.non_artist_words or t.isdigit() for t in tokens))
+            if artist:
+                return artist
+            # Otherwise trust only explicit cues; the catch-all patterns would
+            # turn any leftover phrase into an artist
+            patterns = [
+                r'by\s+([a-z\s]+?)(?:\s+(?:songs|music|remix|ft\.|featuring)|\s+at\s+|\s+with\s+|$)',
+                r'featuring\s+([a-z\s]+?)(?:\s+|$)',
+            ]
+        else:
+            # Common patterns: "by [artist]", "[artist] songs", etc
+            patterns = [
+                r'by\s+([a-z\s]+?)(?:\s+(?:songs|music|remix|ft\.|featuring)|\s+at\s+|\s+with\s+|$)',
+                r'([a-z\s]+?)\s+(?:songs|music|remix)',
+                r'featuring\s+([a-z\s]+?)(?:\s+|$)',
+                r'^([a-z\s]+?)(?:\s+(?:songs|covers|hits))?$',  # Entire query might be artist
+            ]
         
         for pattern in patterns:
             match = re.search(pattern, query)
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+scripts/replication.py
+
+Incremental sync of enhanced_music.db from MusicBrainz replication packets.
+
+MusicBrainz publishes hourly packets (replication-<sequence>.tar.bz2) holding
+every row change since the previous one: `mbdump/dbmirror_pending` lists the
+operations (sequence id, table, i/u/d, transaction) and
+`mbdump/dbmirror_pendingdata` carries the key/new column values. This tool
+applies the changes that matter to `songs`, in sequence order, from local
+packet files:
+
+- recording insert/update: title, length and artist credit; existing songs are
+  updated in place with `last_updated` bumped, and only when a value changed
+- recording delete: the song is removed
+- recording_tag insert/delete for a genre already in the catalog
+  (`genre_counts`): the genre is added to/removed from the song, and a newly
+  tagged recording becomes a new song via the importer's mapping
+- artist_credit / artist_credit_name / artist / tag rows: name lookups for
+  the above. A song's artist is the first credited artist's name, as in the
+  importer's API and dump paths, so renaming that artist or changing the
+  credit's first artist renames the songs
+
+Packet rows use numeric MusicBrainz ids, so a small mirror of the
+recording/credit/artist/tag rows seen so far is kept in `mb_recordings`,
+`mb_artist_credits`, `mb_artists` and `mb_tags`. `seed` fills it for songs already in the DB
+from an extracted PostgreSQL dump (and takes the dump's replication sequence).
+The last applied sequence is stored in `replication_state`; packets at or below
+it are skipped and a gap stops the run. Each packet is applied in one
+transaction, then a snapshot is published (see db_publish.py). A day of
+packets touches thousands of rows, not the whole catalog.
+
+Usage:
+  python scripts/replication.py seed enhanced_music.db mbdump/            # once, after the initial load
+  python scripts/replication.py apply enhanced_music.db packets/          # every replication-*.tar.bz2 not yet applied
+  python scripts/replication.py status enhanced_music.db
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import tarfile
+import time
+from pathlib import Path
+
+from artist_aggregates import aggregate_artists
+from db_publish import prepare_staging, publish, staging_path
+from mb_dump import pg_copy_rows, pg_table_rows, recording_to_song
+from song_stats import ensure_song_stats
+from text_normalize import ensure_search_keys, search_key
+
+REPLICATION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS replication_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        sequence INTEGER NOT NULL,
+        schema_sequence INTEGER,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS mb_recordings (
+        id INTEGER PRIMARY KEY,
+        mbid TEXT NOT NULL,
+        title TEXT,
+        artist_credit INTEGER,
+        length INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_mb_recordings_mbid ON mb_recordings(mbid);
+    CREATE INDEX IF NOT EXISTS idx_mb_recordings_credit ON mb_recordings(artist_credit);
+    CREATE TABLE IF NOT EXISTS mb_artist_credits (
+        id INTEGER PRIMARY KEY,
+        name TEXT,  -- the first credited artist's name, i.e. songs.artist
+        artist INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS mb_artists (
+        id INTEGER PRIMARY KEY,
+        name TEXT
+    );
+    CREATE TABLE IF NOT EXISTS mb_tags (
+        id INTEGER PRIMARY KEY,
+        name TEXT
+    );
+"""
+
+PACKET_RE = re.compile(r'replication-(\d+)\.tar\.bz2$')
+# dbmirror column list: "name"='value' with '' for a quote; a bare "name"= is NULL
+FIELD_RE = re.compile(r'"([^"]+)"=(\'(?:\'\'|[^\'])*\')? ')
+TABLES = ('recording', 'recording_tag', 'artist_credit', 'artist_credit_name', 'artist', 'tag')
+
+
+def ensure_replication_schema(conn):
+    conn.executescript(REPLICATION_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(mb_artist_credits)")}
+    if 'artist' not in columns:  # mirrors seeded before first-artist names were tracked
+        conn.execute("ALTER TABLE mb_artist_credits ADD COLUMN artist INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_mb_artist_credits_artist ON mb_artist_credits(artist)")
+
+
+def parse_fields(data):
+    fields = {}
+    for name, value in FIELD_RE.findall(data + ' '):
+        fields[name] = value[1:-1].replace("''", "'") if value else None
+    return fields
+
+
+def read_packet(path):
+    """(replication sequence, schema sequence, [(op, table, keys, values)] in sequence order)"""
+    members = {}
+    with tarfile.open(path, 'r:bz2') as tar:
+        for member in tar:
+            name = member.name.split('/')[-1]
+            if member.isfile() and name in ('REPLICATION_SEQUENCE', 'SCHEMA_SEQUENCE',
+                                            'dbmirror_pending', 'dbmirror_pendingdata'):
+                members[name] = tar.extractfile(member).read().decode('utf-8')
+
+    pending = {}
+    for seq_id, table, op, _xid in pg_copy_rows(members.get('dbmirror_pending', '').splitlines()):
+        table = table.split('.')[-1].strip('"')
+        if table in TABLES:
+            pending[int(seq_id)] = [op, table, {}, {}]
+    for seq_id, is_key, data in pg_copy_rows(members.get('dbmirror_pendingdata', '').splitlines()):
+        change = pending.get(int(seq_id))
+        if change is not None:
+            change[2 if is_key == 't' else 3].update(parse_fields(data))
+
+    schema = members.get('SCHEMA_SEQUENCE', '').strip()
+    return (int(members['REPLICATION_SEQUENCE'].strip()), int(schema) if schema else None,
+            [tuple(pending[seq_id]) for seq_id in sorted(pending)])
+
+
+class ReplicationApplier:
+    """Applies packet changes to `songs` on one connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        ensure_replication_schema(conn)
+        ensure_song_stats(conn)
+        ensure_search_keys(conn)
+        # MusicBrainz tags are lowercase; the catalog keeps the importer's spelling ('IDM')
+        self.genres = {row[0].lower(): row[0] for row in conn.execute("SELECT genre FROM genre_counts")}
+        self.counts = {}
+
+    def _count(self, what, n=1):
+        self.counts[what] = self.counts.get(what, 0) + n
+
+    def sequence(self):
+        row = self.conn.execute("SELECT sequence FROM replication_state WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def set_sequence(self, sequence, schema_sequence=None):
+        self.conn.execute(
+            "INSERT INTO replication_state (id, sequence, schema_sequence, applied_at) VALUES (1, ?, ?, CURRENT_TIMESTAMP) "
+            "ON CONFLICT(id) DO UPDATE SET sequence = excluded.sequence, "
+            "schema_sequence = COALESCE(excluded.schema_sequence, schema_sequence), applied_at = excluded.applied_at",
+            (sequence, schema_sequence),
+        )
+
+    # --- Lookups ---------------------------------------------------------
+
+    def _credit_name(self, credit_id):
+        row = self.conn.execute("SELECT name FROM mb_artist_credits WHERE id = ?", (credit_id,)).fetchone()
+        return row[0] if row else None
+
+    def _tag_genre(self, tag_id):
+        row = self.conn.execute("SELECT name FROM mb_tags WHERE id = ?", (tag_id,)).fetchone()
+        return self.genres.get(row[0].lower()) if row and row[0] else None
+
+    # --- Changes ---------------------------------------------------------
+
+    def apply(self, op, table, keys, values):
+        getattr(self, f"_{table}")(op, keys, values)
+
+    def _tag(self, op, keys, values):
+        if op == 'd':
+            self.conn.execute("DELETE FROM mb_tags WHERE id = ?", (int(keys['id']),))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO mb_tags (id, name) VALUES (?, ?)", (int(values['id']), values.get('name')))
+
+    def _rename_credit(self, credit_id, name):
+        """Set a credit's artist name and rename its songs"""
+        self.conn.execute("UPDATE mb_artist_credits SET name = ? WHERE id = ?", (name, credit_id))
+        changed = self.conn.execute("""
+            UPDATE songs SET artist = ?, artist_norm = ?, last_updated = CURRENT_TIMESTAMP
+            WHERE mbid IN (SELECT mbid FROM mb_recordings WHERE artist_credit = ?) AND artist IS NOT ?
+        """, (name, search_key(name), credit_id, name)).rowcount
+        self._count('artist renamed', changed)
+
+    def _artist_credit(self, op, keys, values):
+        # Only the id matters: the name comes from the credit's first artist
+        if op == 'd':
+            self.conn.execute("DELETE FROM mb_artist_credits WHERE id = ?", (int(keys['id']),))
+        else:
+            self.conn.execute("INSERT OR IGNORE INTO mb_artist_credits (id) VALUES (?)", (int(values['id']),))
+
+    def _artist_credit_name(self, op, keys, values):
+        if op == 'd' or values.get('position') != '0':
+            return
+        credit_id, artist_id = int(values['artist_credit']), int(values['artist'])
+        row = self.conn.execute("SELECT name FROM mb_artists WHERE id = ?", (artist_id,)).fetchone()
+        name = row[0] if row and row[0] else values.get('name')  # as credited, if the artist is not mirrored
+        self.conn.execute("INSERT OR IGNORE INTO mb_artist_credits (id) VALUES (?)", (credit_id,))
+        self.conn.execute("UPDATE mb_artist_credits SET artist = ? WHERE id = ?", (artist_id, credit_id))
+        if name:
+            self._rename_credit(credit_id, name)
+
+    def _artist(self, op, keys, values):
+        if op == 'd':
+            self.conn.execute("DELETE FROM mb_artists WHERE id = ?", (int(keys['id']),))
+            return
+        artist_id, name = int(values['id']), values.get('name')
+        credits = [row[0] for row in self.conn.execute("SELECT id FROM mb_artist_credits WHERE artist = ?", (artist_id,))]
+        if op == 'i' or credits:
+            self.conn.execute("INSERT OR REPLACE INTO mb_artists (id, name) VALUES (?, ?)", (artist_id, name))
+        if name:
+            for credit_id in credits:
+                self._rename_credit(credit_id, name)
+
+    def _recording(self, op, keys, values):
+        if op == 'd':
+            rec_id = int(keys['id'])
+            row = self.conn.execute("SELECT mbid FROM mb_recordings WHERE id = ?", (rec_id,)).fetchone()
+            if row:
+                self._count('deleted', self.conn.execute("DELETE FROM songs WHERE mbid = ?", (row[0],)).rowcount)
+                self.conn.execute("DELETE FROM mb_recordings WHERE id = ?", (rec_id,))
+            return
+
+        rec_id = int(values['id'])
+        credit = int(values['artist_credit']) if values.get('artist_credit') else None
+        length = int(values['length']) if values.get('length') else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO mb_recordings (id, mbid, title, artist_credit, length) VALUES (?, ?, ?, ?, ?)",
+            (rec_id, values['gid'], values.get('name'), credit, length),
+        )
+        if op == 'u':
+            artist = self._credit_name(credit)
+            changed = self.conn.execute("""
+                UPDATE songs SET title = ?, title_norm = ?, duration_ms = ?,
+                    artist = COALESCE(?, artist), artist_norm = COALESCE(?, artist_norm), last_updated = CURRENT_TIMESTAMP
+                WHERE mbid = ? AND (title IS NOT ? OR duration_ms IS NOT ? OR (? IS NOT NULL AND artist IS NOT ?))
+            """, (values.get('name'), search_key(values.get('name')), length, artist, search_key(artist) if artist else None,
+                  values['gid'], values.get('name'), length, artist, artist)).rowcount
+            self._count('updated', changed)
+
+    def _recording_tag(self, op, keys, values):
+        row_keys = values if op == 'i' else keys
+        genre = self._tag_genre(int(row_keys['tag']))
+        if genre is None:
+            return
+        rec = self.conn.execute("SELECT mbid, title, artist_credit, length FROM mb_recordings WHERE id = ?",
+                                (int(row_keys['recording']),)).fetchone()
+        if rec is None:
+            return
+        mbid, title, credit, length = rec
+        song = self.conn.execute("SELECT genres FROM songs WHERE mbid = ?", (mbid,)).fetchone()
+
+        if op == 'd':
+            if song:
+                genres = [g for g in json.loads(song[0] or '[]') if g != genre]
+                if len(genres) < len(json.loads(song[0] or '[]')):
+                    self._set_genres(mbid, genres)
+                    self._count('untagged')
+            return
+
+        if song is None:
+            new = recording_to_song({
+                'id': mbid, 'title': title, 'length': length,
+                'artist-credit': [{'artist': {'name': self._credit_name(credit) or 'Unknown'}}],
+            }, [genre])
+            self.conn.execute("""
+                INSERT INTO songs (id, mbid, title, artist, title_norm, artist_norm, genres, subgenres, tags, duration_ms, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (new['id'], new['mbid'], new['title'], new['artist'], search_key(new['title']), search_key(new['artist']),
+                  new['genres'], new['subgenres'], new['tags'], new['duration_ms'], new['source']))
+            self._count('inserted')
+        else:
+            genres = json.loads(song[0] or '[]')
+            if genre not in genres:
+                self._set_genres(mbid, genres + [genre])
+                self._count('tagged')
+
+    def _set_genres(self, mbid, genres):
+        value = json.dumps(genres)
+        self.conn.execute(
+            "UPDATE songs SET genres = ?, subgenres = ?, tags = ?, last_updated = CURRENT_TIMESTAMP WHERE mbid = ?",
+            (value, value, value, mbid),
+        )
+
+
+def packet_files(directory):
+    """[(sequence, path)] for replication-*.tar.bz2 in `directory`, in order"""
+    found = []
+    for path in Path(directory).iterdir():
+        match = PACKET_RE.search(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+def apply_packets(conn, directory):
+    """
+    Apply every packet after the stored sequence, stopping at a gap
+    Returns (packets applied, change counts, first missing sequence or None)
+    """
+    applier = ReplicationApplier(conn)
+    current = applier.sequence()
+    applied = 0
+    for sequence, path in packet_files(directory):
+        if current is not None and sequence <= current:
+            continue
+        if current is not None and sequence != current + 1:
+            return applied, applier.counts, current + 1
+        start = time.time()
+        packet_sequence, schema_sequence, changes = read_packet(path)
+        try:
+            for change in changes:
+                applier.apply(*change)
+            applier.set_sequence(packet_sequence, schema_sequence)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = packet_sequence
+        applied += 1
+        print(f"  ✅ {path.name}: {len(changes):,} changes in {time.time() - start:.2f}s")
+    return applied, applier.counts, None
+
+
+def seed(conn, directory):
+    """Mirror recording/credit/artist/tag rows for the songs already in the DB from a PostgreSQL dump"""
+    directory = Path(directory)
+    ensure_replication_schema(conn)
+    mbids = {row[0] for row in conn.execute("SELECT mbid FROM songs WHERE mbid IS NOT NULL")}
+
+    credits = set()
+    rows = []
+    for row in pg_table_rows(directory / 'recording'):
+        if row[1] in mbids:
+            rows.append((int(row[0]), row[1], row[2], int(row[3]), int(row[4]) if row[4] else None))
+            credits.add(row[3])
+    conn.executemany("INSERT OR REPLACE INTO mb_recordings (id, mbid, title, artist_credit, length) VALUES (?, ?, ?, ?, ?)", rows)
+    # artist_credit_name(artist_credit, position, artist, ...) -> artist(id, gid, name, ...)
+    first_artist = {r[0]: r[2] for r in pg_table_rows(directory / 'artist_credit_name') if r[1] == '0' and r[0] in credits}
+    artist_ids = set(first_artist.values())
+    artist_names = {r[0]: r[2] for r in pg_table_rows(directory / 'artist') if r[0] in artist_ids}
+    conn.executemany("INSERT OR REPLACE INTO mb_artists (id, name) VALUES (?, ?)",
+                     ((int(a), name) for a, name in artist_names.items()))
+    conn.executemany("INSERT OR REPLACE INTO mb_artist_credits (id, name, artist) VALUES (?, ?, ?)",
+                     ((int(c), artist_names.get(a), int(a)) for c, a in first_artist.items()))
+    conn.executemany("INSERT OR REPLACE INTO mb_tags (id, name) VALUES (?, ?)",
+                     ((int(r[0]), r[1]) for r in pg_table_rows(directory / 'tag')))
+
+    sequence_file = directory / 'REPLICATION_SEQUENCE'
+    if not sequence_file.exists():
+        sequence_file = directory.parent / 'REPLICATION_SEQUENCE'
+    if sequence_file.exists():
+        ReplicationApplier(conn).set_sequence(int(sequence_file.read_text().strip()))
+    conn.commit()
+    return len(rows)
+
+
+def show_status(db_path):
+    staging = staging_path(db_path)
+    path = staging if staging.exists() else Path(db_path)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT sequence, schema_sequence, applied_at FROM replication_state WHERE id = 1").fetchone()
+        mirrored = conn.execute("SELECT COUNT(*) FROM mb_recordings").fetchone()[0]
+    except sqlite3.OperationalError:
+        row, mirrored = None, 0
+    finally:
+        conn.close()
+    if row:
+        print(f"{path.name}: replication sequence {row[0]} (schema {row[1]}), last applied {row[2]}")
+    else:
+        print(f"{path.name}: not seeded yet; run 'seed' with the dump the DB was loaded from")
+    print(f"Mirrored recordings: {mirrored:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply MusicBrainz replication packets to enhanced_music.db")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_seed = sub.add_parser('seed', help="mirror MusicBrainz ids for existing songs from a PostgreSQL dump")
+    p_seed.add_argument('db')
+    p_seed.add_argument('dump_dir')
+    p_apply = sub.add_parser('apply', help="apply replication-*.tar.bz2 packets not yet applied")
+    p_apply.add_argument('db')
+    p_apply.add_argument('packet_dir')
+    p_apply.add_argument('--no-publish', action='store_true', help="leave the changes in the staging DB")
+    p_status = sub.add_parser('status')
+    p_status.add_argument('db')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        show_status(args.db)
+        return
+
+    # Write where the importer writes; readers see the result once it is published
+    staging = prepare_staging(args.db)
+    conn = sqlite3.connect(str(staging))
+    try:
+        if args.command == 'seed':
+            seeded = seed(conn, args.dump_dir)
+            print(f"✅ Mirrored {seeded:,} recordings; replication sequence {ReplicationApplier(conn).sequence()}")
+            publish(conn, args.db)
+        elif args.command == 'apply':
+            start = time.time()
+            applied, counts, missing = apply_packets(conn, args.packet_dir)
+            summary = ', '.join(f"{what} {n:,}" for what, n in sorted(counts.items())) or 'no song changes'
+            print(f"✅ Applied {applied} packet(s) in {time.time() - start:.1f}s: {summary}")
+            if applied:
+                result = aggregate_artists(conn)  # changed songs carry a fresh last_updated
+                print(f"✅ Artist aggregates: {result['artists']:,} artists in {result['seconds']:.1f}s")
+            if applied and not args.no_publish:
+                result = publish(conn, args.db)
+                print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+            if missing is not None:
+                print(f"❌ Packet {missing} is missing from {args.packet_dir}; fetch it and re-run")
+                sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+scripts/response_archive.py
+
+Append-only archive of the raw API responses an import parses, and the
+parsers that turn them into `songs` fields.
+
+Every derived column comes from MusicBrainz search pages and AcousticBrainz
+low-level documents that used to be parsed and dropped. With
+IMPORT_ARCHIVE=<dir> the importer appends each response here, and
+`enhanced-music-importer.py --replay <dir>` rebuilds songs from the archive
+without touching the network, so a schema change or parsing fix does not
+mean re-fetching a million songs at 1 request/second.
+
+Layout, in <dir>:
+
+- `000001.jsonl.zst`, `000002.jsonl.zst`, ...: segments of JSON Lines, one
+  response per line: {"kind", "key", "status", "time", "body"}, body being
+  the response text as received. Each flush writes an independent compressed
+  frame, and a segment rolls over at SEGMENT_BYTES.
+- `000001.idx`: one "offset length records" line per frame, written after
+  the frame itself, so a crash mid-write leaves only an unindexed tail that
+  readers ignore.
+
+Segments are never reopened: each importer run starts a new one. Frames are
+zstd when `zstandard` is installed, gzip otherwise (`.jsonl.gz`); readers
+handle both.
+
+Usage:
+  IMPORT_ARCHIVE=archive python scripts/enhanced-music-importer.py 10000
+  python scripts/enhanced-music-importer.py --replay archive
+  python scripts/response_archive.py stats archive
+"""
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+from harmonic import camelot_code, key_label, parse_key
+from mb_dump import recording_to_song
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+FRAME_RECORDS = 500
+
+MUSICBRAINZ_SEARCH = 'musicbrainz_search'
+ACOUSTICBRAINZ_LOWLEVEL = 'acousticbrainz_lowlevel'
+
+SEGMENT_RE = re.compile(r'^(\d{6})\.jsonl\.(zst|gz)$')
+
+
+# --- Parsing (shared by the live import and replay) ------------------------------
+
+def lowlevel_features(data):
+    """AcousticBrainz /low-level JSON -> {bpm, key, camelot, energy, danceability} (fields found)"""
+    features = {}
+    if 'rhythm' in data:
+        features['bpm'] = data['rhythm'].get('bpm')
+
+    if 'tonal' in data:
+        # Store key with its mode ('A minor') plus the Camelot code ('8A')
+        tonal = data['tonal']
+        parsed = parse_key(tonal.get('key_key'), tonal.get('key_scale'))
+        if parsed:
+            features['key'] = key_label(*parsed)
+            features['camelot'] = camelot_code(*parsed)
+
+    if 'lowlevel' in data:
+        lowlevel = data['lowlevel']
+        if 'energy' in lowlevel and 'mean' in lowlevel['energy']:
+            features['energy'] = lowlevel['energy']['mean']
+        if 'danceability' in lowlevel and 'mean' in lowlevel['danceability']:
+            features['danceability'] = lowlevel['danceability']['mean']
+    return features
+
+
+# --- Writing ---------------------------------------------------------------------
+
+def _compress(data, codec):
+    if codec == 'zst':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == 'zst':
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+def segments(directory):
+    """[(number, path, codec)] in archive order"""
+    found = []
+    for path in Path(directory).glob('*.jsonl.*'):
+        match = SEGMENT_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path, match.group(2)))
+    return sorted(found)
+
+
+class ResponseArchive:
+    """Thread-safe appender; call close() to flush the last frame"""
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, frame_records=FRAME_RECORDS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.frame_records = frame_records
+        self.codec = 'zst' if zstandard is not None else 'gz'
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.records = 0
+        self.data = None
+        self.index = None
+        existing = segments(self.directory)
+        self.number = existing[-1][0] if existing else 0
+        self._next_segment()
+
+    def _next_segment(self):
+        if self.data:
+            self.data.close()
+            self.index.close()
+        self.number += 1
+        self.data = open(self.directory / f"{self.number:06d}.jsonl.{self.codec}", 'ab')
+        self.index = open(self.directory / f"{self.number:06d}.idx", 'a', encoding='utf-8')
+
+    def record(self, kind, key, status, body):
+        """Append one response; `body` is the response text (None to record only the status)"""
+        line = json.dumps({'kind': kind, 'key': key, 'status': status, 'time': round(time.time(), 3), 'body': body},
+                          ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.frame_records:
+                self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        frame = _compress(('\n'.join(self.buffer) + '\n').encode('utf-8'), self.codec)
+        offset = self.data.tell()
+        self.data.write(frame)
+        self.data.flush()
+        self.index.write(f"{offset} {len(frame)} {len(self.buffer)}\n")
+        self.index.flush()
+        self.records += len(self.buffer)
+        self.buffer = []
+        if offset + len(frame) >= self.segment_bytes:
+            self._next_segment()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            if self.data:
+                self.data.close()
+                self.index.close()
+                self.data = None
+
+
+# --- Reading ---------------------------------------------------------------------
+
+def iter_frames(path, codec):
+    """Decompressed frames of one segment, per its index; an unindexed tail is skipped"""
+    index_path = Path(path).with_name(Path(path).name.split('.')[0] + '.idx')
+    if not index_path.exists():
+        return
+    with open(index_path, encoding='utf-8') as index, open(path, 'rb') as data:
+        for line in index:
+            parts = line.split()
+            if len(parts) != 3:
+                break  # torn index line
+            offset, length = int(parts[0]), int(parts[1])
+            data.seek(offset)
+            frame = data.read(length)
+            if len(frame) < length:
+                break
+            yield _decompress(frame, codec)
+
+
+def iter_records(path, codec):
+    for frame in iter_frames(path, codec):
+        for line in frame.decode('utf-8').splitlines():
+            if line:
+                yield json.loads(line)
+
+
+def parse_segment(segment):
+    """
+    (number, songs, features, counts) for one segment. songs are rows from
+    search pages in archive order; features maps mbid -> lowlevel_features.
+    Runs in a worker process during replay.
+    """
+    number, path, codec = segment
+    songs, features = [], {}
+    counts = {'records': 0, 'pages': 0, 'lowlevel': 0, 'errors': 0}
+    for record in iter_records(path, codec):
+        counts['records'] += 1
+        if record.get('status') != 200 or not record.get('body'):
+            continue
+        try:
+            body = json.loads(record['body'])
+            if record['kind'] == MUSICBRAINZ_SEARCH:
+                counts['pages'] += 1
+                genre = record['key']['tag']
+                songs.extend(recording_to_song(recording, [genre]) for recording in body.get('recordings', []))
+            elif record['kind'] == ACOUSTICBRAINZ_LOWLEVEL:
+                counts['lowlevel'] += 1
+                features[record['key']['mbid']] = lowlevel_features(body)
+        except (ValueError, KeyError, TypeError, AttributeError, IndexError):
+            counts['errors'] += 1
+    return number, songs, features, counts
+
+
+def replay(directory, workers=None):
+    """Yield parse_segment() results in archive order, parsing segments in parallel"""
+    found = segments(directory)
+    if not found:
+        return
+    workers = workers or min(len(found), os.cpu_count() or 1)
+    if workers <= 1:
+        for segment in found:
+            yield parse_segment(segment)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(parse_segment, found)
+
+
+def archive_stats(directory):
+    """Per-segment file sizes and record counts by kind (reads every frame)"""
+    rows = []
+    for number, path, codec in segments(directory):
+        kinds = {}
+        for record in iter_records(path, codec):
+            kinds[record['kind']] = kinds.get(record['kind'], 0) + 1
+        rows.append((number, path.stat().st_size, kinds))
+    return rows
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != 'stats':
+        print("Usage: python scripts/response_archive.py stats <archive dir>")
+        sys.exit(1)
+    total_bytes, totals = 0, {}
+    for number, size, kinds in archive_stats(sys.argv[2]):
+        total_bytes += size
+        for kind, count in kinds.items():
+            totals[kind] = totals.get(kind, 0) + count
+        print(f"  {number:06d}: {size / (1024 * 1024):.1f} MB, " + ', '.join(f"{k} {v:,}" for k, v in sorted(kinds.items())))
+    print(f"✅ {sum(totals.values()):,} responses in {total_bytes / (1024 * 1024):.1f} MB: "
+          + ', '.join(f"{k} {v:,}" for k, v in sorted(totals.items())))
+
+
+if __name__ == '__main__':
+    main()
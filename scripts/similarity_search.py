@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+scripts/similarity_search.py
+
+"Songs like this one" queries over the audio embedding index.
+
+Loads the FAISS index once (memory-mapped where the index type allows it),
+answers k-NN by features id or by an audio file, and optionally post-filters
+neighbours on `features` columns (BPM range, key). Results are read from
+`audio_features.db`, which maps the index ids back to files.
+
+Usage:
+  python scripts/similarity_search.py song 42 --k 10 --bpm 120-130 --key 8A
+  python scripts/similarity_search.py file audio/track.mp3 --k 5
+  python scripts/similarity_search.py serve --port 8765   # GET /similar?id=42&k=10
+  python scripts/similarity_search.py bench --queries 1000 --k 10
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from audio_features import AudioDecodeError, extract
+from audio_index import FAISS_INDEX_PATH, SEARCH_INDEX_PATH, faiss, unwrap
+from embedding_store import load_vectors
+from harmonic import to_camelot
+
+ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = ROOT / "audio_features.db"
+
+# How many extra neighbours to pull per round when post-filters drop results
+OVERFETCH = 4
+MAX_FETCH = 4096
+
+
+def parse_range(text):
+    """'120-130' -> (120.0, 130.0)"""
+    if not text:
+        return None
+    low, _, high = text.partition('-')
+    return (float(low), float(high or low))
+
+
+class SimilarityIndex:
+    """k-NN over the audio embedding index with features-table post-filters"""
+
+    def __init__(self, index_path=None, db_path=DB_PATH):
+        if index_path is None:
+            index_path = SEARCH_INDEX_PATH if SEARCH_INDEX_PATH.exists() else FAISS_INDEX_PATH
+        self.index_path = Path(index_path)
+        self.index = self._load(self.index_path)
+        self.db_path = db_path
+        # One read-only connection per thread: `serve` answers requests concurrently
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return conn
+
+    @staticmethod
+    def _load(path):
+        if not path.exists():
+            raise FileNotFoundError(f"No FAISS index at {path}. Run extract_audio_features.py first.")
+        try:
+            # Memory-map the vectors so startup does not read the whole file
+            index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            index = faiss.read_index(str(path))
+        # IVF indexes need a direct map before vectors can be reconstructed; build
+        # it here, once, rather than from whichever request thread needs it first
+        ivf = faiss.try_extract_index_ivf(unwrap(index))
+        if ivf is not None:
+            ivf.make_direct_map()
+        return index
+
+    def vector_for(self, song_id):
+        """Stored embedding for a features id (exact BLOB first, index reconstruction as fallback)"""
+        stored = load_vectors(self.conn, 'features', [int(song_id)])
+        if stored:
+            return stored[int(song_id)].reshape(1, -1)
+        try:
+            return self.index.reconstruct(int(song_id)).reshape(1, -1)
+        except RuntimeError:
+            raise KeyError(f"Song {song_id} is not in the index")
+
+    def _rows(self, ids):
+        placeholders = ','.join('?' * len(ids))
+        cursor = self.conn.execute(
+            f"SELECT id, filename, bpm, key, energy, danceability FROM features WHERE id IN ({placeholders})",
+            [int(i) for i in ids],
+        )
+        return {row[0]: row for row in cursor}
+
+    def search(self, vector, k=10, bpm_range=None, key=None, exclude_id=None):
+        """Top-k neighbours of `vector`, post-filtered on bpm range / key"""
+        vector = np.ascontiguousarray(vector, dtype='float32').reshape(1, -1)
+        filtered = bpm_range is not None or key is not None
+        # Compare keys as Camelot codes so 'Am', 'A minor' and '8A' all match
+        key_code = to_camelot(key) if key is not None else None
+        if key is not None and key_code is None:
+            raise ValueError(f"Unrecognized key '{key}' (expected e.g. 'A minor', Am or 8A)")
+        fetch = k + 1 if not filtered else (k + 1) * OVERFETCH
+        ntotal = self.index.ntotal
+
+        while True:
+            fetch = min(fetch, ntotal, MAX_FETCH)
+            scores, ids = self.index.search(vector, fetch)
+            hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0 and i != exclude_id]
+            rows = self._rows([i for i, _ in hits]) if hits else {}
+
+            results = []
+            for song_id, score in hits:
+                row = rows.get(song_id)
+                if row is None:
+                    continue
+                _, filename, bpm, song_key, energy, danceability = row
+                if bpm_range is not None and (bpm is None or not bpm_range[0] <= bpm <= bpm_range[1]):
+                    continue
+                if key_code is not None and to_camelot(song_key) != key_code:
+                    continue
+                results.append({
+                    'id': song_id,
+                    'filename': filename,
+                    'score': score,
+                    'bpm': bpm,
+                    'key': song_key,
+                    'energy': energy,
+                    'danceability': danceability,
+                })
+                if len(results) == k:
+                    return results
+
+            # Not enough survivors: widen the candidate set unless we already saw everything
+            if fetch >= ntotal or fetch >= MAX_FETCH:
+                return results
+            fetch *= OVERFETCH
+
+    def similar_to_song(self, song_id, k=10, **filters):
+        return self.search(self.vector_for(song_id), k=k, exclude_id=int(song_id), **filters)
+
+    def similar_to_file(self, path, k=10, **filters):
+        return self.search(embed_file(path), k=k, **filters)
+
+
+def embed_file(path):
+    """Embedding for an audio file from the extractors' registered 'embedding' feature"""
+    features, _ = extract(path, names=('embedding',))
+    if features['embedding'] is None:
+        raise ValueError(f"Could not compute an embedding for {path}")
+    return features['embedding'].reshape(1, -1)
+
+
+def serve(engine, host, port):
+    """Minimal local HTTP endpoint: GET /similar?id=42&k=10&bpm=120-130&key=A"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/similar':
+                self._send(404, {'error': 'Not found'})
+                return
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                results = engine.similar_to_song(
+                    int(params['id']),
+                    k=int(params.get('k', 10)),
+                    bpm_range=parse_range(params.get('bpm')),
+                    key=params.get('key'),
+                )
+            except (KeyError, ValueError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            except Exception as e:
+                self._send(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            self._send(200, {'results': results})
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving similarity search on http://{host}:{port}/similar?id=<song id>&k=10")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def benchmark(engine, n_queries, k, bpm_range=None, key=None):
+    """Report QPS and latency percentiles for by-id queries over random indexed songs"""
+    ids = [row[0] for row in engine.conn.execute("SELECT id FROM features")]
+    if not ids:
+        print("No songs in the features table to query.")
+        return None
+    rng = np.random.default_rng(0)
+    sample = rng.choice(ids, size=n_queries, replace=len(ids) < n_queries)
+
+    latencies = []
+    start = time.perf_counter()
+    for song_id in sample:
+        t0 = time.perf_counter()
+        try:
+            engine.similar_to_song(int(song_id), k=k, bpm_range=bpm_range, key=key)
+        except KeyError:
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+
+    if not latencies:
+        print("None of the sampled songs are in the index.")
+        return None
+    lat = np.asarray(latencies)
+    stats = {
+        'queries': len(lat),
+        'qps': len(lat) / total if total > 0 else 0.0,
+        'mean_ms': float(lat.mean()),
+        'p50_ms': float(np.percentile(lat, 50)),
+        'p99_ms': float(np.percentile(lat, 99)),
+    }
+    print(f"Index: {engine.index_path.name} ({engine.index.ntotal:,} vectors)")
+    print(f"Queries: {stats['queries']:,} | QPS: {stats['qps']:.0f} | mean: {stats['mean_ms']:.2f}ms | p50: {stats['p50_ms']:.2f}ms | p99: {stats['p99_ms']:.2f}ms")
+    return stats
+
+
+def _print_results(results):
+    if not results:
+        print("No matches.")
+    for r in results:
+        bpm = f"{r['bpm']:.1f}" if r['bpm'] else "N/A"
+        print(f"  {r['score']:.3f}  [{r['id']}] {r['filename']} | BPM: {bpm} | Key: {r['key']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find songs that sound like a given song or audio file")
+    parser.add_argument('--index', default=None, help="FAISS index (default: openl3.search.index, else openl3.index)")
+    parser.add_argument('--db', default=str(DB_PATH), help="features database")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_filters(p):
+        p.add_argument('--k', type=int, default=10)
+        p.add_argument('--bpm', default=None, help="BPM range filter, e.g. 120-130")
+        p.add_argument('--key', default=None, help="key filter, e.g. 'A minor', Am or 8A")
+
+    p_song = sub.add_parser('song', help="neighbours of an indexed song (features id)")
+    p_song.add_argument('id', type=int)
+    add_filters(p_song)
+
+    p_file = sub.add_parser('file', help="neighbours of an audio file")
+    p_file.add_argument('path')
+    add_filters(p_file)
+
+    p_serve = sub.add_parser('serve', help="local HTTP endpoint")
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8765)
+
+    p_bench = sub.add_parser('bench', help="QPS / p99 latency benchmark")
+    p_bench.add_argument('--queries', type=int, default=1000)
+    add_filters(p_bench)
+
+    args = parser.parse_args()
+
+    try:
+        engine = SimilarityIndex(args.index, args.db)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.command == 'serve':
+        serve(engine, args.host, args.port)
+        return
+
+    if args.key is not None and to_camelot(args.key) is None:
+        print(f"❌ Unrecognized key '{args.key}' (expected e.g. 'A minor', Am or 8A)")
+        sys.exit(1)
+    filters = {'bpm_range': parse_range(args.bpm), 'key': args.key}
+    if args.command == 'bench':
+        benchmark(engine, args.queries, args.k, **filters)
+    elif args.command == 'song':
+        try:
+            _print_results(engine.similar_to_song(args.id, k=args.k, **filters))
+        except KeyError as e:
+            print(e)
+            sys.exit(1)
+    else:
+        try:
+            _print_results(engine.similar_to_file(args.path, k=args.k, **filters))
+        except (AudioDecodeError, ValueError) as e:
+            print(e)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+scripts/song_embeddings.py
+
+Copy OpenL3 embeddings from audio_features.db (`features`, keyed by audio
+filename) into enhanced_music.db `songs.embedding`, which is what
+MusicScorer's seed mode ("more like this") reads.
+
+The two databases share no key, so each audio file is first linked to a
+song, in `song_audio`:
+
+- an MBID anywhere in the file path (`.../<mbid>.mp3`) matches songs.mbid
+- otherwise an "Artist - Title" file stem matches the songs.artist_norm /
+  title_norm search keys (see text_normalize.py); ambiguous stems (several
+  songs with the same keys) are left unlinked
+
+Links are recomputed on every run, so renamed or re-extracted files follow
+along. Only songs whose stored embedding differs are rewritten; they get a
+fresh last_updated like other in-place writers. Songs that no longer have a
+linked audio file (removed, or now linked to nothing) get embedding NULL
+again and score 0 similarity.
+
+Usage:
+  python scripts/song_embeddings.py enhanced_music.db audio_features.db
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from text_normalize import ensure_search_keys, search_key
+
+ROOT = Path(__file__).resolve().parents[1]
+AUDIO_FEATURES_DB = Path(os.environ.get('AUDIO_FEATURES_DB', ROOT / 'audio_features.db'))
+
+_MBID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+
+SONG_AUDIO_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS song_audio (
+        song_id TEXT PRIMARY KEY,
+        feature_id INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        matched_by TEXT NOT NULL
+    );
+"""
+
+
+def parse_filename(filename):
+    """(mbid or None, (artist key, title key) or None) from an audio path"""
+    match = _MBID_RE.search(filename)
+    mbid = match.group(0).lower() if match else None
+    artist, sep, title = Path(filename).stem.partition(' - ')
+    keys = (search_key(artist), search_key(title)) if sep else None
+    return mbid, keys if keys and all(keys) else None
+
+
+def link_songs(conn, features_conn):
+    """Rebuild song_audio from the features table; returns songs linked {'mbid', 'name'} and files 'unmatched'"""
+    ensure_search_keys(conn)
+    conn.executescript(SONG_AUDIO_SCHEMA)
+    links = {}
+    unmatched = 0
+    rows = features_conn.execute("SELECT id, filename FROM features WHERE embedding IS NOT NULL").fetchall()
+    for feature_id, filename in rows:
+        mbid, keys = parse_filename(filename)
+        song_id, matched_by = None, None
+        if mbid:
+            row = conn.execute("SELECT id FROM songs WHERE mbid = ?", (mbid,)).fetchone()
+            song_id, matched_by = (row[0], 'mbid') if row else (None, None)
+        if song_id is None and keys:
+            found = conn.execute("SELECT id FROM songs WHERE artist_norm = ? AND title_norm = ? LIMIT 2", keys).fetchall()
+            song_id, matched_by = (found[0][0], 'name') if len(found) == 1 else (None, None)
+        if song_id is None:
+            unmatched += 1
+            continue
+        if matched_by == 'name' and links.get(song_id, (None,) * 4)[3] == 'mbid':
+            continue  # an MBID link beats an artist/title one
+        links[song_id] = (song_id, feature_id, filename, matched_by)  # otherwise a later file for the same song wins
+    conn.execute("DELETE FROM song_audio")
+    conn.executemany("INSERT INTO song_audio (song_id, feature_id, filename, matched_by) VALUES (?, ?, ?, ?)",
+                     list(links.values()))
+    conn.commit()
+    counts = {'mbid': 0, 'name': 0, 'unmatched': unmatched}
+    for _, _, _, matched_by in links.values():
+        counts[matched_by] += 1
+    return counts
+
+
+def clear_unlinked(conn):
+    """NULL songs.embedding where song_audio has no link any more; returns songs cleared"""
+    cleared = conn.execute("""
+        UPDATE songs SET embedding = NULL, last_updated = CURRENT_TIMESTAMP
+        WHERE embedding IS NOT NULL AND id NOT IN (SELECT song_id FROM song_audio)
+    """).rowcount
+    conn.commit()
+    return cleared
+
+
+def copy_embeddings(conn, features_conn, batch_size=1000):
+    """Write linked features.embedding BLOBs to songs.embedding; returns songs updated"""
+    links = conn.execute("SELECT song_id, feature_id FROM song_audio").fetchall()
+    updated = 0
+    for start in range(0, len(links), batch_size):
+        batch = links[start:start + batch_size]
+        placeholders = ','.join('?' * len(batch))
+        blobs = dict(features_conn.execute(
+            f"SELECT id, embedding FROM features WHERE id IN ({placeholders})", [f for _, f in batch]))
+        before = conn.total_changes
+        conn.executemany(
+            "UPDATE songs SET embedding = ?, last_updated = CURRENT_TIMESTAMP WHERE id = ? AND embedding IS NOT ?",
+            [(blobs[f], s, blobs[f]) for s, f in batch if blobs.get(f) is not None])
+        updated += conn.total_changes - before
+        conn.commit()
+    return updated
+
+
+def sync_song_embeddings(conn, features_path=AUDIO_FEATURES_DB):
+    """Link and copy in one go; returns None when there is no features DB"""
+    if not Path(features_path).exists():
+        return None
+    start = time.time()
+    features_conn = sqlite3.connect(f"file:{features_path}?mode=ro", uri=True)
+    try:
+        result = link_songs(conn, features_conn)
+        result['updated'] = copy_embeddings(conn, features_conn)
+        result['cleared'] = clear_unlinked(conn)
+    finally:
+        features_conn.close()
+    result['seconds'] = time.time() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy audio embeddings into songs.embedding")
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    parser.add_argument('features_db', nargs='?', default=str(AUDIO_FEATURES_DB))
+    args = parser.parse_args()
+
+    for path in (args.db, args.features_db):
+        if not os.path.exists(path):
+            print(f"❌ Database not found: {path}")
+            sys.exit(1)
+    conn = sqlite3.connect(args.db)
+    try:
+        result = sync_song_embeddings(conn, args.features_db)
+    finally:
+        conn.close()
+    print(f"✅ Linked {result['mbid'] + result['name']:,} audio files ({result['mbid']:,} by MBID, "
+          f"{result['name']:,} by artist/title, {result['unmatched']:,} unmatched); "
+          f"{result['updated']:,} song embeddings written, {result['cleared']:,} cleared in {result['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+scripts/song_stats.py
+
+Coverage statistics for `songs`, kept current by triggers.
+
+- `song_stats`: one row per counter. `total` counts the songs, each column
+  in STATS_COLUMNS has a non-null count, `bpm_sum` supports the average, and
+  `unique_artists` counts distinct artists.
+- `genre_counts`: songs per genre (from the `genres` JSON array)
+- `artist_counts`: songs per artist
+
+Triggers fire on INSERT, DELETE and UPDATE of `songs`, so the numbers stay
+right whichever script writes the table. Updates that keep artist and genres
+(enrichment, mood tagging) only adjust the column counters, which keeps bulk
+UPDATEs fast. `INSERT OR REPLACE` deletes the old
+row without firing DELETE triggers unless `PRAGMA recursive_triggers` is on;
+`ensure_song_stats()` turns it on for the connection it is given, and
+writers on other connections should use an upsert or set the pragma too.
+`rebuild` recomputes everything with one scan if the counts ever drift.
+
+Verification reports read these tables instead of scanning `songs`.
+`install` and `rebuild` write the staging DB and publish it (db_publish.py),
+like every other writer; `show` reads the published file.
+
+Usage:
+  python scripts/song_stats.py install enhanced_music.db   # tables + triggers + initial counts
+  python scripts/song_stats.py rebuild enhanced_music.db   # recount from scratch
+  python scripts/song_stats.py show enhanced_music.db
+"""
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+from db_publish import prepare_staging, publish
+
+STATS_COLUMNS = (
+    'artist', 'album', 'genres', 'moods', 'tags', 'bpm', 'key', 'camelot', 'energy', 'danceability',
+    'valence', 'popularity_score', 'release_year', 'duration_ms', 'embedding',
+)
+STAT_NAMES = ('total', 'bpm_sum', 'unique_artists') + STATS_COLUMNS
+
+STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS song_stats (
+        name TEXT PRIMARY KEY,
+        value NUMERIC NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS genre_counts (
+        genre TEXT PRIMARY KEY,
+        songs INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS artist_counts (
+        artist TEXT PRIMARY KEY,
+        songs INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_genre_counts_songs ON genre_counts(songs DESC);
+    CREATE INDEX IF NOT EXISTS idx_artist_counts_songs ON artist_counts(songs DESC);
+"""
+
+
+def _genres(ref):
+    # Malformed JSON must not abort the write, so it counts as no genres
+    return (f"(SELECT DISTINCT value FROM json_each(CASE WHEN json_valid({ref}.genres) "
+            f"THEN {ref}.genres ELSE '[]' END) WHERE type = 'text')")
+
+
+def _column_delta(sign, ref):
+    cases = ' '.join(f"WHEN '{col}' THEN ({ref}.{col} IS NOT NULL)" for col in STATS_COLUMNS)
+    return (f"UPDATE song_stats SET value = value {sign} CASE name WHEN 'total' THEN 1 "
+            f"WHEN 'bpm_sum' THEN COALESCE({ref}.bpm, 0) {cases} ELSE 0 END "
+            f"WHERE name <> 'unique_artists';")
+
+
+def _column_change():
+    """Counter delta for an update that keeps artist and genres: no histogram work"""
+    cases = ' '.join(f"WHEN '{col}' THEN (NEW.{col} IS NOT NULL) - (OLD.{col} IS NOT NULL)" for col in STATS_COLUMNS)
+    return (f"UPDATE song_stats SET value = value + CASE name "
+            f"WHEN 'bpm_sum' THEN COALESCE(NEW.bpm, 0) - COALESCE(OLD.bpm, 0) {cases} ELSE 0 END "
+            f"WHERE name NOT IN ('total', 'unique_artists');")
+
+
+def _add(ref):
+    return f"""
+        {_column_delta('+', ref)}
+        UPDATE song_stats SET value = value + 1 WHERE name = 'unique_artists'
+            AND {ref}.artist IS NOT NULL AND NOT EXISTS (SELECT 1 FROM artist_counts WHERE artist = {ref}.artist);
+        INSERT INTO artist_counts (artist, songs) SELECT {ref}.artist, 1 WHERE {ref}.artist IS NOT NULL
+            ON CONFLICT(artist) DO UPDATE SET songs = songs + 1;
+        INSERT INTO genre_counts (genre, songs) SELECT value, 1 FROM {_genres(ref)} WHERE true
+            ON CONFLICT(genre) DO UPDATE SET songs = songs + 1;
+    """
+
+
+def _remove(ref):
+    return f"""
+        {_column_delta('-', ref)}
+        UPDATE artist_counts SET songs = songs - 1 WHERE artist = {ref}.artist;
+        UPDATE song_stats SET value = value - 1 WHERE name = 'unique_artists'
+            AND EXISTS (SELECT 1 FROM artist_counts WHERE artist = {ref}.artist AND songs <= 0);
+        DELETE FROM artist_counts WHERE artist = {ref}.artist AND songs <= 0;
+        UPDATE genre_counts SET songs = songs - 1 WHERE genre IN {_genres(ref)};
+        DELETE FROM genre_counts WHERE songs <= 0;
+    """
+
+
+def _triggers():
+    watched = ', '.join(STATS_COLUMNS)
+    return f"""
+        DROP TRIGGER IF EXISTS songs_stats_insert;
+        DROP TRIGGER IF EXISTS songs_stats_delete;
+        DROP TRIGGER IF EXISTS songs_stats_update;
+        DROP TRIGGER IF EXISTS songs_stats_update_columns;
+        CREATE TRIGGER songs_stats_insert AFTER INSERT ON songs BEGIN {_add('NEW')} END;
+        CREATE TRIGGER songs_stats_delete AFTER DELETE ON songs BEGIN {_remove('OLD')} END;
+        CREATE TRIGGER songs_stats_update AFTER UPDATE OF {watched} ON songs
+            WHEN OLD.artist IS NOT NEW.artist OR OLD.genres IS NOT NEW.genres BEGIN
+            {_remove('OLD')}
+            {_add('NEW')}
+        END;
+        CREATE TRIGGER songs_stats_update_columns AFTER UPDATE OF {watched} ON songs
+            WHEN OLD.artist IS NEW.artist AND OLD.genres IS NEW.genres BEGIN
+            {_column_change()}
+        END;
+    """
+
+
+def rebuild_song_stats(conn):
+    """Recount everything with one pass over songs (plus one json_each pass for genres)"""
+    counts = ', '.join(f"COUNT({col})" for col in STATS_COLUMNS)
+    row = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(bpm), 0), COUNT(DISTINCT artist), {counts} FROM songs").fetchone()
+    conn.execute("DELETE FROM song_stats")
+    conn.executemany("INSERT INTO song_stats (name, value) VALUES (?, ?)", zip(STAT_NAMES, row))
+
+    conn.execute("DELETE FROM artist_counts")
+    conn.execute("INSERT INTO artist_counts (artist, songs) SELECT artist, COUNT(*) FROM songs WHERE artist IS NOT NULL GROUP BY artist")
+    conn.execute("DELETE FROM genre_counts")
+    conn.execute("""
+        INSERT INTO genre_counts (genre, songs)
+        SELECT g.value, COUNT(DISTINCT s.rowid)
+        FROM songs s, json_each(CASE WHEN json_valid(s.genres) THEN s.genres ELSE '[]' END) g
+        WHERE g.type = 'text'
+        GROUP BY g.value
+    """)
+    conn.commit()
+
+
+def ensure_song_stats(conn):
+    """Create the stats tables and triggers; counts are built on first install"""
+    conn.execute("PRAGMA recursive_triggers = ON")  # INSERT OR REPLACE then fires the DELETE trigger
+    conn.executescript(STATS_SCHEMA)
+    conn.executescript(_triggers())
+    present = {row[0] for row in conn.execute("SELECT name FROM song_stats")}
+    if present != set(STAT_NAMES):
+        rebuild_song_stats(conn)
+    conn.commit()
+
+
+def read_song_stats(conn):
+    """{'total': ..., 'bpm': ..., 'bpm_sum': ..., 'unique_artists': ...}, or None if not installed"""
+    try:
+        rows = conn.execute("SELECT name, value FROM song_stats").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return dict(rows) if rows else None
+
+
+def top_genres(conn, limit=10):
+    return conn.execute("SELECT genre, songs FROM genre_counts ORDER BY songs DESC LIMIT ?", (limit,)).fetchall()
+
+
+def top_artists(conn, limit=10):
+    return conn.execute("SELECT artist, songs FROM artist_counts ORDER BY songs DESC LIMIT ?", (limit,)).fetchall()
+
+
+def genre_songs(conn, genre):
+    row = conn.execute("SELECT songs FROM genre_counts WHERE genre = ?", (genre,)).fetchone()
+    return row[0] if row else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigger-maintained coverage statistics for songs")
+    parser.add_argument('command', choices=['install', 'rebuild', 'show'])
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Database not found at {args.db}")
+        sys.exit(1)
+
+    writing = args.command in ('install', 'rebuild')
+    conn = sqlite3.connect(str(prepare_staging(args.db)) if writing else args.db)
+    try:
+        if args.command == 'install':
+            ensure_song_stats(conn)
+            print("✅ song_stats, genre_counts and artist_counts are maintained by triggers")
+        elif args.command == 'rebuild':
+            ensure_song_stats(conn)
+            rebuild_song_stats(conn)
+            print("✅ Statistics recounted")
+        if writing:
+            result = publish(conn, args.db)
+            print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+        stats = read_song_stats(conn)
+        if stats is None:
+            print("No statistics yet; run 'install' first")
+            sys.exit(1)
+        total = stats['total']
+        print(f"Total songs: {total:,} | unique artists: {stats['unique_artists']:,}")
+        for col in STATS_COLUMNS:
+            print(f"  {col:18} {stats[col]:>10,} ({100 * stats[col] / max(total, 1):.1f}%)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+scripts/text_normalize.py
+
+One normalizer for song titles, artist names and queries, so the values
+stored at write time and the values looked up at query time always agree.
+
+- normalize_text(): casefold, accents and apostrophes stripped, other
+  punctuation turned into spaces, whitespace collapsed
+  ("Beyoncé" -> "beyonce", "Guns N' Roses" -> "guns n roses")
+- search_key(): normalize_text() without a leading "the"
+  ("The Weeknd" -> "weeknd"), stored in songs.title_norm / songs.artist_norm
+
+The importer and replication write both key columns with every title/artist
+they store, and ensure_search_keys() indexes them and backfills rows written
+before the columns existed (or by another writer). Readers then match
+`artist_norm = ?` exactly, or by prefix with prefix_range(), as index
+lookups instead of `LOWER(artist) LIKE` scans.
+
+Usage:
+  python scripts/text_normalize.py enhanced_music.db     # add, backfill and index the key columns
+  python scripts/text_normalize.py --key "The Weeknd"    # -> weeknd
+
+The backfill works on the staging DB and publishes when done (db_publish.py).
+"""
+import argparse
+import re
+import sqlite3
+import time
+import unicodedata
+
+from db_publish import prepare_staging, publish
+
+_NON_WORD_RE = re.compile(r"[^\w]+|_")
+_APOSTROPHE_RE = re.compile(r"['’`]")
+
+SEARCH_KEY_COLUMNS = {'title_norm': 'title', 'artist_norm': 'artist'}
+
+SEARCH_KEY_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_songs_title_norm ON songs(title_norm);
+    CREATE INDEX IF NOT EXISTS idx_songs_artist_norm ON songs(artist_norm);
+"""
+
+
+def normalize_text(text):
+    """Casefold, strip accents and punctuation, collapse whitespace"""
+    text = text or ''
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    text = _APOSTROPHE_RE.sub('', text.casefold())
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+
+def search_key(text):
+    """normalize_text() minus a leading "the" (kept when it is the whole name)"""
+    key = normalize_text(text)
+    return key[4:] if key.startswith('the ') else key
+
+
+def prefix_range(key):
+    """(low, high) bounds so `col >= low AND col < high` matches keys starting with `key`"""
+    return key, (key[:-1] + chr(ord(key[-1]) + 1)) if key else '\U0010ffff'
+
+
+def ensure_search_keys(conn):
+    """Add the key columns if missing, fill rows that lack them, index them; returns rows filled"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(songs)")}
+    for column in SEARCH_KEY_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE songs ADD COLUMN {column} TEXT")
+    conn.create_function('search_key', 1, search_key, deterministic=True)
+    assignments = ', '.join(f"{key} = search_key({column})" for key, column in SEARCH_KEY_COLUMNS.items())
+    missing = ' OR '.join(f"{key} IS NULL" for key in SEARCH_KEY_COLUMNS)
+    filled = conn.execute(f"UPDATE songs SET {assignments} WHERE {missing}").rowcount
+    conn.executescript(SEARCH_KEY_INDEXES)
+    conn.commit()
+    return filled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalized title/artist search keys")
+    parser.add_argument('db', nargs='?', default='enhanced_music.db')
+    parser.add_argument('--key', help="print the search key of a string and exit")
+    args = parser.parse_args()
+
+    if args.key is not None:
+        print(search_key(args.key))
+        return
+    start = time.time()
+    conn = sqlite3.connect(str(prepare_staging(args.db)))
+    try:
+        filled = ensure_search_keys(conn)
+        print(f"✅ Search keys: filled {filled:,} songs in {time.time() - start:.1f}s")
+        result = publish(conn, args.db)
+        print(f"✅ Published {args.db} ({result['size_mb']:.1f} MB)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,27 @@
 import sqlite3
 import os
 import json
+import sys
+
+import song_stats
 
 db_path = 'enhanced_music.db'
 size_mb = os.path.getsize(db_path) / (1024 * 1024)
 
-conn = sqlite3.connect(db_path)
+# Read-only: verification never takes a write lock on a DB being imported into
+conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
 cursor = conn.cursor()
 
-# Total songs
-cursor.execute('SELECT COUNT(*) FROM songs')
-total = cursor.fetchone()[0]
-
-# Songs with audio features
-cursor.execute('SELECT COUNT(*) FROM songs WHERE bpm IS NOT NULL')
-with_bpm = cursor.fetchone()[0]
-
-cursor.execute('SELECT COUNT(*) FROM songs WHERE energy IS NOT NULL')
-with_energy = cursor.fetchone()[0]
+# Coverage comes from the trigger-maintained stats tables (no full scans)
+stats = song_stats.read_song_stats(conn)
+if stats is None:
+    print("❌ No song_stats yet. Run: python scripts/song_stats.py install enhanced_music.db")
+    sys.exit(1)
 
-cursor.execute('SELECT COUNT(*) FROM songs WHERE popularity IS NOT NULL')
-with_popularity = cursor.fetchone()[0]
+total = stats['total']
+with_bpm = stats['bpm']
+with_energy = stats['energy']
+with_popularity = stats['popularity_score']
 
 # Sample songs
 cursor.execute('''
@@ -35,14 +36,7 @@ cursor.execute('''
 samples = cursor.fetchall()
 
 # Genre distribution
-cursor.execute('''
-    SELECT json_extract(value, '$') as genre, COUNT(*) as count
-    FROM songs, json_each(songs.genres, '$')
-    GROUP BY genre
-    ORDER BY count DESC
-    LIMIT 10
-''')
-top_genres = cursor.fetchall()
+top_genres = song_stats.top_genres(conn, 10)
 
 print("\n" + "=" * 70)
 print("PHASE 1 VERIFICATION REPORT")
@@ -52,9 +46,9 @@ print(f"  Total songs:        {total:,}")
 print(f"  Database size:      {size_mb:.1f} MB")
 
 print(f"\n🎵 AUDIO FEATURES COVERAGE:")
-print(f"  Songs with BPM:     {with_bpm:,} ({100*with_bpm/total:.1f}%)")
-print(f"  Songs with Energy:  {with_energy:,} ({100*with_energy/total:.1f}%)")
-print(f"  Songs with Pop.:    {with_popularity:,} ({100*with_popularity/total:.1f}%)")
+print(f"  Songs with BPM:     {with_bpm:,} ({100*with_bpm/max(total,1):.1f}%)")
+print(f"  Songs with Energy:  {with_energy:,} ({100*with_energy/max(total,1):.1f}%)")
+print(f"  Songs with Pop.:    {with_popularity:,} ({100*with_popularity/max(total,1):.1f}%)")
 
 print(f"\n🎸 TOP GENRES BY COUNT:")
 for genre, count in top_genres:
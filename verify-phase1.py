@@ -4,6 +4,12 @@
 import sqlite3
 import os
 import sys
+import json
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+import song_stats
 
 db_path = 'enhanced_music.db'
 
@@ -11,10 +17,16 @@ if not os.path.exists(db_path):
     print('❌ Database not found at ' + db_path)
     sys.exit(1)
 
-conn = sqlite3.connect(db_path)
+# Read-only, and every count below comes from the trigger-maintained stats tables
+conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
 conn.row_factory = sqlite3.Row
 cursor = conn.cursor()
 
+stats = song_stats.read_song_stats(conn)
+if stats is None:
+    print('❌ No song_stats yet. Run: python scripts/song_stats.py install ' + db_path)
+    sys.exit(1)
+
 print('🔍 DATABASE VERIFICATION - PHASE 1')
 print('=' * 70)
 print()
@@ -29,18 +41,16 @@ for table in tables:
 print()
 
 # 2. Count songs
-cursor.execute('SELECT COUNT(*) as count FROM songs')
-total_songs = cursor.fetchone()['count']
+total_songs = stats['total']
 print(f'🎵 TOTAL SONGS: {total_songs:,}')
 
 # 3. Genre coverage
-cursor.execute("SELECT COUNT(DISTINCT genre) as count FROM songs")
+cursor.execute("SELECT COUNT(*) as count FROM genre_counts")
 genres = cursor.fetchone()['count']
 print(f'🎭 UNIQUE GENRES: {genres}')
 
 # 4. BPM coverage
-cursor.execute('SELECT COUNT(*) as count FROM songs WHERE bpm IS NOT NULL')
-bpm_count = cursor.fetchone()['count']
+bpm_count = stats['bpm']
 bpm_pct = (bpm_count / total_songs * 100) if total_songs > 0 else 0
 print(f'🎚️  BPM DATA: {bpm_count:,} songs ({bpm_pct:.1f}%)')
 
@@ -48,51 +58,41 @@ print(f'🎚️  BPM DATA: {bpm_count:,} songs ({bpm_pct:.1f}%)')
 print()
 print('📝 SAMPLE SONGS (Random 5):')
 print('-' * 70)
-cursor.execute('''
-    SELECT title, artist, genre, bpm 
-    FROM songs 
-    ORDER BY RANDOM() 
-    LIMIT 5
-''')
-for i, row in enumerate(cursor.fetchall(), 1):
+# Random rowid probes instead of ORDER BY RANDOM(), which sorts the whole table
+max_rowid = cursor.execute('SELECT MAX(rowid) FROM songs').fetchone()[0] or 0
+samples = []
+for _ in range(5 if max_rowid else 0):
+    cursor.execute('SELECT title, artist, genres, bpm FROM songs WHERE rowid >= ? LIMIT 1', (random.randint(1, max_rowid),))
+    samples.extend(cursor.fetchall())
+for i, row in enumerate(samples, 1):
+    try:
+        genre = ', '.join(json.loads(row["genres"])[:2]) if row["genres"] else 'N/A'
+    except ValueError:
+        genre = row["genres"]
     print(f'{i}. "{row["title"]}" by {row["artist"]}')
-    print(f'   Genre: {row["genre"]} | BPM: {row["bpm"] or "N/A"}')
+    print(f'   Genre: {genre} | BPM: {row["bpm"] or "N/A"}')
     print()
 
 # 6. Genre distribution
 print('🎭 TOP 15 GENRES BY COUNT:')
 print('-' * 70)
-cursor.execute('''
-    SELECT genre, COUNT(*) as count 
-    FROM songs 
-    GROUP BY genre 
-    ORDER BY count DESC 
-    LIMIT 15
-''')
-for row in cursor.fetchall():
-    bar = '█' * int(row['count'] / 20)
-    pct = (row['count'] / total_songs * 100)
-    print(f'{row["genre"]:30} {row["count"]:4} ({pct:4.1f}%) {bar}')
+for genre, count in song_stats.top_genres(conn, 15):
+    bar = '█' * int(count / 20)
+    pct = (count / max(total_songs, 1) * 100)
+    print(f'{genre:30} {count:4} ({pct:4.1f}%) {bar}')
 
 # 7. BPM range
 print()
 print('🎚️  BPM STATISTICS (for songs with BPM data):')
 print('-' * 70)
-cursor.execute('''
-    SELECT 
-        MIN(bpm) as min_bpm,
-        MAX(bpm) as max_bpm,
-        AVG(bpm) as avg_bpm,
-        COUNT(*) as count
-    FROM songs 
-    WHERE bpm IS NOT NULL
-''')
-row = cursor.fetchone()
-if row and row['count'] > 0:
-    print(f'  Min BPM: {row["min_bpm"]:.1f}')
-    print(f'  Max BPM: {row["max_bpm"]:.1f}')
-    print(f'  Avg BPM: {row["avg_bpm"]:.1f}')
-    print(f'  Songs with BPM: {row["count"]:,}')
+if bpm_count > 0:
+    # MIN/MAX on their own are single idx_bpm lookups; the average comes from bpm_sum
+    min_bpm = cursor.execute('SELECT MIN(bpm) FROM songs').fetchone()[0]
+    max_bpm = cursor.execute('SELECT MAX(bpm) FROM songs').fetchone()[0]
+    print(f'  Min BPM: {min_bpm:.1f}')
+    print(f'  Max BPM: {max_bpm:.1f}')
+    print(f'  Avg BPM: {stats["bpm_sum"] / bpm_count:.1f}')
+    print(f'  Songs with BPM: {bpm_count:,}')
 else:
     print('  No BPM data available')
 
@@ -107,8 +107,7 @@ print('🔎 QUERY TESTS:')
 print('-' * 70)
 
 # Test 1: Find phonk songs
-cursor.execute("SELECT COUNT(*) as count FROM songs WHERE genre = 'phonk'")
-phonk_count = cursor.fetchone()['count']
+phonk_count = song_stats.genre_songs(conn, 'phonk')
 print(f'Phonk songs: {phonk_count}')
 
 # Test 2: Find songs with BPM between 100-130 (upbeat)
@@ -117,11 +116,10 @@ upbeat_count = cursor.fetchone()['count']
 print(f'Upbeat songs (100-130 BPM): {upbeat_count}')
 
 # Test 3: Find songs by specific artist
-cursor.execute("SELECT COUNT(*) as count FROM songs GROUP BY artist ORDER BY COUNT(*) DESC LIMIT 1")
-top_artist_count = cursor.fetchone()['count']
-cursor.execute("SELECT artist FROM songs GROUP BY artist ORDER BY COUNT(*) DESC LIMIT 1")
-top_artist = cursor.fetchone()['artist']
-print(f'Most prolific artist: {top_artist} ({top_artist_count} songs)')
+top_artists = song_stats.top_artists(conn, 1)
+if top_artists:
+    top_artist, top_artist_count = top_artists[0]
+    print(f'Most prolific artist: {top_artist} ({top_artist_count} songs)')
 
 print()
 print('✅ PHASE 1 VERIFICATION COMPLETE')